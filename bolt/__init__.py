@@ -1,7 +1,4 @@
-from . import (
-    bot, cogs, database, optional_cogs
-)
-
+# The subpackages are imported on demand, so that `python -m bolt --profile-startup` can measure them.
 __all__ = [
     'bot', 'cogs', 'database', 'optional_cogs'
 ]
@@ -1,37 +1,136 @@
+import argparse
+import importlib
 import logging
-from os import getenv
+import time
+from os import environ, getenv
+from typing import List
 
-from .bot import Bot
-from .bot.config import CONFIG
-from .constants import MAIN_COGS, MAIN_COGS_BASE_PATH, OPTIONAL_COGS, OPTIONAL_COGS_BASE_PATH
+from .startup import ImportProfiler
 
 
-logging.basicConfig(
-    format="%(asctime)s | %(name)25s | %(levelname)8s | %(message)s",
-    datefmt="%d.%m.%y %H:%M:%S",
-    level=getattr(logging, getenv('LOG_LEVEL', default='INFO'))
-)
-
 log = logging.getLogger(__name__)
-logging.getLogger('discord').setLevel(logging.ERROR)
-logging.getLogger('websockets').setLevel(logging.ERROR)
 
 
-if __name__ == '__main__':
-    client = Bot()
+def configure_logging(cluster_id: int = None):
+    # Clusters share the output of the launcher, so their lines are prefixed with their ID.
+    prefix = "cluster {0} | ".format(cluster_id) if cluster_id is not None else ""
+    logging.basicConfig(
+        format=prefix + "%(asctime)s | %(name)25s | %(levelname)8s | %(message)s",
+        datefmt="%d.%m.%y %H:%M:%S",
+        level=getattr(logging, getenv('LOG_LEVEL', default='INFO'))
+    )
+    logging.getLogger('discord').setLevel(logging.ERROR)
+    logging.getLogger('websockets').setLevel(logging.ERROR)
+
+
+def load_cog(client, path: str, cog_timings: dict):
+    """
+    Load the given extension, measuring how long importing it
+    and running its `setup` function take separately.
+    """
+
+    started = time.perf_counter()
+    try:
+        importlib.import_module(path)
+    except ModuleNotFoundError as err:
+        log.error('Could not load Cog \'{0}\': {1}.'.format(path, err))
+        return
+    imported = time.perf_counter()
+    client.load_extension(path)
+    cog_timings[path] = (imported - started, time.perf_counter() - imported)
+
+
+async def get_enabled_optional_cogs():
+    from .optional_cogs.base import enabled_cog_names
+
+    try:
+        return await enabled_cog_names()
+    except Exception:
+        # Rather start slower than without cogs that guilds rely on.
+        log.exception('Could not determine the enabled optional Cogs, loading all of them.')
+        return None
+
+
+def main(args):
+    profiler = ImportProfiler()
+    if args.profile_startup:
+        profiler.start()
+    started = time.perf_counter()
+
+    from .bot import Bot
+    from .bot.config import CONFIG
+    from .cluster import ClusterClient
+    from .constants import MAIN_COGS, MAIN_COGS_BASE_PATH, OPTIONAL_COGS, OPTIONAL_COGS_BASE_PATH
+
+    shard_options = {}
+    if args.shard_count is not None:
+        shard_options['shard_count'] = args.shard_count
+    if args.shard_ids is not None:
+        shard_options['shard_ids'] = args.shard_ids
+    # The cluster launcher passes the path of its socket to every cluster it starts.
+    cluster = None
+    if 'BOLT_CLUSTER_SOCKET' in environ:
+        cluster = ClusterClient(args.cluster_id, environ['BOLT_CLUSTER_SOCKET'])
+
+    client = Bot(cluster=cluster, **shard_options)
+    cog_timings = {}
     log.debug('Loading Cogs...')
     for cog in MAIN_COGS:
-        try:
-            client.load_extension(MAIN_COGS_BASE_PATH + cog)
-        except ModuleNotFoundError as err:
-            log.error('Could not load Cog \'{0}\': {1}.'.format(cog, err))
+        load_cog(client, MAIN_COGS_BASE_PATH + cog, cog_timings)
+
+    # Optional cogs are loaded by `enablecog` once a guild enables them.
+    # Profiling covers all of them instead, and should not need a database.
+    enabled_cogs = None
+    if not args.profile_startup:
+        enabled_cogs = client.loop.run_until_complete(get_enabled_optional_cogs())
     for cog in OPTIONAL_COGS:
-        try:
-            client.load_extension(OPTIONAL_COGS_BASE_PATH + cog)
-        except ModuleNotFoundError as err:
-            log.error('Could not load Cog \'{0}\': {1}.'.format(cog, err))
+        if enabled_cogs is None or cog.title() in enabled_cogs:
+            load_cog(client, OPTIONAL_COGS_BASE_PATH + cog, cog_timings)
+        else:
+            log.debug('Not loading optional Cog \'{0}\', no guild has it enabled.'.format(cog))
+
+    if args.profile_startup:
+        profiler.stop()
+        log.info('Started up in {0:.1f}ms.'.format((time.perf_counter() - started) * 1000))
+        log.info('{0:>8} {1:>8}  {2}'.format('import', 'setup', 'cog'))
+        for path, (import_time, setup_time) in sorted(cog_timings.items(), key=lambda item: -sum(item[1])):
+            log.info('{0:>6.1f}ms {1:>6.1f}ms  {2}'.format(import_time * 1000, setup_time * 1000, path))
+        log.info('{0:>8} {1:>8}  {2}'.format('self', 'total', 'module'))
+        for name, own, cumulative in profiler.slowest(args.profile_limit):
+            log.info('{0:>6.1f}ms {1:>6.1f}ms  {2}'.format(own * 1000, cumulative * 1000, name))
+        client.loop.run_until_complete(client.close())
+        return
 
     log.info('Logging in...')
     client.run(CONFIG['discord']['token'])
     client.close()
     log.info('Logged off.')
+
+
+def shard_id_list(value: str) -> List[int]:
+    return [int(shard_id) for shard_id in value.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m bolt')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Report the slowest imports and how long loading every Cog takes, then exit.")
+    parser.add_argument('--profile-limit', type=int, default=25,
+                        help="How many of the slowest imports to report.")
+    parser.add_argument('--clusters', type=int,
+                        help="Split the shards across this many processes, supervised by this one.")
+    parser.add_argument('--shard-count', type=int,
+                        help="The total amount of shards, as recommended by Discord if omitted.")
+    parser.add_argument('--shard-ids', type=shard_id_list,
+                        help="The comma-separated IDs of the shards to run in this process.")
+    parser.add_argument('--cluster-id', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.shard_ids is not None and args.shard_count is None:
+        parser.error("--shard-ids requires --shard-count")
+
+    configure_logging(args.cluster_id)
+    if args.clusters is not None:
+        from .cluster import run_launcher
+        run_launcher(args.clusters, args.shard_count)
+    else:
+        main(args)
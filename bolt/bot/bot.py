@@ -1,9 +1,17 @@
+import functools
 import logging
+import os
 import random
+import time
 
 from discord import Colour, Embed, Forbidden, Game, Guild, HTTPException
 from discord.ext import commands
 
+from bolt import metrics, snapshot
+from bolt.cluster import ClusterClient
+from bolt.recorder import GatewayRecorder
+from bolt.watchdog import LoopWatchdog
+from bolt.web import WebClient
 from .config import CONFIG, get_prefix
 
 
@@ -11,13 +19,60 @@ log = logging.getLogger(__name__)
 
 
 class Bot(commands.AutoShardedBot):
-    def __init__(self):
+    def __init__(self, cluster: ClusterClient = None, **kwargs):
         super().__init__(
             command_prefix=get_prefix,
             description=CONFIG['discord']['description'],
             pm_help=None,
-            game=Game(name=random.choice(CONFIG['discord']['playing_states']))
+            game=Game(name=random.choice(CONFIG['discord']['playing_states'])),
+            **kwargs
         )
+        # Set when running as one of multiple clusters, see `bolt.cluster`.
+        self.cluster = cluster
+        self.web = WebClient(self.loop)
+        self.watchdog = LoopWatchdog(self.loop)
+        self.http.request = self._count_rest_calls(self.http.request)
+
+        # Set `BOLT_RECORD_GATEWAY` to a path to record all received gateway events,
+        # which can be replayed with `scripts/replay_gateway.py` for benchmarking.
+        record_path = os.environ.get('BOLT_RECORD_GATEWAY')
+        self.recorder = GatewayRecorder(record_path) if record_path else None
+        # The monotonic time at which the latest gateway event was received. Listeners
+        # of an event are started before the next one is read, so reading this before
+        # their first `await` gives them the time at which their own event was received.
+        self.event_received_at = time.monotonic()
+
+        metrics_config = CONFIG.get('metrics')
+        self.metrics_server = None
+        if metrics_config is not None:
+            # The exporter pulls in the server side of `aiohttp`, which the bot does not need otherwise.
+            from bolt.exporter import MetricsServer
+            # Clusters run on the same host, so every cluster listens on a port of its own.
+            port = metrics_config['port'] + (cluster.cluster_id if cluster is not None else 0)
+            self.metrics_server = MetricsServer(self, metrics_config['host'], port)
+
+    @staticmethod
+    def _count_rest_calls(request):
+        @functools.wraps(request)
+        async def counted_request(*args, **kwargs):
+            metrics.record_rest_call()
+            return await request(*args, **kwargs)
+        return counted_request
+
+    def dispatch(self, event_name, *args, **kwargs):
+        if event_name == 'socket_response':
+            self.event_received_at = time.monotonic()
+            metrics.gateway_events[args[0].get('t') or 'OP_' + str(args[0].get('op'))] += 1
+            if self.recorder is not None:
+                self.recorder.record(args[0])
+        super().dispatch(event_name, *args, **kwargs)
+
+    async def invoke(self, ctx: commands.Context):
+        if ctx.command is None:
+            return await super().invoke(ctx)
+
+        with metrics.track_command(ctx.command.qualified_name):
+            await super().invoke(ctx)
 
     @staticmethod
     def make_error_embed(**kwargs):
@@ -140,8 +195,38 @@ class Bot(commands.AutoShardedBot):
             log.error("Unhandled command error (from message {0})".format(ctx.message.content))
             await super().on_command_error(ctx, error)
 
+    async def start(self, *args, **kwargs):
+        self.watchdog.start()
+        if self.cluster is not None:
+            await self.cluster.connect(self.loop)
+        # Cogs that are already loaded get their caches restored right away, others once they register them.
+        if snapshot.SNAPSHOT_PATH:
+            await snapshot.restore()
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+        await super().start(*args, **kwargs)
+
+    async def close(self):
+        if snapshot.SNAPSHOT_PATH:
+            try:
+                snapshot.save()
+            except OSError:
+                log.exception("Could not write the cache snapshot.")
+        await super().close()
+        self.watchdog.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+        await self.web.close()
+        if self.cluster is not None:
+            await self.cluster.close()
+
     async def on_ready(self):
         log.info("Logged in.")
+        snapshot.clear_restored()
+        if self.cluster is not None:
+            await self.cluster.notify_ready()
 
     async def on_message(self, msg):
         if msg.author.bot:
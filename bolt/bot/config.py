@@ -1,4 +1,5 @@
 import json
+from collections.abc import Mapping
 
 import discord
 from discord.ext import commands
@@ -6,8 +7,34 @@ from discord.ext import commands
 from bolt.cogs.config.util import get_prefix_for_guild
 
 
-with open("config.json") as f:
-    CONFIG = json.load(f)
+class Config(Mapping):
+    """
+    The configuration of the bot, which is only read from its file
+    when first accessed, so that importing the bot does not require it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data = None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            with open(self.path) as f:
+                self._data = json.load(f)
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+CONFIG = Config("config.json")
 
 
 async def get_prefix(bot, msg):
@@ -0,0 +1,470 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from bolt.slowlog import SLOW_QUERY_LOG_PATH
+from bolt.snapshot import SNAPSHOT_PATH
+
+
+log = logging.getLogger(__name__)
+
+# Discord allows a single IDENTIFY every 5 seconds across all shards of a bot.
+IDENTIFY_INTERVAL = 5.5
+# How long a cluster may take to become ready after identifying all of its shards,
+# before the next cluster starts identifying anyways.
+READY_TIMEOUT = 120
+
+# Crashed clusters are restarted after this many seconds, doubled on every crash in a row.
+RESTART_BACKOFF_MIN = 5
+RESTART_BACKOFF_MAX = 300
+# Clusters that ran for this many seconds before exiting are restarted with the minimum backoff.
+STABLE_UPTIME = 600
+# How long clusters get to shut down gracefully before they are killed.
+SHUTDOWN_TIMEOUT = 30
+
+# How long to wait for the clusters to respond to a broadcast.
+BROADCAST_TIMEOUT = 10
+# How much longer than that clusters wait for the reply of the launcher.
+BROADCAST_REPLY_MARGIN = 5
+# Messages are single lines of JSON, which may contain things like all guilds of a cluster.
+MESSAGE_LIMIT = 2 ** 24
+
+# Runs a broadcast command on a cluster, taking its arguments and returning a JSON-serializable result.
+CommandHandler = Callable[[Any], Awaitable[Any]]
+
+
+def split_shards(shard_count: int, cluster_count: int) -> List[List[int]]:
+    """
+    Split the given amount of shards into contiguous ranges, one for every cluster.
+
+    Args:
+        shard_count (int):
+            The total amount of shards.
+        cluster_count (int):
+            The amount of clusters to split the shards across.
+
+    Returns:
+        List[List[int]]:
+            The shard IDs of every cluster.
+    """
+
+    return [
+        list(range(cluster * shard_count // cluster_count, (cluster + 1) * shard_count // cluster_count))
+        for cluster in range(cluster_count)
+    ]
+
+
+def cluster_path(path: str, cluster_id: int) -> str:
+    """Get a path for a file of the given cluster, such as `slow_queries.cluster-0.log`."""
+
+    root, extension = os.path.splitext(path)
+    return f"{root}.cluster-{cluster_id}{extension}"
+
+
+class Connection:
+    """A connection between the launcher and a cluster, exchanging one JSON object per line."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._write_lock = asyncio.Lock()
+
+    async def send(self, message: dict):
+        async with self._write_lock:
+            self.writer.write(json.dumps(message).encode() + b'\n')
+            await self.writer.drain()
+
+    async def receive(self) -> Optional[dict]:
+        """Receive the next message, or `None` if the connection was closed."""
+
+        line = await self.reader.readline()
+        return json.loads(line) if line else None
+
+    def close(self):
+        self.writer.close()
+
+
+class BroadcastResults(NamedTuple):
+    # Maps the IDs of the clusters that responded to their results.
+    results: Dict[int, Any]
+    # The IDs of the clusters that did not respond in time.
+    missing: List[int]
+
+
+class ClusterClient:
+    """
+    The connection of a cluster to its launcher, through which it can
+    run commands on all clusters and receive commands from the others.
+    """
+
+    def __init__(self, cluster_id: int, socket_path: str):
+        self.cluster_id = cluster_id
+        self.socket_path = socket_path
+        self.connection = None
+        self.handlers: Dict[str, CommandHandler] = {}
+        self._request_ids = itertools.count()
+        self._replies: Dict[int, asyncio.Future] = {}
+        self._read_task = None
+
+    def register_handler(self, command: str, handler: CommandHandler):
+        """
+        Register the handler of a command broadcast by any cluster.
+
+        Args:
+            command (str):
+                The name of the command.
+            handler (CommandHandler):
+                A coroutine function taking the arguments of the
+                command and returning a JSON-serializable result.
+        """
+
+        self.handlers[command] = handler
+
+    def unregister_handler(self, command: str):
+        self.handlers.pop(command, None)
+
+    async def connect(self, loop: asyncio.AbstractEventLoop):
+        reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=MESSAGE_LIMIT)
+        self.connection = Connection(reader, writer)
+        await self.connection.send({'op': 'hello', 'cluster': self.cluster_id})
+        self._read_task = loop.create_task(self.read_messages())
+
+    async def close(self):
+        if self._read_task is not None:
+            self._read_task.cancel()
+        if self.connection is not None:
+            self.connection.close()
+
+    async def read_messages(self):
+        try:
+            while True:
+                message = await self.connection.receive()
+                if message is None:
+                    log.error("Lost the connection to the cluster launcher.")
+                    break
+
+                if message['op'] == 'command':
+                    asyncio.ensure_future(self.run_command(message))
+                elif message['op'] == 'reply':
+                    reply = self._replies.pop(message['id'], None)
+                    if reply is not None and not reply.done():
+                        reply.set_result(message)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for reply in self._replies.values():
+                if not reply.done():
+                    reply.set_exception(ConnectionError("lost the connection to the cluster launcher"))
+            self._replies.clear()
+
+    async def run_command(self, message: dict):
+        result = None
+        handler = self.handlers.get(message['command'])
+        if handler is None:
+            log.warning(f"Received broadcast of unknown command `{message['command']}`.")
+        else:
+            try:
+                result = await handler(message['args'])
+            except Exception:
+                log.exception(f"Failed to run broadcast command `{message['command']}`.")
+        await self.connection.send({'op': 'result', 'request': message['request'], 'result': result})
+
+    async def broadcast(self, command: str, args: Any = None) -> BroadcastResults:
+        """
+        Run the given command on all clusters, including this one.
+
+        Args:
+            command (str):
+                The name of the command to run.
+            args (Any):
+                JSON-serializable arguments for the command handlers.
+
+        Returns:
+            BroadcastResults:
+                The results of all clusters that responded in time.
+
+        Raises:
+            ConnectionError:
+                The connection to the launcher was lost.
+            asyncio.TimeoutError:
+                The launcher did not reply in time.
+        """
+
+        if self._read_task is None or self._read_task.done():
+            raise ConnectionError("not connected to the cluster launcher")
+
+        request_id = next(self._request_ids)
+        reply = asyncio.get_event_loop().create_future()
+        self._replies[request_id] = reply
+        try:
+            await self.connection.send({'op': 'broadcast', 'id': request_id, 'command': command, 'args': args})
+            # The launcher replies after at most `BROADCAST_TIMEOUT`, but may die before it does.
+            message = await asyncio.wait_for(reply, BROADCAST_TIMEOUT + BROADCAST_REPLY_MARGIN)
+        finally:
+            self._replies.pop(request_id, None)
+        return BroadcastResults(
+            results={cluster_id: result for cluster_id, result in message['results']},
+            missing=message['missing']
+        )
+
+    async def notify_ready(self):
+        await self.connection.send({'op': 'ready'})
+
+    async def request_shutdown(self):
+        """Ask the launcher to shut down all clusters, including this one."""
+
+        await self.connection.send({'op': 'shutdown'})
+
+
+class Cluster:
+    """The state of a cluster process, as tracked by the launcher."""
+
+    def __init__(self, cluster_id: int, shard_ids: List[int]):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.process = None
+        self.connection = None
+        self.ready = asyncio.Event()
+
+
+class ClusterLauncher:
+    """
+    Runs the shards of the bot across multiple processes, which are called clusters.
+
+    Clusters are started one after another, each once the previous one has
+    identified its shards, and are restarted with a backoff when they exit.
+    They connect to the launcher through a Unix socket to broadcast commands.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, shard_count: int, cluster_count: int):
+        self.loop = loop
+        self.shard_count = shard_count
+        self.clusters = [
+            Cluster(cluster_id, shard_ids)
+            for cluster_id, shard_ids in enumerate(split_shards(shard_count, cluster_count))
+        ]
+        self.socket_directory = tempfile.mkdtemp(prefix='bolt-')
+        self.socket_path = os.path.join(self.socket_directory, 'cluster.sock')
+        self.stopped = asyncio.Event()
+        self._identify_lock = asyncio.Lock()
+        self._request_ids = itertools.count()
+        # Maps the IDs of running broadcasts to the futures of the results of every cluster.
+        self._pending: Dict[int, Dict[int, asyncio.Future]] = {}
+
+    async def run(self):
+        server = await asyncio.start_unix_server(self.handle_connection, self.socket_path, limit=MESSAGE_LIMIT)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            self.loop.add_signal_handler(signum, self.stop)
+
+        log.info(f"Running {self.shard_count} shards across {len(self.clusters)} clusters.")
+        try:
+            await asyncio.gather(*(self.supervise(cluster) for cluster in self.clusters))
+        finally:
+            server.close()
+            await server.wait_closed()
+            shutil.rmtree(self.socket_directory, ignore_errors=True)
+        log.info("All clusters stopped.")
+
+    def stop(self):
+        if self.stopped.is_set():
+            return
+
+        log.info("Shutting down all clusters.")
+        self.stopped.set()
+        for cluster in self.clusters:
+            if cluster.process is not None and cluster.process.returncode is None:
+                cluster.process.terminate()
+        self.loop.call_later(SHUTDOWN_TIMEOUT, self.kill)
+
+    def kill(self):
+        for cluster in self.clusters:
+            if cluster.process is not None and cluster.process.returncode is None:
+                log.warning(f"Cluster {cluster.cluster_id} did not shut down in time, killing it.")
+                cluster.process.kill()
+
+    async def spawn(self, cluster: Cluster) -> asyncio.subprocess.Process:
+        env = {**os.environ, 'BOLT_CLUSTER_SOCKET': self.socket_path}
+        # Every cluster needs files of its own, since they would overwrite each other otherwise.
+        for name, path in (
+            ('BOLT_CACHE_SNAPSHOT', SNAPSHOT_PATH),
+            ('BOLT_SLOW_QUERY_LOG', SLOW_QUERY_LOG_PATH),
+            ('BOLT_RECORD_GATEWAY', os.environ.get('BOLT_RECORD_GATEWAY'))
+        ):
+            if path:
+                env[name] = cluster_path(path, cluster.cluster_id)
+
+        cluster.ready.clear()
+        return await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'bolt',
+            '--cluster-id', str(cluster.cluster_id),
+            '--shard-ids', ','.join(str(shard_id) for shard_id in cluster.shard_ids),
+            '--shard-count', str(self.shard_count),
+            env=env
+        )
+
+    async def wait_until_identified(self, cluster: Cluster):
+        ready = asyncio.ensure_future(cluster.ready.wait())
+        exited = asyncio.ensure_future(cluster.process.wait())
+        done, pending = await asyncio.wait(
+            (ready, exited),
+            timeout=IDENTIFY_INTERVAL * len(cluster.shard_ids) + READY_TIMEOUT,
+            return_when=asyncio.FIRST_COMPLETED
+        )
+        for future in pending:
+            future.cancel()
+
+        if ready in done:
+            log.info(f"Cluster {cluster.cluster_id} is ready.")
+        elif not done:
+            log.warning(f"Cluster {cluster.cluster_id} did not become ready in time, starting the next one.")
+        # Leave room for the IDENTIFY of the last shard of this cluster.
+        await asyncio.sleep(IDENTIFY_INTERVAL)
+
+    async def supervise(self, cluster: Cluster):
+        backoff = RESTART_BACKOFF_MIN
+        while not self.stopped.is_set():
+            # Clusters identify one after another, including when they are restarted.
+            async with self._identify_lock:
+                if self.stopped.is_set():
+                    break
+                started = time.monotonic()
+                log.info(f"Starting cluster {cluster.cluster_id} with shards {cluster.shard_ids}.")
+                cluster.process = await self.spawn(cluster)
+                await self.wait_until_identified(cluster)
+
+            returncode = await cluster.process.wait()
+            if self.stopped.is_set():
+                break
+
+            uptime = time.monotonic() - started
+            if uptime >= STABLE_UPTIME:
+                backoff = RESTART_BACKOFF_MIN
+            log.error(
+                f"Cluster {cluster.cluster_id} exited with code {returncode} after {uptime:.0f}s, "
+                f"restarting it in {backoff}s."
+            )
+            try:
+                await asyncio.wait_for(self.stopped.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, RESTART_BACKOFF_MAX)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = Connection(reader, writer)
+        hello = await connection.receive()
+        if hello is None or hello.get('op') != 'hello':
+            connection.close()
+            return
+
+        cluster = self.clusters[hello['cluster']]
+        cluster.connection = connection
+        try:
+            while True:
+                message = await connection.receive()
+                if message is None:
+                    break
+
+                if message['op'] == 'ready':
+                    cluster.ready.set()
+                elif message['op'] == 'broadcast':
+                    asyncio.ensure_future(self.broadcast(cluster, message))
+                elif message['op'] == 'result':
+                    result = self._pending.get(message['request'], {}).get(cluster.cluster_id)
+                    if result is not None and not result.done():
+                        result.set_result(message['result'])
+                elif message['op'] == 'shutdown':
+                    self.stop()
+        finally:
+            if cluster.connection is connection:
+                cluster.connection = None
+            connection.close()
+
+    async def broadcast(self, origin: Cluster, message: dict):
+        request_id = next(self._request_ids)
+        results = {}
+        self._pending[request_id] = results
+
+        try:
+            for cluster in self.clusters:
+                connection = cluster.connection
+                if connection is None:
+                    continue
+                results[cluster.cluster_id] = self.loop.create_future()
+                try:
+                    await connection.send({
+                        'op': 'command',
+                        'request': request_id,
+                        'command': message['command'],
+                        'args': message['args']
+                    })
+                except (ConnectionError, OSError) as err:
+                    log.warning(f"Could not send broadcast to cluster {cluster.cluster_id}: {err}")
+                    del results[cluster.cluster_id]
+            if results:
+                await asyncio.wait(results.values(), timeout=BROADCAST_TIMEOUT)
+        finally:
+            del self._pending[request_id]
+            # The origin waits for a reply, so it is sent even if sending the commands failed.
+            await self.send_reply(origin, message['id'], results)
+
+    async def send_reply(self, origin: Cluster, reply_id: int, results: Dict[int, asyncio.Future]):
+        connection = origin.connection
+        if connection is None:
+            return
+
+        try:
+            await connection.send({
+                'op': 'reply',
+                'id': reply_id,
+                'results': [[cluster_id, result.result()] for cluster_id, result in results.items() if result.done()],
+                'missing': [
+                    cluster.cluster_id for cluster in self.clusters
+                    if cluster.cluster_id not in results or not results[cluster.cluster_id].done()
+                ]
+            })
+        except (ConnectionError, OSError) as err:
+            log.warning(f"Could not send broadcast reply to cluster {origin.cluster_id}: {err}")
+
+
+async def get_recommended_shard_count(token: str) -> int:
+    """Ask Discord how many shards the bot should use."""
+
+    from discord.http import HTTPClient, Route
+
+    http = HTTPClient()
+    try:
+        await http.static_login(token, bot=True)
+        return (await http.request(Route('GET', '/gateway/bot')))['shards']
+    finally:
+        await http.close()
+
+
+def run_launcher(cluster_count: int, shard_count: int = None):
+    """
+    Run the bot across the given amount of clusters until it is shut down.
+
+    Args:
+        cluster_count (int):
+            The amount of processes to run.
+        shard_count (int):
+            The total amount of shards, as recommended by Discord if omitted.
+    """
+
+    from bolt.bot.config import CONFIG
+
+    loop = asyncio.get_event_loop()
+    if shard_count is None:
+        shard_count = loop.run_until_complete(get_recommended_shard_count(CONFIG['discord']['token']))
+    # Every cluster needs at least one shard.
+    shard_count = max(shard_count, cluster_count)
+
+    launcher = ClusterLauncher(loop, shard_count, cluster_count)
+    loop.run_until_complete(launcher.run())
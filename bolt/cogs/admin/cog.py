@@ -1,25 +1,68 @@
 import logging
+from typing import List, Optional
 
 import discord
 from discord.ext import commands
 
+from bolt import metrics
 from bolt.constants import MAIN_COGS_BASE_PATH
 
 
 log = logging.getLogger(__name__)
 
+# How many of the slowest commands are shown by `perf`.
+PERF_COMMANDS_SHOWN = 15
+
 
 class Admin:
     """Contains Commands for the Administration of the Bot."""
 
     def __init__(self, bot):
         self.bot = bot
+        if self.bot.cluster is not None:
+            self.bot.cluster.register_handler('guilds', self.collect_guilds)
+            self.bot.cluster.register_handler('load_cog', self.collect_cog_load)
         log.debug('Loaded Cog Admin.')
 
-    @staticmethod
-    def __unload():
+    def __unload(self):
+        if self.bot.cluster is not None:
+            self.bot.cluster.unregister_handler('guilds')
+            self.bot.cluster.unregister_handler('load_cog')
         log.debug('Unloaded Cog Admin.')
 
+    async def collect_guilds(self, _args) -> List[List]:
+        return [[guild.id, guild.name] for guild in self.bot.guilds]
+
+    async def collect_cog_load(self, extension_name: str) -> Optional[str]:
+        # Failures of broadcast commands are not reported otherwise, which would make this look like a success.
+        try:
+            return self.load_cog(extension_name)
+        except Exception as err:
+            return str(err)
+
+    def load_cog(self, extension_name: str) -> Optional[str]:
+        """
+        Load the specified main cog.
+
+        Args:
+            extension_name (str):
+                The name of the cog to load, such as `tags`.
+
+        Returns:
+            Optional[str]:
+                The reason why the cog could not be loaded,
+                or `None` if it was loaded successfully.
+        """
+
+        if extension_name.title() in self.bot.cogs:
+            return "Cog is already loaded"
+
+        try:
+            self.bot.load_extension(MAIN_COGS_BASE_PATH + extension_name)
+        except ImportError as err:
+            return str(err)
+        return None
+
     @commands.group(invoke_without_command=True, aliases=['cog'])
     @commands.is_owner()
     async def cogs(self, ctx):
@@ -33,32 +76,36 @@ class Admin:
     @cogs.command(name='load')
     @commands.is_owner()
     async def cogs_load(self, ctx, extension_name: str):
-        """Load the specified cog."""
+        """Load the specified cog.
 
-        if extension_name.title() in self.bot.cogs:
+        When running multiple clusters, the cog is loaded on all of them.
+        """
+
+        if self.bot.cluster is None:
+            error = self.load_cog(extension_name)
+            errors = [error] if error is not None else []
+        else:
+            broadcast = await self.bot.cluster.broadcast('load_cog', extension_name)
+            errors = [
+                "Cluster {0}: {1}".format(cluster_id, error)
+                for cluster_id, error in sorted(broadcast.results.items())
+                if error is not None
+            ]
+            errors.extend("Cluster {0}: Did not respond".format(cluster_id) for cluster_id in broadcast.missing)
+
+        if errors:
             error_embed = discord.Embed(
                 title="Failed to load Cog `{0}`:".format(extension_name),
-                description="Cog is already loaded",
+                description='\n'.join(errors),
                 colour=discord.Colour.red()
             )
             await ctx.send(embed=error_embed)
-
         else:
-            try:
-                self.bot.load_extension(MAIN_COGS_BASE_PATH + extension_name)
-            except ImportError as err:
-                error_embed = discord.Embed(
-                    title="Failed to load Cog `{0}`:".format(extension_name),
-                    description=str(err),
-                    colour=discord.Colour.red()
-                )
-                await ctx.send(embed=error_embed)
-            else:
-                loaded_cog_embed = discord.Embed(
-                    title="Loaded Cog `{0}`!".format(extension_name),
-                    colour=discord.Colour.green()
-                )
-                await ctx.send(embed=loaded_cog_embed)
+            loaded_cog_embed = discord.Embed(
+                title="Loaded Cog `{0}`!".format(extension_name),
+                colour=discord.Colour.green()
+            )
+            await ctx.send(embed=loaded_cog_embed)
 
     @cogs.command(name='unload')
     @commands.is_owner()
@@ -99,7 +146,11 @@ class Admin:
         """Shutdown the bot."""
 
         await ctx.send(embed=discord.Embed(description='Shutting down...'))
-        await self.bot.close()
+        if self.bot.cluster is not None:
+            # The launcher shuts down every cluster, including this one.
+            await self.bot.cluster.request_shutdown()
+        else:
+            await self.bot.close()
 
     @commands.command(name='setplaying')
     @commands.is_owner()
@@ -125,13 +176,17 @@ class Admin:
     @commands.command()
     @commands.is_owner()
     async def guilds(self, ctx):
-        """Returns a list of all Guilds that the Bot can see."""
+        """Returns a list of all Guilds that the Bot can see, on all clusters."""
 
-        total = sum(1 for _ in self.bot.guilds)
+        if self.bot.cluster is None:
+            guilds = await self.collect_guilds(None)
+        else:
+            broadcast = await self.bot.cluster.broadcast('guilds')
+            guilds = [guild for cluster_guilds in broadcast.results.values() for guild in cluster_guilds]
 
         await ctx.send(embed=discord.Embed(
-            title='Guilds ({0} total)'.format(total),
-            description=', '.join("{0} (`{1}`)".format(g, g.id) for g in self.bot.guilds),
+            title='Guilds ({0} total)'.format(len(guilds)),
+            description=', '.join("{0} (`{1}`)".format(name, guild_id) for guild_id, name in guilds),
             colour=discord.Colour.blue()
         ))
 
@@ -170,3 +225,44 @@ class Admin:
                 colour=discord.Colour.red()
             )
             await ctx.send(embed=error_embed)
+
+    @commands.command()
+    @commands.is_owner()
+    async def perf(self, ctx):
+        """Show latency percentiles and resource usage of the slowest commands."""
+
+        ranked = sorted(
+            metrics.command_metrics.items(),
+            key=lambda item: item[1].wall_time.quantile(0.95),
+            reverse=True
+        )[:PERF_COMMANDS_SHOWN]
+
+        if not ranked:
+            return await ctx.send(embed=discord.Embed(
+                description="No commands were invoked yet.",
+                colour=discord.Colour.blue()
+            ))
+
+        lines = ["{0:<20} {1:>5} {2:>7} {3:>7} {4:>7} {5:>7} {6:>5} {7:>5}".format(
+            "command", "calls", "p50", "p95", "p99", "db p95", "db", "rest"
+        )]
+        for name, command_metrics in ranked:
+            wall_time = command_metrics.wall_time
+            lines.append("{0:<20} {1:>5} {2:>6.0f}ms {3:>6.0f}ms {4:>6.0f}ms {5:>6.0f}ms {6:>5.1f} {7:>5.1f}".format(
+                name[:20],
+                wall_time.count,
+                wall_time.quantile(0.50) * 1000,
+                wall_time.quantile(0.95) * 1000,
+                wall_time.quantile(0.99) * 1000,
+                command_metrics.db_time.quantile(0.95) * 1000,
+                command_metrics.db_calls.sum / wall_time.count,
+                command_metrics.rest_calls.sum / wall_time.count
+            ))
+
+        await ctx.send(embed=discord.Embed(
+            title="Command performance",
+            description="```\n{0}```".format('\n'.join(lines)),
+            colour=discord.Colour.blue()
+        ).set_footer(
+            text="db and rest show the average amount of calls per invocation."
+        ))
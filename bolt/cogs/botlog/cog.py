@@ -2,11 +2,13 @@ import logging
 from datetime import datetime
 from os import environ
 
-import humanize
 from discord import Colour, Embed, Guild
 
+from bolt.startup import lazy_import
+
 
 log = logging.getLogger(__name__)
+humanize = lazy_import('humanize')
 
 
 class BotLog:
@@ -5,9 +5,11 @@ import discord
 from discord.ext import commands
 from peewee import DoesNotExist
 
+from bolt.constants import OPTIONAL_COGS, OPTIONAL_COGS_BASE_PATH
 from bolt.database import objects
+from bolt.snapshot import bump_version
 from .models import OptionalCog, Prefix
-from .util import get_prefix_for_guild
+from .util import get_enabled_cogs, get_prefix_for_guild
 
 
 log = logging.getLogger(__name__)
@@ -42,6 +44,11 @@ class Config:
         cog_name = cog_name.title()
         cog = self.bot.get_cog(cog_name)
 
+        # Optional cogs are only loaded on startup when a guild has them enabled.
+        if cog is None and cog_name.lower() in OPTIONAL_COGS:
+            self.bot.load_extension(OPTIONAL_COGS_BASE_PATH + cog_name.lower())
+            cog = self.bot.get_cog(cog_name)
+
         if cog is None:
             return await ctx.send(embed=discord.Embed(
                 title="Failed to enable Cog:",
@@ -69,6 +76,8 @@ class Config:
                 name=cog_name,
                 guild_id=ctx.guild.id
             )
+            get_enabled_cogs.cache.pop((ctx.guild.id,), None)
+            await bump_version(ctx.guild.id)
             await ctx.send(embed=discord.Embed(
                 title='Successfully enabled Cog',
                 description='`{0}` is now enabled on this Guild.'.format(cog_name),
@@ -107,6 +116,8 @@ class Config:
                 guild_id=ctx.guild.id
             )
             await objects.delete(optional_cog)
+            get_enabled_cogs.cache.pop((ctx.guild.id,), None)
+            await bump_version(ctx.guild.id)
         except DoesNotExist:
             await ctx.send(embed=discord.Embed(
                 title='Failed to disable Cog:',
@@ -174,6 +185,8 @@ class Config:
             get_prefix_for_guild.cache[(ctx.guild.id,)] = new_prefix
             print(get_prefix_for_guild.cache)
 
+        await bump_version(ctx.guild.id)
+
     @commands.command(name='getprefix')
     @commands.guild_only()
     async def get_prefix(self, ctx):
@@ -1,10 +1,11 @@
-from typing import Optional
+from typing import FrozenSet, Optional
 
 from peewee import DoesNotExist
 
 from bolt.database import objects
 from bolt.decorators import async_cache
-from .models import Prefix
+from bolt.snapshot import register_cache
+from .models import OptionalCog, Prefix
 
 
 @async_cache()
@@ -26,3 +27,38 @@ async def get_prefix_for_guild(guild_id: int) -> Optional[str]:
         return (await objects.get(Prefix, guild_id=guild_id)).prefix
     except DoesNotExist:
         return None
+
+
+@async_cache()
+async def get_enabled_cogs(guild_id: int) -> FrozenSet[str]:
+    """
+    Get the names of all optional cogs enabled on the given guild.
+
+    Args:
+        guild_id (int):
+            The guild ID to fetch the enabled cogs for.
+
+    Returns:
+        FrozenSet[str]:
+            The class names of the enabled cogs, such as `League`.
+    """
+
+    rows = await objects.execute(
+        OptionalCog.select(OptionalCog.name)
+                   .where(OptionalCog.guild_id == guild_id)
+    )
+    return frozenset(row.name for row in rows)
+
+
+register_cache(
+    'prefixes',
+    lambda: {guild_id: prefix for (guild_id,), prefix in get_prefix_for_guild.cache.items()},
+    lambda entries: get_prefix_for_guild.cache.update(((guild_id,), prefix) for guild_id, prefix in entries.items())
+)
+register_cache(
+    'enabled_cogs',
+    lambda: {guild_id: sorted(names) for (guild_id,), names in get_enabled_cogs.cache.items()},
+    lambda entries: get_enabled_cogs.cache.update(
+        ((guild_id,), frozenset(names)) for guild_id, names in entries.items()
+    )
+)
@@ -5,7 +5,6 @@ from datetime import datetime
 from operator import attrgetter
 
 import discord
-import humanize
 import peewee_async
 from discord.ext import commands
 from peewee import DoesNotExist
@@ -14,12 +13,14 @@ from bolt.cogs.mod.models import Mute
 from bolt.cogs.mod.mutes import unmute_member
 from bolt.database import objects
 from bolt.paginator import LinePaginator
+from bolt.startup import lazy_import
 from .constants import INFRACTION_TYPE_EMOJI
 from .models import Infraction
 from .types import InfractionType
 
 
 log = logging.getLogger(__name__)
+humanize = lazy_import('humanize')
 
 
 class Infractions:
@@ -1,12 +1,15 @@
 import logging
 from datetime import datetime
+from typing import Dict
 
 import discord
-import humanize
 from discord.ext import commands
 
+from bolt.startup import lazy_import
+
 
 log = logging.getLogger(__name__)
+humanize = lazy_import('humanize')
 
 
 class Meta:
@@ -14,17 +17,43 @@ class Meta:
 
     def __init__(self, bot):
         self.bot = bot
+        if self.bot.cluster is not None:
+            self.bot.cluster.register_handler('stats', self.collect_stats)
         log.debug('Loaded Cog Meta.')
 
-    @staticmethod
-    def __unload():
+    def __unload(self):
+        if self.bot.cluster is not None:
+            self.bot.cluster.unregister_handler('stats')
         log.debug('Unloaded Cog Meta.')
 
+    async def collect_stats(self, _args) -> Dict[str, int]:
+        stats = {
+            'guilds': len(self.bot.guilds),
+            'members': sum(g.member_count for g in self.bot.guilds)
+        }
+        # Users on multiple clusters cannot be told apart from the
+        # totals, so unique users are only counted without clusters.
+        if self.bot.cluster is None:
+            stats['unique_users'] = len({member.id for member in self.bot.get_all_members()})
+        return stats
+
     @commands.command()
+    @commands.cooldown(1, 30, commands.BucketType.channel)
     async def stats(self, ctx):
         """Displays information and statistics about the Bot."""
 
-        average_members = sum(g.member_count for g in self.bot.guilds) // len(self.bot.guilds)
+        if self.bot.cluster is None:
+            stats = await self.collect_stats(None)
+            clusters = 1
+        else:
+            broadcast = await self.bot.cluster.broadcast('stats')
+            stats = {
+                name: sum(cluster_stats[name] for cluster_stats in broadcast.results.values())
+                for name in ('guilds', 'members')
+            }
+            clusters = len(broadcast.results)
+
+        average_members = stats['members'] // max(stats['guilds'], 1)
         response = discord.Embed()
         response.colour = discord.Colour.blue()
         response.set_thumbnail(
@@ -34,13 +63,14 @@ class Meta:
             icon_url=(await self.bot.application_info()).owner.avatar_url
         ).add_field(
             name='Guilds',
-            value=(f'**Total**: {sum(1 for _ in self.bot.guilds)}\n'
+            value=(f'**Total**: {stats["guilds"]}\n'
                    f'**Avg. Members**: {average_members}\n'
-                   f'**Shards**: {self.bot.shard_count}')
+                   f'**Shards**: {self.bot.shard_count}\n'
+                   f'**Clusters**: {clusters}')
         ).add_field(
             name='Users',
-            value=(f'**Total**: {sum(1 for _ in self.bot.get_all_members())}\n'
-                   f'**Unique**: {len(set(self.bot.get_all_members()))}')
+            value=(f'**Total**: {stats["members"]}'
+                   + (f'\n**Unique**: {stats["unique_users"]}' if 'unique_users' in stats else ''))
         )
 
         await ctx.send(embed=response)
@@ -3,7 +3,6 @@ import logging
 from datetime import datetime
 
 import discord
-import humanize
 import peewee_async
 from discord.ext import commands
 from peewee import DoesNotExist
@@ -12,12 +11,15 @@ from bolt.cogs.infractions.models import Infraction
 from bolt.cogs.infractions.types import InfractionType
 from bolt.cogs.stafflog.util import get_log_channel as get_stafflog_channel
 from bolt.database import objects
+from bolt.snapshot import bump_version
+from bolt.startup import lazy_import
 from .converters import ExpirationDate
 from .models import Mute, MuteRole
-from .mutes import background_unmute_task
+from .mutes import background_unmute_task, get_mute_role_id
 
 
 log = logging.getLogger(__name__)
+humanize = lazy_import('humanize')
 
 
 class Mod:
@@ -64,15 +66,9 @@ class Mod:
         if not active_mute:
             return
 
-        try:
-            configured_mute_role = await objects.get(
-                MuteRole,
-                MuteRole.guild_id == member.guild.id
-            )
-        except DoesNotExist:
-            pass
-        else:
-            mute_role = discord.utils.get(member.guild.roles, id=configured_mute_role.role_id)
+        mute_role_id = await get_mute_role_id(member.guild.id)
+        if mute_role_id is not None:
+            mute_role = discord.utils.get(member.guild.roles, id=mute_role_id)
             if mute_role is not None:
                 await member.add_roles(
                     mute_role,
@@ -289,19 +285,15 @@ class Mod:
         To specify a duration spanning multiple words, use double quotes.
         """
 
-        try:
-            mute_role = await objects.get(
-                MuteRole,
-                MuteRole.guild_id == ctx.guild.id
-            )
-        except DoesNotExist:
+        mute_role_id = await get_mute_role_id(ctx.guild.id)
+        if mute_role_id is None:
             await ctx.send(embed=discord.Embed(
                 title=f'Cannot mute user `{member}` (`{member.id}`)',
                 description='You need to set a role to assign with this command through `mute setrole` first.',
                 colour=discord.Colour.red()
             ))
         else:
-            role = discord.utils.get(ctx.guild.roles, id=mute_role.role_id)
+            role = discord.utils.get(ctx.guild.roles, id=mute_role_id)
             if role is None:
                 return await ctx.send(embed=discord.Embed(
                     title=f'Cannot mute user `{member}` (`{member.id}`)',
@@ -401,6 +393,8 @@ class Mod:
             guild_id=ctx.guild.id,
             role_id=role.id
         )
+        get_mute_role_id.cache[(ctx.guild.id,)] = role.id
+        await bump_version(ctx.guild.id)
 
         info_embed = discord.Embed(
             title=f'Mute role was set to {role}.',
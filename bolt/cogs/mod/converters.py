@@ -1,8 +1,12 @@
 from datetime import datetime
 
-import dateparser
 from discord.ext.commands import BadArgument, Converter
 
+from bolt.startup import lazy_import
+
+
+# Loading its regular expressions takes a while, and only a few commands need it.
+dateparser = lazy_import('dateparser')
 
 DATEPARSER_SETTINGS = {
     'PREFER_DATES_FROM': 'future',
@@ -1,14 +1,45 @@
 import asyncio
 import datetime
+from typing import Optional
 
 import discord
 import peewee_async
 from peewee import DoesNotExist
 
 from bolt.database import objects
+from bolt.decorators import async_cache
+from bolt.snapshot import register_cache
 from .models import Mute, MuteRole
 
 
+@async_cache()
+async def get_mute_role_id(guild_id: int) -> Optional[int]:
+    """
+    Get the ID of the mute role configured on the given guild.
+
+    Args:
+        guild_id (int):
+            The guild ID to fetch the mute role for.
+
+    Returns:
+        Optional[int]:
+            The ID of the mute role if one is configured,
+            or `None` if that's not the case.
+    """
+
+    try:
+        return (await objects.get(MuteRole, MuteRole.guild_id == guild_id)).role_id
+    except DoesNotExist:
+        return None
+
+
+register_cache(
+    'mute_roles',
+    lambda: {guild_id: role_id for (guild_id,), role_id in get_mute_role_id.cache.items()},
+    lambda entries: get_mute_role_id.cache.update(((guild_id,), role_id) for guild_id, role_id in entries.items())
+)
+
+
 async def background_unmute_task(bot):
     while True:
         active_mutes = await peewee_async.execute(
@@ -17,26 +48,27 @@ async def background_unmute_task(bot):
                 .where(Mute.active == True)  # noqa
         )
 
+        next_expiry = None
         for mute in active_mutes:
             # The mute table is ordered by expiry.
             # If the current expiry lies in the future, we can stop here,
             # as all further mutes will also expire in the future.
             if mute.expiry > datetime.datetime.utcnow():
+                next_expiry = mute.expiry
                 break
 
-            try:
-                configured_mute_role = await objects.get(
-                    MuteRole,
-                    MuteRole.guild_id == mute.infraction.guild_id
-                )
-            except DoesNotExist:
+            # Mutes on guilds of other clusters are expired by those clusters.
+            guild = bot.get_guild(mute.infraction.guild_id)
+            if guild is None:
+                continue
+
+            mute_role_id = await get_mute_role_id(mute.infraction.guild_id)
+            if mute_role_id is None:
                 # The guild does not have any mute role configured.
                 # That means we cannot unmute the user, so log it.
                 continue
 
-            guild = bot.get_guild(mute.infraction.guild_id)
-
-            mute_role = discord.utils.get(guild.roles, id=configured_mute_role.role_id)
+            mute_role = discord.utils.get(guild.roles, id=mute_role_id)
             # The previously configured mute role can no longer be found on the Guild.
             if mute_role is None:
                 continue
@@ -58,9 +90,10 @@ async def background_unmute_task(bot):
             await objects.update(mute, only=['active'])
 
         # Sleep until the next mute we found expires, or 1 hour at most.
-        # Default to sleeping for 1 hour if no active mute was found.
-        if active_mutes:
-            diff_seconds = (mute.expiry - datetime.datetime.utcnow()).total_seconds()
+        # Default to sleeping for 1 hour if no active mute expires in the future,
+        # since expired mutes that are left are skipped above until then.
+        if next_expiry is not None:
+            diff_seconds = (next_expiry - datetime.datetime.utcnow()).total_seconds()
             sleep_seconds = min(diff_seconds, 60 * 60)
         else:
             sleep_seconds = 60 * 60
@@ -70,20 +103,15 @@ async def background_unmute_task(bot):
 
 
 async def unmute_member(member: discord.Member, guild: discord.Guild, mute: Mute):
-    try:
-        configured_mute_role = await objects.get(
-            MuteRole,
-            MuteRole.guild_id == guild.id
-        )
-
-    except DoesNotExist:
+    mute_role_id = await get_mute_role_id(guild.id)
+    if mute_role_id is None:
         raise ValueError("no mute role is configured on this guild, cannot unmute")
 
     else:
-        mute_role = discord.utils.get(guild.roles, id=configured_mute_role.role_id)
+        mute_role = discord.utils.get(guild.roles, id=mute_role_id)
         if mute_role is None:
             raise ValueError(
-                f"cannot find the configured mute role with ID `{configured_mute_role.role_id}` on this guild"
+                f"cannot find the configured mute role with ID `{mute_role_id}` on this guild"
             )
 
         await member.remove_roles(
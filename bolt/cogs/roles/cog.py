@@ -1,27 +1,59 @@
+import asyncio
 import logging
+from typing import FrozenSet, Iterable, Tuple
 
 import discord
 import peewee_async
 from discord.ext import commands
 from peewee import DoesNotExist
 
+from bolt import metrics, snapshot
 from bolt.database import objects
-from .converters import RoleListConverter
-from .models import SelfAssignableRole
+from .converters import MemberFilter, RoleListConverter
+from .index import GuildRoleIndex
+from .jobs import BulkRoleJobRunner
+from .models import BulkRoleJob, SelfAssignableRole
+from .types import BulkRoleAction
 
 
 log = logging.getLogger(__name__)
 
+# Roles with more members than this will not have their members listed by `rinfo`.
+MAX_DISPLAYED_MEMBERS = 50
+
 
 class Roles:
     """Commands for assigning, removing, and modifying Roles."""
 
     def __init__(self, bot):
         self.bot = bot
+        # Maps guild IDs to the IDs of their self-assignable roles.
+        self.self_assignable_roles = {}
+        # Maps guild IDs to their role index, built lazily on first use.
+        self.role_indexes = {}
+        # Maps guild IDs to the tasks and runners of their running bulk role jobs.
+        self.bulk_jobs = {}
+        if self.bot.is_ready():
+            self.bot.loop.create_task(self.resume_bulk_jobs())
+        metrics.register_gauge(
+            'bulk_role_jobs_running', "Bulk role jobs currently being processed.",
+            lambda: [({}, len(self.bulk_jobs))]
+        )
+        snapshot.register_cache(
+            'self_assignable_roles',
+            lambda: {guild_id: sorted(role_ids) for guild_id, role_ids in self.self_assignable_roles.items()},
+            lambda entries: self.self_assignable_roles.update(
+                (guild_id, frozenset(role_ids)) for guild_id, role_ids in entries.items()
+            )
+        )
         log.debug('Loaded Cog Roles.')
 
-    @staticmethod
-    def __unload():
+    def __unload(self):
+        metrics.unregister_gauge('bulk_role_jobs_running')
+        snapshot.unregister_cache('self_assignable_roles')
+        # Unfinished jobs are resumed when the cog is loaded again.
+        for task, _ in self.bulk_jobs.values():
+            task.cancel()
         log.debug('Unloaded Cog Roles.')
 
     @commands.group()
@@ -45,16 +77,131 @@ class Roles:
             )
         return embed
 
+    async def get_self_assignable_role_ids(self, guild_id: int) -> FrozenSet[int]:
+        """
+        Get the IDs of all self-assignable roles on the given guild.
+
+        The IDs are loaded with a single query on first use and cached
+        afterwards, until the self-assignable roles of the guild change.
+
+        Args:
+            guild_id (int):
+                The guild whose self-assignable roles should be returned.
+
+        Returns:
+            FrozenSet[int]:
+                The IDs of all self-assignable roles on the guild.
+        """
+
+        try:
+            return self.self_assignable_roles[guild_id]
+        except KeyError:
+            rows = await peewee_async.execute(
+                SelfAssignableRole.select(SelfAssignableRole.id)
+                                  .where(SelfAssignableRole.guild_id == guild_id)
+            )
+            role_ids = frozenset(row.id for row in rows)
+            self.self_assignable_roles[guild_id] = role_ids
+            return role_ids
+
     async def is_self_assignable(self, role: discord.Role):
+        return role.id in await self.get_self_assignable_role_ids(role.guild.id)
+
+    def get_role_index(self, guild: discord.Guild) -> GuildRoleIndex:
+        """
+        Get the role index for the given guild, building it if necessary.
+
+        Args:
+            guild (discord.Guild):
+                The guild whose role index should be returned.
+
+        Returns:
+            GuildRoleIndex:
+                The up-to-date role index for the guild.
+        """
+
         try:
-            await objects.get(
-                SelfAssignableRole,
-                SelfAssignableRole.id == role.id,
-                SelfAssignableRole.guild_id == role.guild.id
+            return self.role_indexes[guild.id]
+        except KeyError:
+            index = GuildRoleIndex(guild)
+            self.role_indexes[guild.id] = index
+            return index
+
+    async def on_ready(self):
+        # Our member cache may have been rebuilt, so any index could be outdated.
+        self.role_indexes.clear()
+        await self.resume_bulk_jobs()
+
+    async def resume_bulk_jobs(self):
+        unfinished_jobs = await peewee_async.execute(
+            BulkRoleJob.select()
+                       .where(BulkRoleJob.finished == False)  # noqa
+        )
+        for job in unfinished_jobs:
+            guild = self.bot.get_guild(job.guild_id)
+            if guild is not None and guild.id not in self.bulk_jobs:
+                self.start_bulk_job(guild, job)
+                log.debug(f"Resumed bulk role job {job.id} on guild {guild.id}.")
+
+    def start_bulk_job(self, guild: discord.Guild, job: BulkRoleJob):
+        runner = BulkRoleJobRunner(self.bot, job, self.get_role_index(guild))
+        task = self.bot.loop.create_task(self.run_bulk_job(runner))
+        self.bulk_jobs[guild.id] = (task, runner)
+
+    async def run_bulk_job(self, runner: BulkRoleJobRunner):
+        try:
+            await runner.run()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            log.error(f"Unhandled Exception in bulk role job {runner.job.id}: {e}")
+        finally:
+            self.bulk_jobs.pop(runner.job.guild_id, None)
+
+    async def on_guild_available(self, guild: discord.Guild):
+        self.role_indexes.pop(guild.id, None)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.role_indexes.pop(guild.id, None)
+        self.self_assignable_roles.pop(guild.id, None)
+
+    async def on_member_join(self, member: discord.Member):
+        index = self.role_indexes.get(member.guild.id)
+        if index is not None:
+            index.add_member(member)
+
+    async def on_member_remove(self, member: discord.Member):
+        index = self.role_indexes.get(member.guild.id)
+        if index is not None:
+            index.remove_member(member)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        index = self.role_indexes.get(after.guild.id)
+        if index is not None and before.roles != after.roles:
+            index.update_member(before, after)
+
+    async def on_guild_role_create(self, role: discord.Role):
+        index = self.role_indexes.get(role.guild.id)
+        if index is not None:
+            index.add_role(role)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        index = self.role_indexes.get(after.guild.id)
+        if index is not None and before.name != after.name:
+            index.rename_role(before, after)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        index = self.role_indexes.get(role.guild.id)
+        if index is not None:
+            index.remove_role(role)
+
+        if role.id in await self.get_self_assignable_role_ids(role.guild.id):
+            await peewee_async.execute(
+                SelfAssignableRole.delete()
+                                  .where(SelfAssignableRole.id == role.id)
             )
-        except DoesNotExist:
-            return False
-        return True
+            self.self_assignable_roles.pop(role.guild.id, None)
+            await snapshot.bump_version(role.guild.id)
 
     @role.command(name='asar', aliases=['msa'])
     @commands.has_permissions(manage_roles=True)
@@ -88,6 +235,9 @@ class Roles:
                 else:
                     failed.append(f'• Role {role.mention} is already self-assignable.')
 
+        self.self_assignable_roles.pop(ctx.guild.id, None)
+        if success:
+            await snapshot.bump_version(ctx.guild.id)
         await ctx.send(embed=self.create_role_update_response(discord.Embed(
             title=f'Updated Self-Assignable Roles',
             colour=discord.Colour.blue()
@@ -113,11 +263,103 @@ class Roles:
                 await objects.delete(role_db_entry)
                 success.append(role.mention)
 
+        self.self_assignable_roles.pop(ctx.guild.id, None)
+        if success:
+            await snapshot.bump_version(ctx.guild.id)
         await ctx.send(embed=self.create_role_update_response(discord.Embed(
             title=f'Updated Self-Assignable Roles',
             colour=discord.Colour.blue()
         ), 'No longer self-assignable:', success, 'Errors:', failed))
 
+    async def create_bulk_job(
+            self, ctx, action: BulkRoleAction, role: discord.Role, filters: Iterable[Tuple[str, object]]
+    ):
+        if ctx.guild.id in self.bulk_jobs:
+            return await ctx.send(embed=discord.Embed(
+                title='Cannot start bulk role update',
+                description='Another bulk role update is already running on this Guild. '
+                            'Wait for it to finish, or cancel it with `role cancel-job`.',
+                colour=discord.Colour.red()
+            ))
+        elif role >= ctx.guild.me.top_role:
+            return await ctx.send(embed=discord.Embed(
+                title='Cannot start bulk role update',
+                description=f'Role {role.mention} is higher or as high in the role hierarchy than my top role.',
+                colour=discord.Colour.red()
+            ))
+        elif ctx.author != ctx.guild.owner and role >= ctx.author.top_role:
+            return await ctx.send(embed=discord.Embed(
+                title='Cannot start bulk role update',
+                description=f'Role {role.mention} is higher or as high in the role hierarchy than your top role.',
+                colour=discord.Colour.red()
+            ))
+
+        progress_message = await ctx.send(embed=discord.Embed(
+            title='Starting bulk role update...',
+            colour=discord.Colour.blue()
+        ))
+        job = await objects.create(
+            BulkRoleJob,
+            guild_id=ctx.guild.id,
+            channel_id=ctx.channel.id,
+            message_id=progress_message.id,
+            author_id=ctx.author.id,
+            role_id=role.id,
+            action=action,
+            **dict(filters)
+        )
+        self.start_bulk_job(ctx.guild, job)
+
+    @role.command(name='add-all')
+    @commands.has_permissions(manage_roles=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def add_all(self, ctx, role: discord.Role, *filters: MemberFilter):
+        """Gives the Role to all Members matching the given filters.
+
+        The following filters are supported:
+            `has:<role>` - Members that have the given Role
+            `before:<date>` - Members that joined before the given date
+            `noroles` - Members without any Roles
+        Enclose filters containing spaces in double quotes, for example:
+            `role add-all Member "before:1 week ago" noroles`
+
+        The update runs in the background and reports its progress
+        in a single message. It can be cancelled with `role cancel-job`.
+        """
+
+        await self.create_bulk_job(ctx, BulkRoleAction.add, role, filters)
+
+    @role.command(name='remove-all')
+    @commands.has_permissions(manage_roles=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def remove_all(self, ctx, role: discord.Role, *filters: MemberFilter):
+        """Removes the Role from all Members matching the given filters.
+
+        Supports the same filters as `role add-all`, for example:
+            `role remove-all Guest "has:Member"`
+        """
+
+        await self.create_bulk_job(ctx, BulkRoleAction.remove, role, filters)
+
+    @role.command(name='cancel-job')
+    @commands.has_permissions(manage_roles=True)
+    async def cancel_job(self, ctx):
+        """Cancels the bulk role update running on this Guild."""
+
+        try:
+            _, runner = self.bulk_jobs[ctx.guild.id]
+        except KeyError:
+            await ctx.send(embed=discord.Embed(
+                description='There is no bulk role update running on this Guild.',
+                colour=discord.Colour.red()
+            ))
+        else:
+            runner.cancel()
+            await ctx.send(embed=discord.Embed(
+                description='The bulk role update will be cancelled after its current batch.',
+                colour=discord.Colour.green()
+            ))
+
     @commands.command(name='iam', aliases=['assign'])
     @commands.guild_only()
     @commands.bot_has_permissions(manage_roles=True)
@@ -130,8 +372,9 @@ class Roles:
 
         success, failed = [], []
         roles_to_add = []
+        self_assignable = (await self.get_self_assignable_role_ids(ctx.guild.id)).intersection(r.id for r in roles)
         for role in roles:
-            if not await self.is_self_assignable(role):
+            if role.id not in self_assignable:
                 failed.append(f'• {role.mention} is not self-assignable.')
             elif role in ctx.author.roles:
                 failed.append(f'• You already have the {role.mention} Role.')
@@ -155,8 +398,9 @@ class Roles:
 
         success, failed = [], []
         roles_to_remove = []
+        self_assignable = (await self.get_self_assignable_role_ids(ctx.guild.id)).intersection(r.id for r in roles)
         for role in roles:
-            if not await self.is_self_assignable(role):
+            if role.id not in self_assignable:
                 failed.append(f'• {role.mention} is not self-assignable.')
             elif role not in ctx.author.roles:
                 failed.append(f'• You do not have the {role.mention} Role.')
@@ -177,10 +421,11 @@ class Roles:
     async def list_self_assignable_roles(self, ctx):
         """Show all self-assignable Roles on this Guild."""
 
-        roles = await peewee_async.execute(
-            SelfAssignableRole.select()
-                              .where(SelfAssignableRole.guild_id == ctx.guild.id)
-                              .order_by(SelfAssignableRole.name.desc())
+        role_ids = await self.get_self_assignable_role_ids(ctx.guild.id)
+        roles = sorted(
+            (r for r in ctx.guild.roles if r.id in role_ids),
+            key=lambda r: r.name,
+            reverse=True
         )
 
         if not roles:
@@ -200,7 +445,14 @@ class Roles:
     async def role_info(self, ctx, *, role: discord.Role):
         """Gives information about a Role."""
 
-        members = ', '.join(r.name for r in role.members)
+        index = self.get_role_index(ctx.guild)
+        member_count = index.member_count(role)
+        if role.is_default() or member_count > MAX_DISPLAYED_MEMBERS:
+            members = 'Too many Members to display.'
+        else:
+            members = ', '.join(
+                m.name for m in map(ctx.guild.get_member, index.member_ids(role)) if m is not None
+            )
         response = discord.Embed(
             title=f'__Role Information for `{role.name}`__',
             colour=role.colour
@@ -221,7 +473,7 @@ class Roles:
             value=role.permissions.value
         ).add_field(
             name='Member Count',
-            value=len(role.members)
+            value=member_count
         ).add_field(
             name='Members',
             value=(members if len(members) < 1024 else 'Too many Members to display.') or 'None'
@@ -233,10 +485,11 @@ class Roles:
     async def all_roles(self, ctx):
         """Lists all Roles on this Server in the order of hierarchy."""
 
+        index = self.get_role_index(ctx.guild)
         await ctx.send(embed=discord.Embed(
             title=f'All Roles on {ctx.guild.name}',
             description=', '.join(
-                f'{r.mention} ({sum(1 for _ in r.members)})' for r in sorted(
+                f'{r.mention} ({index.member_count(r)})' for r in sorted(
                     ctx.guild.roles, key=lambda r: r.position, reverse=True
                 ) if r.name != '@everyone'
             ),
@@ -1,20 +1,38 @@
 from shlex import split
-from typing import Iterable
+from typing import Any, Iterable, Tuple
 
 from discord import Role
-from discord.ext.commands import BadArgument, RoleConverter
+from discord.ext.commands import BadArgument, Converter, RoleConverter
+
+from bolt.startup import lazy_import
+
+
+# Loading its regular expressions takes a while, and only a few commands need it.
+dateparser = lazy_import('dateparser')
+
+DATEPARSER_SETTINGS = {
+    'PREFER_DATES_FROM': 'past',
+    'TIMEZONE': 'UTC',
+    'TO_TIMEZONE': 'UTC'
+}
 
 
 class RoleListConverter(RoleConverter):
     async def convert(self, ctx, roles: str) -> Iterable[Role]:
-        single_role_name = roles.lower()
-        role = next((r for r in ctx.guild.roles if r.name.lower() == single_role_name.lower()), None)
+        roles_cog = ctx.bot.get_cog('Roles')
+        if roles_cog is not None:
+            find_by_name = roles_cog.get_role_index(ctx.guild).find_by_name
+        else:
+            def find_by_name(name: str):
+                return next((r for r in ctx.guild.roles if r.name.lower() == name.lower()), None)
+
+        role = find_by_name(roles)
 
         if role is None:
             try:
                 result = []
                 for role_name in split(roles):
-                    result.append(await super().convert(ctx, role_name))
+                    result.append(find_by_name(role_name) or await super().convert(ctx, role_name))
 
             except BadArgument:
                 raise BadArgument(
@@ -26,3 +44,34 @@ class RoleListConverter(RoleConverter):
                 return result
 
         return [role]
+
+
+class MemberFilter(Converter):
+    """
+    Converts a member filter for bulk role updates into the
+    name and value of the matching `BulkRoleJob` column.
+
+    Supported filters are `has:<role>`, `before:<date>` and `noroles`.
+    """
+
+    async def convert(self, ctx, argument: str) -> Tuple[str, Any]:
+        name, _, value = argument.partition(':')
+        name = name.lower()
+
+        if name == 'noroles' and not value:
+            return 'without_roles', True
+
+        elif name == 'has' and value:
+            role = await RoleListConverter().convert(ctx, value)
+            return 'filter_role_id', role[0].id
+
+        elif name == 'before' and value:
+            joined_before = dateparser.parse(value, settings=DATEPARSER_SETTINGS)
+            if joined_before is None:
+                raise BadArgument(f"Failed to parse a date from `{value}`")
+            return 'joined_before', joined_before
+
+        raise BadArgument(
+            f"Unknown member filter `{argument}`. "
+            "Use `has:<role>`, `before:<date>` or `noroles`."
+        )
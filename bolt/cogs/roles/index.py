@@ -0,0 +1,106 @@
+from collections import defaultdict
+from operator import attrgetter
+from typing import Optional, Set
+
+import discord
+
+
+class GuildRoleIndex:
+    """
+    Tracks the members of every role along with a case-insensitive
+    role name lookup table for a single guild.
+
+    The index is built with a single pass over the guild's members
+    and roles, and afterwards kept up to date incrementally from the
+    member and role events dispatched by discord.py. The default role
+    is not tracked, since every member of the guild has it.
+    """
+
+    def __init__(self, guild: discord.Guild):
+        self.guild = guild
+        self._members = defaultdict(set)
+        self._names = defaultdict(list)
+
+        for role in guild.roles:
+            self.add_role(role)
+        for member in guild.members:
+            self.add_member(member)
+
+    def add_role(self, role: discord.Role):
+        self._names[role.name.lower()].append(role)
+
+    def remove_role(self, role: discord.Role):
+        self._forget_name(role.name, role.id)
+        self._members.pop(role.id, None)
+
+    def rename_role(self, before: discord.Role, after: discord.Role):
+        self._forget_name(before.name, before.id)
+        self.add_role(after)
+
+    def _forget_name(self, name: str, role_id: int):
+        key = name.lower()
+        remaining = [role for role in self._names.get(key, ()) if role.id != role_id]
+        if remaining:
+            self._names[key] = remaining
+        else:
+            self._names.pop(key, None)
+
+    def add_member(self, member: discord.Member):
+        for role in member.roles:
+            if role.id != self.guild.id:
+                self._members[role.id].add(member.id)
+
+    def remove_member(self, member: discord.Member):
+        for role in member.roles:
+            if role.id in self._members:
+                self._members[role.id].discard(member.id)
+
+    def update_member(self, before: discord.Member, after: discord.Member):
+        before_ids = {role.id for role in before.roles}
+        after_ids = {role.id for role in after.roles}
+        for role_id in after_ids - before_ids:
+            if role_id != self.guild.id:
+                self._members[role_id].add(after.id)
+        for role_id in before_ids - after_ids:
+            if role_id in self._members:
+                self._members[role_id].discard(after.id)
+
+    def member_ids(self, role: discord.Role) -> Set[int]:
+        """
+        Get the IDs of all members that have the given role.
+
+        Args:
+            role (discord.Role):
+                The role whose members should be returned.
+                Must not be the default role.
+
+        Returns:
+            Set[int]:
+                The IDs of all members with the role.
+        """
+
+        return self._members.get(role.id, set())
+
+    def member_count(self, role: discord.Role) -> int:
+        if role.id == self.guild.id:
+            return self.guild.member_count
+        return len(self._members.get(role.id, ()))
+
+    def find_by_name(self, name: str) -> Optional[discord.Role]:
+        """
+        Look up a role by its case-insensitive name.
+
+        Args:
+            name (str):
+                The name of the role to find.
+
+        Returns:
+            Optional[discord.Role]:
+                The lowest role with the given name,
+                or `None` if no such role exists.
+        """
+
+        candidates = self._names.get(name.lower())
+        if candidates:
+            return min(candidates, key=attrgetter('position'))
+        return None
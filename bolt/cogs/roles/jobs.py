@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+import discord
+
+from bolt.database import objects
+from .index import GuildRoleIndex
+from .models import BulkRoleJob
+from .types import BulkRoleAction
+
+
+log = logging.getLogger(__name__)
+
+# The bounds for the amount of role updates that are sent at once.
+# The runner starts at the lower bound and adjusts itself based
+# on how long Discord takes to process each batch of updates.
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 10
+
+# If a batch of role updates takes longer than this, we assume that
+# discord.py had to wait for a rate limit and reduce the concurrency.
+RATE_LIMITED_SECONDS = 2.0
+
+# How often, in seconds, the progress message is edited
+# and the job's progress is written to the database.
+PROGRESS_INTERVAL = 5
+CHECKPOINT_INTERVAL = 10
+
+
+def select_targets(guild: discord.Guild, job: BulkRoleJob, index: GuildRoleIndex) -> List[discord.Member]:
+    """
+    Select all members of the guild that the job still needs to update.
+
+    Members that were already updated by a previous run of the
+    job no longer match, which is what allows resuming a job by
+    simply running it again.
+
+    Args:
+        guild (discord.Guild):
+            The guild on which the job runs.
+        job (BulkRoleJob):
+            The job to select members for.
+        index (GuildRoleIndex):
+            The role index for the guild.
+
+    Returns:
+        List[discord.Member]:
+            The members that still need to be updated.
+    """
+
+    with_role = index.member_ids(discord.Object(id=job.role_id))
+    with_filter_role = None
+    if job.filter_role_id is not None:
+        with_filter_role = index.member_ids(discord.Object(id=job.filter_role_id))
+
+    should_have_role = job.action == BulkRoleAction.remove
+    targets = []
+    for member in guild.members:
+        if (member.id in with_role) != should_have_role:
+            continue
+        elif with_filter_role is not None and member.id not in with_filter_role:
+            continue
+        elif job.joined_before is not None and member.joined_at >= job.joined_before:
+            continue
+        elif job.without_roles and len(member.roles) > 1:
+            continue
+        targets.append(member)
+    return targets
+
+
+class BulkRoleJobRunner:
+    """
+    Applies a bulk role job to all matching members, periodically
+    reporting progress in a message and checkpointing it in the database.
+    """
+
+    def __init__(self, bot, job: BulkRoleJob, index: GuildRoleIndex):
+        self.bot = bot
+        self.job = job
+        self.index = index
+        self.concurrency = MIN_CONCURRENCY
+        self.cancelled = False
+        self.message = None
+
+    def cancel(self):
+        """Stop the job after the batch that is currently being processed."""
+
+        self.cancelled = True
+
+    def progress_embed(self, title: str, colour: discord.Colour) -> discord.Embed:
+        action = 'Adding' if self.job.action == BulkRoleAction.add else 'Removing'
+        return discord.Embed(
+            title=title,
+            description=(f"{action} <@&{self.job.role_id}>: `{self.job.processed}` / `{self.job.total}` "
+                         f"members processed, `{self.job.failed}` failed."),
+            colour=colour
+        )
+
+    async def get_progress_message(self) -> Optional[discord.Message]:
+        channel = self.bot.get_channel(self.job.channel_id)
+        if channel is None:
+            return None
+
+        if self.job.message_id is not None:
+            try:
+                return await channel.get_message(self.job.message_id)
+            except discord.HTTPException:
+                pass
+
+        message = await channel.send(embed=self.progress_embed("Resuming bulk role update...", discord.Colour.blue()))
+        self.job.message_id = message.id
+        await objects.update(self.job, only=['message_id'])
+        return message
+
+    async def report(self, title: str, colour: discord.Colour):
+        if self.message is not None:
+            try:
+                await self.message.edit(embed=self.progress_embed(title, colour))
+            except discord.HTTPException as e:
+                log.warning(f"Failed to edit progress message of bulk role job {self.job.id}: {e}")
+
+    async def finish(self, title: str, colour: discord.Colour):
+        self.job.finished = True
+        await objects.update(self.job, only=['processed', 'failed', 'finished'])
+        await self.report(title, colour)
+
+    async def apply(self, member: discord.Member, role: discord.Role):
+        reason = f"Bulk role update by {self.job.author_id}"
+        if self.job.action == BulkRoleAction.add:
+            await member.add_roles(role, reason=reason)
+        else:
+            await member.remove_roles(role, reason=reason)
+
+    async def run(self):
+        guild = self.bot.get_guild(self.job.guild_id)
+        role = discord.utils.get(guild.roles, id=self.job.role_id) if guild is not None else None
+        self.message = await self.get_progress_message()
+        if role is None:
+            return await self.finish("Bulk role update failed: the role no longer exists.", discord.Colour.red())
+
+        targets = select_targets(guild, self.job, self.index)
+        # Resumed jobs keep the total of their first run, since their
+        # `processed` count may lag behind by up to a checkpoint interval.
+        if not self.job.total:
+            self.job.total = len(targets)
+            await objects.update(self.job, only=['total'])
+        await self.report("Updating roles...", discord.Colour.blue())
+
+        last_progress = last_checkpoint = time.monotonic()
+        position = 0
+        while position < len(targets):
+            if self.cancelled:
+                return await self.finish("Bulk role update cancelled.", discord.Colour.red())
+
+            batch = targets[position:position + self.concurrency]
+            position += len(batch)
+
+            started = time.monotonic()
+            results = await asyncio.gather(*(self.apply(member, role) for member in batch), return_exceptions=True)
+            elapsed = time.monotonic() - started
+
+            rate_limited = False
+            for member, result in zip(batch, results):
+                if isinstance(result, discord.HTTPException) and result.status == 429:
+                    # discord.py gave up on retrying, try this member again later.
+                    rate_limited = True
+                    targets.append(member)
+                    continue
+                elif isinstance(result, Exception):
+                    log.debug(f"Bulk role job {self.job.id} failed to update {member.id}: {result}")
+                    self.job.failed += 1
+                self.job.processed += 1
+
+            # Additive increase, multiplicative decrease.
+            if rate_limited or elapsed > RATE_LIMITED_SECONDS:
+                self.concurrency = max(MIN_CONCURRENCY, self.concurrency // 2)
+            else:
+                self.concurrency = min(MAX_CONCURRENCY, self.concurrency + 1)
+
+            now = time.monotonic()
+            if now - last_checkpoint >= CHECKPOINT_INTERVAL:
+                await objects.update(self.job, only=['processed', 'failed'])
+                last_checkpoint = now
+            if now - last_progress >= PROGRESS_INTERVAL:
+                await self.report("Updating roles...", discord.Colour.blue())
+                last_progress = now
+
+        await self.finish("Bulk role update finished.", discord.Colour.green())
@@ -1,9 +1,29 @@
+from datetime import datetime
+
 import peewee
 
-from bolt.database import Model
+from bolt.database import EnumField, Model
+from .types import BulkRoleAction
 
 
 class SelfAssignableRole(Model):
     id = peewee.BigIntegerField(primary_key=True)
     name = peewee.CharField(150)
     guild_id = peewee.BigIntegerField()
+
+
+class BulkRoleJob(Model):
+    guild_id = peewee.BigIntegerField()
+    channel_id = peewee.BigIntegerField()
+    message_id = peewee.BigIntegerField(null=True)
+    author_id = peewee.BigIntegerField()
+    role_id = peewee.BigIntegerField()
+    action = EnumField(BulkRoleAction, max_length=10)
+    filter_role_id = peewee.BigIntegerField(null=True)
+    joined_before = peewee.DateTimeField(null=True)
+    without_roles = peewee.BooleanField(default=False)
+    total = peewee.IntegerField(default=0)
+    processed = peewee.IntegerField(default=0)
+    failed = peewee.IntegerField(default=0)
+    created_on = peewee.DateTimeField(default=datetime.utcnow)
+    finished = peewee.BooleanField(default=False)
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class BulkRoleAction(Enum):
+    add = 'add'
+    remove = 'remove'
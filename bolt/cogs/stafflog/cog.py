@@ -1,20 +1,23 @@
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Tuple, Union
 
 import discord
-import humanize
 from discord.ext import commands
 from peewee import DoesNotExist
 
+from bolt import metrics
 from bolt.cogs.infractions.models import Infraction
 from bolt.cogs.infractions.types import InfractionType
 from bolt.database import objects
+from bolt.startup import lazy_import
 from .models import StaffLogChannel
-from .util import get_log_channel as fetch_log_channel
+from .util import forget_log_channel, get_log_channel as fetch_log_channel
 
 
 log = logging.getLogger(__name__)
+humanize = lazy_import('humanize')
 
 
 def thirty_seconds_ago() -> datetime:
@@ -71,9 +74,10 @@ class StaffLog:
                     "could not be found anymore, deleting from the database."
                 )
                 await objects.delete(channel_obj)
+                await forget_log_channel(guild.id)
             return channel_obj, channel
 
-    async def log_for(self, guild: discord.Guild, embed: discord.Embed):
+    async def log_for(self, guild: discord.Guild, embed: discord.Embed, received_at: Optional[float] = None):
         """
         Log the given embed in the given guild's staff log channel, if set.
 
@@ -82,6 +86,9 @@ class StaffLog:
                 The guild to log the event on.
             embed (discord.Embed):
                 The embed to send in the staff log channel.
+            received_at (Optional[float]):
+                The `Bot.event_received_at` of the logged gateway event, used to
+                measure how long logging it took. `None` for other log entries.
         """
 
         result_tuple = await self.get_log_channel(guild)
@@ -89,8 +96,11 @@ class StaffLog:
             channel_row, channel = result_tuple
             if channel_row.enabled and channel is not None:
                 await channel.send(embed=embed)
+                if received_at is not None:
+                    metrics.observe('stafflog_lag', time.monotonic() - received_at)
 
     async def on_message_delete(self, message: discord.Message):
+        received_at = self.bot.event_received_at
         if message.guild is None or message.author == self.bot.user:
             return
 
@@ -121,9 +131,10 @@ class StaffLog:
                 )
             )
 
-        await self.log_for(message.guild, info_embed)
+        await self.log_for(message.guild, info_embed, received_at)
 
     async def on_message_edit(self, before: discord.Message, after: discord.Message):
+        received_at = self.bot.event_received_at
         if after.guild is None or after.author == self.bot.user:
             return
         elif before.content == after.content:
@@ -151,9 +162,10 @@ class StaffLog:
             value=after.content or "(no content)"
         )
 
-        await self.log_for(after.guild, info_embed)
+        await self.log_for(after.guild, info_embed, received_at)
 
     async def on_member_join(self, member: discord.Member):
+        received_at = self.bot.event_received_at
         info_embed = discord.Embed(
             title=f"📥 Member joined",
             colour=discord.Colour.green(),
@@ -169,9 +181,10 @@ class StaffLog:
                   f"({humanize.naturaldelta(datetime.utcnow() - member.created_at)} ago)"
         )
 
-        await self.log_for(member.guild, info_embed)
+        await self.log_for(member.guild, info_embed, received_at)
 
     async def on_member_remove(self, member: discord.Member):
+        received_at = self.bot.event_received_at
         info_embed = discord.Embed(
             title=f"📤 Member left",
             colour=discord.Colour.red(),
@@ -197,17 +210,19 @@ class StaffLog:
                 lambda entry: entry.target == member
             )
             if audit_entry is not None:
-                await self.handle_member_kick(member, audit_entry)
+                await self.handle_member_kick(member, audit_entry, received_at)
         else:
             info_embed.set_footer(
                 text="By giving me the `view audit log` permission, "
                      "I can check the audit log for a kick."
             )
 
-        await self.log_for(member.guild, info_embed)
+        await self.log_for(member.guild, info_embed, received_at)
 
     # This is not emitted by discord.py, but emitted through `on_member_remove` if applicable.
-    async def handle_member_kick(self, member: discord.Member, audit_entry: discord.AuditLogEntry):
+    async def handle_member_kick(
+            self, member: discord.Member, audit_entry: discord.AuditLogEntry, received_at: float
+    ):
         info_embed = discord.Embed(
             title="👢 Member kicked",
             colour=discord.Colour.red(),
@@ -238,9 +253,10 @@ class StaffLog:
                   f"use `infr detail {created_infraction.id}` for details"
         )
 
-        await self.log_for(member.guild, info_embed)
+        await self.log_for(member.guild, info_embed, received_at)
 
     async def on_member_ban(self, guild: discord.Guild, user: Union[discord.Member, discord.User]):
+        received_at = self.bot.event_received_at
         info_embed = discord.Embed(
             title=f"🔨 Member banned",
             colour=discord.Colour.red(),
@@ -293,9 +309,10 @@ class StaffLog:
                 text="By giving me the `view audit log` permission, I can give more information."
             )
 
-        await self.log_for(guild, info_embed)
+        await self.log_for(guild, info_embed, received_at)
 
     async def on_member_unban(self, guild: discord.Guild, user: discord.User):
+        received_at = self.bot.event_received_at
         info_embed = discord.Embed(
             title=f"🤝 Member unbanned",
             colour=discord.Colour.blurple(),
@@ -331,7 +348,7 @@ class StaffLog:
                 text="By giving me the `view audit log` permission, I can give more information."
             )
 
-        await self.log_for(guild, info_embed)
+        await self.log_for(guild, info_embed, received_at)
 
     @commands.group(name='log', aliases=['stafflog'])
     @commands.has_permissions(manage_messages=True)
@@ -372,6 +389,7 @@ class StaffLog:
                 else:
                     channel_object.enabled = True
                     await objects.update(channel_object, only=['enabled'])
+                    await forget_log_channel(ctx.guild.id)
 
                     response_embed_title = "Staff log is now enabled"
                     response_embed_description = (
@@ -396,6 +414,7 @@ class StaffLog:
                 }
             )
             if created:
+                await forget_log_channel(ctx.guild.id)
                 response_embed = discord.Embed(
                     title="Staff log is now enabled",
                     description=f"The logging channel was set to {channel.mention}.",
@@ -406,6 +425,7 @@ class StaffLog:
                 channel_object.channel_id = channel.id
                 channel_object.enabled = True
                 await objects.update(channel_object, only=('channel_id', 'enabled'))
+                await forget_log_channel(ctx.guild.id)
 
                 response_embed = discord.Embed(
                     title="Staff log is now enabled",
@@ -438,6 +458,7 @@ class StaffLog:
             if channel_object.enabled:
                 channel_object.enabled = False
                 await objects.update(channel_object, only=['enabled'])
+                await forget_log_channel(ctx.guild.id)
 
                 response_embed = discord.Embed(
                     title="Successfully disabled staff log",
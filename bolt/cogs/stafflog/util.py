@@ -3,8 +3,11 @@ from typing import Optional
 from discord import Guild
 from discord.ext.commands import Bot
 from peewee import DoesNotExist
+from playhouse.shortcuts import model_to_dict
 
 from bolt.database import objects
+from bolt.decorators import async_cache
+from bolt.snapshot import bump_version, register_cache
 from .models import StaffLogChannel
 
 
@@ -24,10 +27,41 @@ async def get_log_channel(bot: Bot, guild: Guild) -> Optional[StaffLogChannel]:
             if nothing was found, `None` is returned.
     """
 
+    return await get_log_channel_row(guild.id)
+
+
+@async_cache()
+async def get_log_channel_row(guild_id: int) -> Optional[StaffLogChannel]:
     try:
         return await objects.get(
             StaffLogChannel,
-            guild_id=guild.id
+            guild_id=guild_id
         )
     except DoesNotExist:
         return None
+
+
+async def forget_log_channel(guild_id: int):
+    """
+    Drop the cached staff log channel of the given guild.
+    Must be called after modifying its row.
+
+    Args:
+        guild_id (int):
+            The guild whose staff log channel was modified.
+    """
+
+    get_log_channel_row.cache.pop((guild_id,), None)
+    await bump_version(guild_id)
+
+
+register_cache(
+    'stafflog_channels',
+    lambda: {
+        guild_id: model_to_dict(row) if row is not None else None
+        for (guild_id,), row in get_log_channel_row.cache.items()
+    },
+    lambda entries: get_log_channel_row.cache.update(
+        ((guild_id,), StaffLogChannel(**row) if row is not None else None) for guild_id, row in entries.items()
+    )
+)
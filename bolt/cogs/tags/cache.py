@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import discord
+
+
+class TagEmbedCache:
+    """
+    A bounded least-recently-used cache for rendered tag embeds.
+
+    Entries are keyed by the guild ID along with the name that
+    was used to look up the tag, since the rendered embed
+    contains the name the tag was requested with.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, guild_id: int, tag_name: str) -> Optional[Tuple[int, discord.Embed]]:
+        """
+        Look up a rendered tag and mark it as recently used.
+
+        Args:
+            guild_id (int):
+                The guild on which the tag was requested.
+            tag_name (str):
+                The name with which the tag was requested.
+
+        Returns:
+            Optional[Tuple[int, discord.Embed]]:
+                The ID of the matched tag and its rendered
+                embed if cached, otherwise `None`.
+        """
+
+        key = (guild_id, tag_name)
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._entries[key]
+
+    def put(self, guild_id: int, tag_name: str, tag_id: int, embed: discord.Embed):
+        """
+        Store a rendered tag, evicting the least recently used entry if the cache is full.
+
+        Args:
+            guild_id (int):
+                The guild on which the tag was requested.
+            tag_name (str):
+                The name with which the tag was requested.
+            tag_id (int):
+                The ID of the tag that the name resolved to.
+            embed (discord.Embed):
+                The rendered tag embed.
+        """
+
+        key = (guild_id, tag_name)
+        self._entries[key] = (tag_id, embed)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def invalidate_guild(self, guild_id: int):
+        """
+        Drop all cached entries for the given guild.
+
+        Creating or removing a tag can change which tag a name
+        resolves to, so this should be called on any modification.
+
+        Args:
+            guild_id (int):
+                The guild whose entries should be dropped.
+        """
+
+        for key in [key for key in self._entries if key[0] == guild_id]:
+            del self._entries[key]
+
+    def dump(self) -> Dict[int, List[Any]]:
+        """
+        Dump all entries for the cache snapshot, with embeds converted to dictionaries.
+
+        Returns:
+            Dict[int, List[Any]]:
+                Maps guild IDs to their requested tag names,
+                tag IDs and embeds, least recently used first.
+        """
+
+        entries = {}
+        for (guild_id, tag_name), (tag_id, embed) in self._entries.items():
+            entries.setdefault(guild_id, []).append([tag_name, tag_id, embed.to_dict()])
+        return entries
+
+    def load(self, entries: Dict[int, List[Any]]):
+        """
+        Load entries from the cache snapshot, as returned by `dump`.
+
+        Args:
+            entries (Dict[int, List[Any]]):
+                The entries to load.
+        """
+
+        for guild_id, guild_entries in entries.items():
+            for tag_name, tag_id, embed in guild_entries:
+                self.put(guild_id, tag_name, tag_id, discord.Embed.from_data(embed))
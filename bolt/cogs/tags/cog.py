@@ -1,11 +1,25 @@
+import asyncio
+import io
+import json
 import logging
+from collections import Counter
+from datetime import datetime
+from typing import Optional
 
 import discord
 import peewee_async
 from discord.ext import commands
-from peewee import DoesNotExist
+from peewee import Clause, DoesNotExist, Param, SQL, SqliteDatabase, Tuple, fn
+from playhouse.shortcuts import case
 
-from bolt.database import objects
+from bolt import metrics, snapshot
+from bolt.database import database, objects
+from bolt.paginator import KeysetPaginator
+from .cache import TagEmbedCache
+from .constants import (
+    TAG_CACHE_SIZE, TAG_IMPORT_CHUNK_SIZE, TAGS_PER_PAGE,
+    TOP_TAGS_SHOWN, USAGE_FLUSH_INTERVAL
+)
 from .converters import TagName
 from .models import Tag
 
@@ -13,17 +27,105 @@ from .models import Tag
 log = logging.getLogger(__name__)
 
 
+def escape_like(pattern: str) -> str:
+    """Escape the wildcard characters of a `LIKE` pattern."""
+
+    return pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def parse_exported_timestamp(value) -> Optional[datetime]:
+    """Parse a timestamp written by `datetime.isoformat`, returning `None` if it is invalid."""
+
+    # `isoformat` omits the microseconds if there are none.
+    for timestamp_format in ('%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S'):
+        try:
+            return datetime.strptime(value, timestamp_format)
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def title_sort_key() -> Clause:
+    """
+    Get the expression of the `tag_guild_id_lower_title` index on the
+    database in use, which serves both ordering and prefix lookups on tag titles.
+    """
+
+    if isinstance(database.obj, SqliteDatabase):
+        # SQLite has no "C" collation, but its default collation compares bytes in the same way.
+        return Clause(fn.lower(Tag.title))
+    return Clause(fn.lower(Tag.title), SQL('COLLATE "C"'))
+
+
+def starts_with(expression, prefix: str) -> Clause:
+    """
+    Match values of the given expression starting with the given prefix.
+
+    This spells out `LIKE` instead of using peewee's `%` operator,
+    which is compiled to the case-sensitive `GLOB` on SQLite.
+    """
+
+    return Clause(expression, SQL('LIKE'), Param(f'{escape_like(prefix)}%'), SQL("ESCAPE '\\'"))
+
+
 class Tags:
     """Commands for creating, editing, and reading Tags."""
 
     def __init__(self, bot):
         self.bot = bot
+        self.embed_cache = TagEmbedCache(TAG_CACHE_SIZE)
+        self.pending_uses = Counter()
+        self.flush_task = self.bot.loop.create_task(self.flush_usage_task())
+        metrics.register_gauge('tag_cache_hit_ratio', "Hit ratio of the rendered tag cache.", self.collect_cache_ratio)
+        metrics.register_gauge(
+            'tag_pending_uses', "Tag uses waiting to be written to the database.",
+            lambda: [({}, sum(self.pending_uses.values()))]
+        )
+        snapshot.register_cache('tag_embeds', self.embed_cache.dump, self.embed_cache.load)
         log.debug("Loaded Cog Tags.")
 
-    @staticmethod
-    def __unload():
+    def __unload(self):
+        metrics.unregister_gauge('tag_cache_hit_ratio')
+        metrics.unregister_gauge('tag_pending_uses')
+        snapshot.unregister_cache('tag_embeds')
+        self.flush_task.cancel()
+        self.bot.loop.create_task(self.flush_usage())
         log.debug("Unloaded Cog Tags.")
 
+    def collect_cache_ratio(self):
+        lookups = self.embed_cache.hits + self.embed_cache.misses
+        return [({}, self.embed_cache.hits / lookups if lookups else 0.0)]
+
+    async def flush_usage(self):
+        """
+        Write all accumulated tag usage counters
+        to the database in a single UPDATE query.
+        """
+
+        if not self.pending_uses:
+            return
+
+        pending, self.pending_uses = self.pending_uses, Counter()
+        try:
+            await peewee_async.execute(
+                Tag.update(uses=Tag.uses + case(Tag.id, tuple(pending.items()), 0))
+                   .where(Tag.id.in_(list(pending)))
+            )
+        except Exception:
+            # Keep the counters around for the next attempt.
+            self.pending_uses.update(pending)
+            raise
+
+    async def flush_usage_task(self):
+        while True:
+            try:
+                await asyncio.sleep(USAGE_FLUSH_INTERVAL)
+                await self.flush_usage()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log.error(f"Failed to flush tag usage counters: {e}")
+
     async def get_exact_match(self, tag_title: str, guild_id: int):
         try:
             return await objects.get(
@@ -42,18 +144,29 @@ class Tags:
         To view a tag, simply use this command along with a tag name.
         """
 
-        match = await self.get_exact_match(tag_name, ctx.guild.id)
+        cached = self.embed_cache.get(ctx.guild.id, tag_name)
+        if cached is not None:
+            tag_id, tag_embed = cached
+        else:
+            match = await self.get_exact_match(tag_name, ctx.guild.id)
 
-        if match is None:
-            tag = await self.get_exact_match(f'%{tag_name}%', ctx.guild.id)
+            if match is None:
+                tag = await self.get_exact_match(f'%{tag_name}%', ctx.guild.id)
 
-            if tag is None:
-                return await ctx.send(embed=discord.Embed(
-                    title=f"No tag with a similar name to {tag_name!r} found.",
-                    colour=discord.Colour.red()
-                ))
-            match = tag
+                if tag is None:
+                    return await ctx.send(embed=discord.Embed(
+                        title=f"No tag with a similar name to {tag_name!r} found.",
+                        colour=discord.Colour.red()
+                    ))
+                match = tag
 
+            tag_id, tag_embed = match.id, self.render_tag(match, tag_name)
+            self.embed_cache.put(ctx.guild.id, tag_name, tag_id, tag_embed)
+
+        self.pending_uses[tag_id] += 1
+        await ctx.send(embed=tag_embed)
+
+    def render_tag(self, match: Tag, tag_name: str) -> discord.Embed:
         tag_embed = discord.Embed(
             title=f"{match.title} (from {tag_name!r})",
             colour=discord.Colour.blue(),
@@ -71,7 +184,7 @@ class Tags:
             tag_embed.set_footer(
                 text=f"Created by {match.author_id}"
             )
-        await ctx.send(embed=tag_embed)
+        return tag_embed
 
     @tag.command()
     @commands.guild_only()
@@ -89,14 +202,16 @@ class Tags:
         _, created = await objects.get_or_create(
             Tag,
             title=tag_title,
+            guild_id=ctx.guild.id,
             defaults={
                 'content': tag_content,
-                'author_id': ctx.author.id,
-                'guild_id': ctx.guild.id
+                'author_id': ctx.author.id
             }
         )
 
         if created:
+            self.embed_cache.invalidate_guild(ctx.guild.id)
+            await snapshot.bump_version(ctx.guild.id)
             await ctx.send(embed=discord.Embed(
                 title=f"Created the tag {tag_title!r}!",
                 colour=discord.Colour.green()
@@ -129,6 +244,9 @@ class Tags:
             if (ctx.author.id == tag.author_id
                or ctx.author.permissions_in(ctx.channel).manage_messages):
                 await objects.delete(tag)
+                self.embed_cache.invalidate_guild(ctx.guild.id)
+                await snapshot.bump_version(ctx.guild.id)
+                self.pending_uses.pop(tag.id, None)
                 await ctx.send(embed=discord.Embed(
                     title=f"Deleted the tag {tag_title!r}.",
                     colour=discord.Colour.green()
@@ -150,16 +268,200 @@ class Tags:
 
     @tag.command(aliases=("all",), name="list")
     @commands.guild_only()
-    async def list_(self, ctx):
-        """Lists all tags on the guild."""
+    async def list_(self, ctx, *, prefix: str = ''):
+        """Lists all tags on the guild.
+
+        To only show tags starting with a given prefix,
+        pass it along with the command, for example:
+            tag list rul
+        """
+
+        title_key = title_sort_key()
+        query = Tag.select(Tag.id, Tag.title, title_key.alias('title_key')).where(Tag.guild_id == ctx.guild.id)
+        if prefix:
+            query = query.where(starts_with(title_key, prefix.lower()))
+
+        total = await objects.count(query)
+        if not total:
+            return await ctx.send(embed=discord.Embed(
+                title=f"Tags on {ctx.guild.name}:",
+                description=(f'No tags starting with {prefix!r} found.' if prefix
+                             else 'This guild has no tags.'),
+                colour=discord.Color.blue()
+            ))
+
+        async def fetch_page(after, limit):
+            page_query = query
+            if after is not None:
+                page_query = page_query.where(Tuple(title_key, Tag.id) > Tuple(*after))
+            tags = await peewee_async.execute(
+                page_query.order_by(title_key, Tag.id)
+                          .limit(limit)
+            )
+            if not tags:
+                return [], after
+            return [f"• {t.title}" for t in tags], (tags[-1].title_key, tags[-1].id)
+
+        paginator = KeysetPaginator(ctx, fetch_page, total, TAGS_PER_PAGE, discord.Embed(
+            title=f"Tags on {ctx.guild.name} ({total} total):",
+            colour=discord.Color.blue()
+        ))
+        await paginator.send()
+
+    @tag.command(name="top")
+    @commands.guild_only()
+    async def top(self, ctx):
+        """Shows the most frequently used tags on the guild."""
 
-        guild_tags = await peewee_async.execute(
-            Tag.select()
-               .where(Tag.guild_id == ctx.guild.id)
+        await self.flush_usage()
+        top_tags = await peewee_async.execute(
+            Tag.select(Tag.title, Tag.uses)
+               .where(Tag.guild_id == ctx.guild.id, Tag.uses > 0)
+               .order_by(Tag.uses.desc())
+               .limit(TOP_TAGS_SHOWN)
         )
 
         await ctx.send(embed=discord.Embed(
-            title=f"Tags on {ctx.guild.name}:",
-            description=', '.join(repr(t.title) for t in guild_tags) or 'This guild has no tags.',
+            title=f"Most used tags on {ctx.guild.name}:",
+            description='\n'.join(
+                f"{idx}. {t.title!r} ({t.uses:,} uses)"
+                for idx, t in enumerate(top_tags, start=1)
+            ) or 'No tags were used on this guild yet.',
             colour=discord.Color.blue()
         ))
+
+    @tag.command(name="export")
+    @commands.guild_only()
+    async def export(self, ctx):
+        """Exports all tags on the guild as a JSON lines file.
+
+        The resulting file can be imported on another guild with `tag import`.
+        """
+
+        with io.BytesIO() as result:
+            total = 0
+            last_id = 0
+            while True:
+                tags = await peewee_async.execute(
+                    Tag.select(Tag.id, Tag.title, Tag.content, Tag.created_on, Tag.author_id)
+                       .where(Tag.guild_id == ctx.guild.id, Tag.id > last_id)
+                       .order_by(Tag.id)
+                       .limit(TAG_IMPORT_CHUNK_SIZE)
+                )
+                for tag in tags:
+                    result.write(json.dumps({
+                        'title': tag.title,
+                        'content': tag.content,
+                        'created_on': tag.created_on.isoformat(),
+                        'author_id': tag.author_id
+                    }).encode() + b'\n')
+
+                total += len(tags)
+                if len(tags) < TAG_IMPORT_CHUNK_SIZE:
+                    break
+                last_id = tags[-1].id
+
+            result.seek(0)
+            await ctx.send(f"Exported `{total}` tags.",
+                           file=discord.File(result, filename=f"tags-{ctx.guild.id}.jsonl"))
+
+    @tag.command(name="import")
+    @commands.guild_only()
+    @commands.has_permissions(manage_messages=True)
+    async def import_(self, ctx):
+        """Imports tags from an attached JSON lines file.
+
+        Every line must be a JSON object with a `title` and a
+        `content` key, such as the files created by `tag export`.
+        Their `created_on` and `author_id` keys are kept if present,
+        otherwise the tags are created now and authored by you.
+        Tags whose name is already taken on this guild are left untouched.
+        """
+
+        if not ctx.message.attachments:
+            return await ctx.send(embed=discord.Embed(
+                title="Failed to import tags",
+                description="You need to attach a file containing the tags to import.",
+                colour=discord.Colour.red()
+            ))
+
+        with io.BytesIO() as raw_file:
+            await ctx.message.attachments[0].save(raw_file)
+            lines = raw_file.getvalue().decode('utf-8', errors='replace').splitlines()
+
+        rows, skipped = [], 0
+        now = datetime.utcnow()
+        for line in filter(str.strip, lines):
+            try:
+                entry = json.loads(line)
+                title, content = entry['title'], entry['content']
+            except (ValueError, TypeError, KeyError):
+                skipped += 1
+                continue
+
+            if (not isinstance(title, str) or not isinstance(content, str)
+               or not 0 < len(title) <= Tag.title.max_length
+               or not 0 < len(content) <= Tag.content.max_length):
+                skipped += 1
+                continue
+
+            try:
+                await TagName().convert(ctx, title)
+            except commands.BadArgument:
+                skipped += 1
+                continue
+
+            created_on = parse_exported_timestamp(entry.get('created_on')) or now
+            author_id = entry.get('author_id')
+            if not isinstance(author_id, int) or isinstance(author_id, bool):
+                author_id = ctx.author.id
+
+            rows.append((title, content, created_on, author_id))
+
+        created = 0
+        row_placeholders = f"({', '.join([database.interpolation] * 6)})"
+        async with objects.atomic():
+            for start in range(0, len(rows), TAG_IMPORT_CHUNK_SIZE):
+                chunk = rows[start:start + TAG_IMPORT_CHUNK_SIZE]
+                params = []
+                for title, content, created_on, author_id in chunk:
+                    params.extend((title, content, created_on, author_id, ctx.guild.id, 0))
+
+                values = ', '.join([row_placeholders] * len(chunk))
+                if database.supports_returning:
+                    inserted = await objects.execute(Tag.raw(
+                        "INSERT INTO tag (title, content, created_on, author_id, guild_id, uses) "
+                        f"VALUES {values} "
+                        "ON CONFLICT (guild_id, title) DO NOTHING "
+                        "RETURNING id",
+                        *params
+                    ))
+                    created += len(inserted)
+                else:
+                    # Older SQLite versions cannot return the created rows, so count them instead.
+                    guild_tags = Tag.select().where(Tag.guild_id == ctx.guild.id)
+                    existing = await objects.count(guild_tags)
+                    await objects.execute(Tag.raw(
+                        "INSERT OR IGNORE INTO tag (title, content, created_on, author_id, guild_id, uses) "
+                        f"VALUES {values}",
+                        *params
+                    ))
+                    created += await objects.count(guild_tags) - existing
+
+        if created:
+            self.embed_cache.invalidate_guild(ctx.guild.id)
+            await snapshot.bump_version(ctx.guild.id)
+
+        await ctx.send(embed=discord.Embed(
+            title="Finished importing tags",
+            colour=discord.Colour.green()
+        ).add_field(
+            name="Created",
+            value=f"`{created}`"
+        ).add_field(
+            name="Skipped (invalid)",
+            value=f"`{skipped}`"
+        ).add_field(
+            name="Conflicting (already exist)",
+            value=f"`{len(rows) - created}`"
+        ))
@@ -0,0 +1,16 @@
+# The maximum amount of rendered tag embeds to keep in memory.
+TAG_CACHE_SIZE = 512
+
+# The interval, in seconds, in which accumulated tag
+# usage counters are written back to the database.
+USAGE_FLUSH_INTERVAL = 60
+
+# How many tags are shown by `tag top`.
+TOP_TAGS_SHOWN = 10
+
+# How many tag titles are shown per page of `tag list`.
+TAGS_PER_PAGE = 20
+
+# How many tags are written per INSERT statement by `tag import`,
+# and read per SELECT statement by `tag export`.
+TAG_IMPORT_CHUNK_SIZE = 100
@@ -11,3 +11,10 @@ class Tag(Model):
     created_on = peewee.DateTimeField(default=datetime.utcnow)
     author_id = peewee.BigIntegerField()
     guild_id = peewee.BigIntegerField()
+    uses = peewee.IntegerField(default=0)
+
+    class Meta:
+        indexes = (
+            (('guild_id', 'uses'), False),
+            (('guild_id', 'title'), True),
+        )
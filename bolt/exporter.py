@@ -0,0 +1,67 @@
+import logging
+
+from aiohttp import web
+
+from bolt import metrics
+from bolt.database import database
+
+
+log = logging.getLogger(__name__)
+
+
+class MetricsServer:
+    """
+    Serves the bot's metrics in the Prometheus text format on `/metrics`.
+
+    Args:
+        bot (Bot):
+            The bot to report metrics for.
+        host (str):
+            The address to listen on. This should usually be localhost.
+        port (int):
+            The port to listen on.
+    """
+
+    def __init__(self, bot, host: str, port: int):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self._runner = None
+
+        metrics.register_gauge(
+            'shard_latency_seconds', "Heartbeat latency of every shard.",
+            lambda: (({'shard': str(shard_id)}, latency) for shard_id, latency in self.bot.latencies)
+        )
+        metrics.register_gauge('db_pool_connections', "Database connections, by state.", self.collect_db_pool)
+        metrics.register_gauge(
+            'event_loop_lag_seconds', "How late the event loop ran the latest scheduled callback.",
+            lambda: [({}, self.bot.watchdog.lag)]
+        )
+
+    @staticmethod
+    def collect_db_pool():
+        # Only Postgres connections are pooled, and the database may not be initialized yet.
+        connection = getattr(database.obj, '_async_conn', None)
+        pool = getattr(connection, 'pool', None)
+        if pool is None:
+            return []
+        return [
+            ({'state': 'used'}, pool.size - pool.freesize),
+            ({'state': 'free'}, pool.freesize),
+            ({'state': 'max'}, pool.maxsize)
+        ]
+
+    async def handle_metrics(self, _request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render_prometheus(), content_type='text/plain', charset='utf-8')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        log.info(f"Serving metrics on http://{self.host}:{self.port}/metrics.")
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
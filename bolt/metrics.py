@@ -0,0 +1,238 @@
+import asyncio
+import bisect
+import collections
+import contextlib
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+
+# Upper bounds of the histogram buckets for durations in seconds, and for amounts of calls.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float('inf'))
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, float('inf'))
+
+# `asyncio.current_task` replaced `asyncio.Task.current_task` in Python 3.7.
+current_task = getattr(asyncio, 'current_task', None) or asyncio.Task.current_task
+
+
+class Histogram:
+    """A histogram with fixed buckets, from which quantiles can be estimated."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile by interpolating linearly within the bucket it falls into.
+
+        Args:
+            q (float):
+                The quantile to estimate, between 0 and 1.
+
+        Returns:
+            float:
+                The estimated value, or 0 if nothing was observed yet.
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+        for idx, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[idx - 1] if idx > 0 else 0.0
+                upper = self.buckets[idx]
+                if upper == float('inf'):
+                    return lower
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-2]
+
+
+class CommandMetrics:
+    """The histograms recorded for every invocation of a single command."""
+
+    def __init__(self):
+        self.wall_time = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.db_calls = Histogram(COUNT_BUCKETS)
+        self.rest_calls = Histogram(COUNT_BUCKETS)
+
+
+class Invocation:
+    """The resources used by a single command invocation that is still running."""
+
+    __slots__ = ('name', 'db_calls', 'db_time', 'rest_calls')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.db_calls = 0
+        self.db_time = 0.0
+        self.rest_calls = 0
+
+
+command_metrics: Dict[str, CommandMetrics] = collections.defaultdict(CommandMetrics)
+totals = collections.Counter()
+gateway_events = collections.Counter()
+durations: Dict[str, Histogram] = collections.defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+
+# Gauges are collected when the metrics are scraped. Every collector returns
+# its current samples as pairs of labels and values, so updating the value of
+# a gauge costs nothing outside of scrapes.
+GaugeCollector = Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+_gauges: Dict[str, Tuple[str, GaugeCollector]] = {}
+
+# Maps the task running a command to its invocation. DB and REST calls
+# made from other tasks, such as those spawned by `asyncio.gather`,
+# are only counted in the totals.
+_invocations: Dict[asyncio.Task, Invocation] = {}
+
+
+def current_invocation(task: asyncio.Task = None):
+    """Return the command invocation running in the given task, or in the current task if omitted."""
+
+    try:
+        return _invocations.get(task or current_task())
+    except RuntimeError:
+        return None
+
+
+@contextlib.contextmanager
+def track_command(name: str):
+    """
+    Record the wall time and resource usage of the command invoked within this block.
+
+    Args:
+        name (str):
+            The qualified name of the command.
+    """
+
+    task = current_task()
+    invocation = _invocations[task] = Invocation(name)
+    started = time.perf_counter()
+    try:
+        yield invocation
+    finally:
+        elapsed = time.perf_counter() - started
+        del _invocations[task]
+
+        metrics = command_metrics[name]
+        metrics.wall_time.observe(elapsed)
+        metrics.db_time.observe(invocation.db_time)
+        metrics.db_calls.observe(invocation.db_calls)
+        metrics.rest_calls.observe(invocation.rest_calls)
+
+
+def record_query(elapsed: float):
+    totals['db_calls'] += 1
+    invocation = current_invocation()
+    if invocation is not None:
+        invocation.db_calls += 1
+        invocation.db_time += elapsed
+
+
+def record_rest_call():
+    totals['rest_calls'] += 1
+    invocation = current_invocation()
+    if invocation is not None:
+        invocation.rest_calls += 1
+
+
+def observe(name: str, seconds: float):
+    """Record a duration in the histogram with the given name."""
+
+    durations[name].observe(seconds)
+
+
+def register_gauge(name: str, description: str, collect: GaugeCollector):
+    """
+    Register a gauge whose samples are collected on every scrape.
+
+    Args:
+        name (str):
+            The name of the gauge, without the `bolt_` prefix.
+        description (str):
+            A description of what the gauge measures.
+        collect (GaugeCollector):
+            A function returning the current samples as pairs of labels and values.
+    """
+
+    _gauges[name] = (description, collect)
+
+
+def unregister_gauge(name: str):
+    _gauges.pop(name, None)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        '{0}="{1}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _render_histogram(lines: List[str], name: str, histogram: Histogram, labels: Dict[str, str]):
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        le = '+Inf' if bound == float('inf') else repr(float(bound))
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+
+def render_prometheus() -> str:
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Returns:
+        str:
+            The metrics, ready to be served to a Prometheus scraper.
+    """
+
+    lines = [
+        "# HELP bolt_gateway_events_total Gateway events received, by type.",
+        "# TYPE bolt_gateway_events_total counter"
+    ]
+    for event_type, count in gateway_events.items():
+        lines.append(f"bolt_gateway_events_total{_format_labels({'type': event_type})} {count}")
+
+    for key, description in (('db_calls', "Database queries executed."), ('rest_calls', "Outbound REST calls.")):
+        lines.append(f"# HELP bolt_{key}_total {description}")
+        lines.append(f"# TYPE bolt_{key}_total counter")
+        lines.append(f"bolt_{key}_total {totals[key]}")
+
+    command_histograms = (
+        ('command_duration_seconds', 'wall_time', "Wall time of command invocations."),
+        ('command_db_seconds', 'db_time', "Time spent in database queries per command invocation."),
+        ('command_db_queries', 'db_calls', "Database queries per command invocation."),
+        ('command_rest_calls', 'rest_calls', "Outbound REST calls per command invocation.")
+    )
+    for name, attribute, description in command_histograms:
+        lines.append(f"# HELP bolt_{name} {description}")
+        lines.append(f"# TYPE bolt_{name} histogram")
+        for command, metrics in list(command_metrics.items()):
+            _render_histogram(lines, f"bolt_{name}", getattr(metrics, attribute), {'command': command})
+
+    for name, histogram in list(durations.items()):
+        lines.append(f"# TYPE bolt_{name}_seconds histogram")
+        _render_histogram(lines, f"bolt_{name}_seconds", histogram, {})
+
+    for name, (description, collect) in list(_gauges.items()):
+        lines.append(f"# HELP bolt_{name} {description}")
+        lines.append(f"# TYPE bolt_{name} gauge")
+        for labels, value in collect():
+            lines.append(f"bolt_{name}{_format_labels(labels)} {value}")
+
+    return '\n'.join(lines) + '\n'
@@ -1,6 +1,7 @@
-from peewee import DoesNotExist
+from typing import Set
 
 from bolt.cogs.config.models import OptionalCog as OptionalCogModel
+from bolt.cogs.config.util import get_enabled_cogs
 from bolt.database import objects
 
 
@@ -31,12 +32,17 @@ class OptionalCog:
 
 
 async def enabled_for(cog: OptionalCog, guild_id: int):
-    try:
-        await objects.get(
-            OptionalCogModel,
-            OptionalCogModel.guild_id == guild_id,
-            OptionalCogModel.name == cog.__class__.__name__
-        )
-    except DoesNotExist:
-        return False
-    return True
+    return cog.__class__.__name__ in await get_enabled_cogs(guild_id)
+
+
+async def enabled_cog_names() -> Set[str]:
+    """
+    Get the names of all optional cogs that are enabled on at least one guild.
+
+    Returns:
+        Set[str]:
+            The class names of the enabled cogs, such as `League`.
+    """
+
+    query = OptionalCogModel.select(OptionalCogModel.name).distinct()
+    return {row.name for row in await objects.execute(query)}
@@ -1,13 +1,17 @@
 import asyncio
-import collections
 import functools
-from typing import Optional, Union
+import random
+from typing import List, Optional, Union
 
 import aiohttp
 
+from bolt.web import WebClient
+from .breaker import CircuitBreaker
+from .cache import ResponseCache
+from .ratelimit import RiotRateLimiter
+
 
 BASE_API_URL = ".api.riotgames.com"
-CALLS_PER_MINUTE = 50
 ENDPOINTS = {
     "BR": "br1",
     "EUNE": "eun1",
@@ -23,19 +27,35 @@ ENDPOINTS = {
 for endpoint in ENDPOINTS:
     ENDPOINTS[endpoint] = "https://" + ENDPOINTS[endpoint]
 
+# The maximum amount of responses kept in the response cache.
+RESPONSE_CACHE_SIZE = 2048
+
+# How often a request is attempted before giving up, and the bounds
+# in seconds for the randomized exponential backoff between attempts.
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8
+
 
-def async_cache(size: int=32):
-    cache = collections.OrderedDict()
+def cached_response(method: str):
+    """
+    Cache the responses of the decorated API method in the client's response cache.
+
+    Args:
+        method (str):
+            The endpoint method the responses belong to, which
+            determines how long the responses are cached for.
+    """
 
     def decorator(f):
         @functools.wraps(f)
         async def decorated_function(client, *args):
-            key = ':'.join(str(a) for a in args)
-            if key not in cache:
-                if len(cache) >= size:
-                    cache.popitem()
-                cache[key] = await f(client, *args)
-            return cache[key]
+            key = (method, *args)
+            hit, value = client.cache.get(key)
+            if not hit:
+                value = await f(client, *args)
+                client.cache.put(key, value)
+            return value
         return decorated_function
     return decorator
 
@@ -43,54 +63,108 @@ def async_cache(size: int=32):
 class LeagueAPIClient:
     """An asynchronous interface to the League of Legends API."""
 
-    def __init__(self, key: str):
-        self._cs = aiohttp.ClientSession(
-            loop=asyncio.get_event_loop(),
-            headers={'X-Riot-Token': key}
-        )
-
-    def __del__(self):
-        self._cs.close()
-
-    async def _get(self, url, **kwargs):
-        backoff = kwargs.pop('backoff', 1)
-        async with self._cs.get(url, **kwargs) as res:
-            if res.status == 404:
-                return None
-            elif res.status == 429:
-                await asyncio.sleep(int(res.headers['Retry-After']))
-                return await self._get(url, **kwargs)
-            elif res.status >= 500 and kwargs.get('backoff', 1) <= 3:
-                await asyncio.sleep(backoff)
-                return await self._get(url, **kwargs, backoff=backoff + 1)
-
-            res.raise_for_status()
-            await asyncio.sleep(CALLS_PER_MINUTE / 60)
-            return await res.json()
-
-    @async_cache()
+    def __init__(self, web: WebClient, key: str, cache_path: Optional[str] = None):
+        self._web = web
+        self._headers = {'X-Riot-Token': key}
+        self.rate_limiter = RiotRateLimiter()
+        self.breakers = {region: CircuitBreaker(region) for region in ENDPOINTS}
+        self._in_flight = {}
+        self.cache = ResponseCache(RESPONSE_CACHE_SIZE, cache_path)
+
+    def close(self):
+        self.cache.close()
+
+    async def _get(self, region: str, method: str, url: str, params: dict = None):
+        """
+        Send a GET request, sharing the response with all identical requests that are already in flight.
+
+        Args:
+            region (str):
+                The region the request is sent to.
+            method (str):
+                The name of the endpoint method the request is sent to.
+            url (str):
+                The URL to request.
+            params (dict):
+                Optional query parameters for the request.
+
+        Returns:
+            The decoded JSON response, or `None` if the API responded with 404.
+
+        Raises:
+            RiotAPIUnavailable:
+                If the region's circuit breaker is open.
+            aiohttp.ClientError:
+                If the request still failed after retrying.
+        """
+
+        key = (url, tuple(sorted((params or {}).items())))
+        request = self._in_flight.get(key)
+        if request is None:
+            request = asyncio.ensure_future(self._request(region, method, url, params))
+            self._in_flight[key] = request
+            request.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielding prevents a cancelled caller from cancelling the request for all other callers.
+        return await asyncio.shield(request)
+
+    async def _request(self, region: str, method: str, url: str, params: Optional[dict]):
+        breaker = self.breakers[region]
+        for attempt in range(MAX_ATTEMPTS):
+            breaker.check()
+            await self.rate_limiter.acquire(region, method)
+            try:
+                async with self._web.session.get(url, headers=self._headers, params=params) as res:
+                    self.rate_limiter.update(region, method, res.headers)
+                    if res.status == 429 and attempt + 1 < MAX_ATTEMPTS:
+                        breaker.record_success()
+                        self.rate_limiter.block(region, method, res.headers)
+                        continue
+                    elif res.status >= 500:
+                        res.raise_for_status()
+
+                    breaker.record_success()
+                    if res.status == 404:
+                        return None
+                    res.raise_for_status()
+                    return await res.json()
+
+            except (aiohttp.ClientResponseError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if isinstance(e, aiohttp.ClientResponseError) and e.status < 500:
+                    raise
+                breaker.record_failure()
+                if attempt + 1 == MAX_ATTEMPTS:
+                    raise
+                # Full jitter keeps callers that failed at the same time from retrying in lockstep.
+                await asyncio.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+
+    @cached_response("summoner")
     async def get_summoner(self, region: str, identifier: Union[str, int]) -> Optional[dict]:
         if region not in ENDPOINTS:
             raise ValueError(f"{region} is not a valid region")
         if isinstance(identifier, str):
+            method = "summoner/by-name"
             url = f"{ENDPOINTS[region]}{BASE_API_URL}/lol/summoner/v3/summoners/by-name/{identifier}"
         else:
+            method = "summoner/by-id"
             url = f"{ENDPOINTS[region]}{BASE_API_URL}/lol/summoner/v3/summoners/{identifier}"
-        return await self._get(url)
+        return await self._get(region, method, url)
+
+    async def get_versions(self) -> List[str]:
+        url = ENDPOINTS['NA'] + BASE_API_URL + "/lol/static-data/v3/versions"
+        return await self._get('NA', "static-data/versions", url)
 
-    @async_cache()
-    async def get_champion(self, name: str) -> Optional[dict]:
+    async def get_champions(self, version: str) -> dict:
         url = ENDPOINTS['NA'] + BASE_API_URL + "/lol/static-data/v3/champions"
-        res = await self._get(url, headers={'locale': 'en_US'})
-        return next((c for c in res['data'].values() if c['name'] == name), None)
+        return await self._get('NA', "static-data/champions", url, {'locale': 'en_US', 'version': version})
 
+    @cached_response("champion-mastery/by-champion")
     async def get_mastery(self, region: str, summoner_id: int, champion_id: int) -> Optional[int]:
         if region not in ENDPOINTS:
             raise ValueError(f"{region} is not a valid region")
 
         endpoint_url = ENDPOINTS[region] + BASE_API_URL + "/lol/champion-mastery/v3/champion-masteries"
         parametrized_url = f"{endpoint_url}/by-summoner/{summoner_id}/by-champion/{champion_id}"
-        res = await self._get(parametrized_url)
+        res = await self._get(region, "champion-mastery/by-champion", parametrized_url)
         if res is not None:
             return res['championPoints']
         return None
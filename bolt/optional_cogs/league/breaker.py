@@ -0,0 +1,72 @@
+import enum
+import time
+
+
+# How many consecutive failures open the circuit, and how
+# many seconds pass before a probe request is let through.
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30
+
+
+class RiotAPIUnavailable(Exception):
+    """Raised when requests to a region are not sent because its circuit is open."""
+
+    def __init__(self, region: str, retry_after: float):
+        super().__init__(f"The Riot API for {region} is unavailable, retrying in {retry_after:.0f}s.")
+        self.region = region
+        self.retry_after = retry_after
+
+
+class CircuitState(enum.Enum):
+    closed = 'closed'
+    open = 'open'
+    half_open = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of a single region of the API.
+
+    After `FAILURE_THRESHOLD` consecutive failures, the circuit opens and
+    requests fail fast. Once `RESET_TIMEOUT` seconds have passed, a single
+    probe request is let through: if it succeeds, the circuit closes again,
+    otherwise it stays open for another `RESET_TIMEOUT` seconds.
+    """
+
+    def __init__(self, region: str):
+        self.region = region
+        self.state = CircuitState.closed
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def check(self):
+        """
+        Ensure that a request may be sent.
+
+        Raises:
+            RiotAPIUnavailable:
+                If the circuit is open, or a probe request was sent recently.
+        """
+
+        if self.state == CircuitState.closed:
+            return
+
+        now = time.monotonic()
+        retry_after = self.opened_at + RESET_TIMEOUT - now
+        if retry_after > 0:
+            raise RiotAPIUnavailable(self.region, retry_after)
+
+        # Let a single probe through. Restarting the timeout ensures that
+        # another probe is sent if this one never reports back.
+        self.state = CircuitState.half_open
+        self.opened_at = now
+
+    def record_success(self):
+        self.state = CircuitState.closed
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == CircuitState.half_open or self.failures >= FAILURE_THRESHOLD:
+            self.state = CircuitState.open
+            self.opened_at = time.monotonic()
@@ -0,0 +1,207 @@
+import asyncio
+import collections
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+log = logging.getLogger(__name__)
+
+# How long, in seconds, responses of each endpoint group stay valid.
+ENDPOINT_TTLS = {
+    'static-data': 2 * 24 * 60 * 60,
+    'summoner': 6 * 60 * 60,
+    'champion-mastery': 5 * 60
+}
+DEFAULT_TTL = 5 * 60
+# Responses to requests for things that do not exist (yet), such as summoners
+# that were not created yet, are only cached briefly, whatever their endpoint.
+NOT_FOUND_TTL = 60
+
+# How often, in seconds, changed entries are written to disk.
+FLUSH_INTERVAL = 60
+
+
+class ResponseCache:
+    """
+    A bounded least-recently-used cache for API responses whose entries
+    expire after a per-endpoint time to live. Entries are keyed by the
+    endpoint method along with its parameters.
+
+    If a path is given, the cache can be loaded from and written back to a
+    SQLite database at that path, so that it survives restarts. Accessing the
+    database blocks, so it is only ever accessed from a thread of its own.
+    """
+
+    def __init__(self, size: int, path: Optional[str] = None):
+        self.size = size
+        self.path = path
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self._entries = collections.OrderedDict()
+        self._dirty = set()
+        self._removed = set()
+        self._db = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='league-cache') if path else None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def ttl_for(method: str) -> float:
+        return ENDPOINT_TTLS.get(method.split('/')[0], DEFAULT_TTL)
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            key (Tuple):
+                The endpoint method followed by its parameters.
+
+        Returns:
+            Tuple[bool, Any]:
+                Whether the response was cached and not expired yet,
+                and the response itself if it was.
+        """
+
+        method = key[0]
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits[method] += 1
+                return True, value
+            self._remove(key)
+
+        self.misses[method] += 1
+        return False, None
+
+    def put(self, key: Tuple, value: Any):
+        """
+        Cache a response, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (Tuple):
+                The endpoint method followed by its parameters.
+            value (Any):
+                The JSON-serializable response.
+        """
+
+        ttl = self.ttl_for(key[0]) if value is not None else min(self.ttl_for(key[0]), NOT_FOUND_TTL)
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        self._dirty.add(key)
+        self._removed.discard(key)
+        while len(self._entries) > self.size:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def _remove(self, key: Tuple):
+        del self._entries[key]
+        self._dirty.discard(key)
+        self._removed.add(key)
+
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """Return the amount of hits and misses of every endpoint method."""
+
+        return {method: (self.hits[method], self.misses[method]) for method in self.hits.keys() | self.misses.keys()}
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = sum(self.hits.values()) + sum(self.misses.values())
+        return sum(self.hits.values()) / lookups if lookups else 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+        return self._db
+
+    def _read(self) -> List[Tuple[str, str, float]]:
+        db = self._connect()
+        rows = db.execute(
+            "SELECT key, value, expires_at FROM response WHERE expires_at > ? ORDER BY expires_at DESC LIMIT ?",
+            (time.time(), self.size)
+        ).fetchall()
+        db.execute("DELETE FROM response WHERE expires_at <= ?", (time.time(),))
+        db.commit()
+        return rows
+
+    def _write(self, removed: Iterable[str], changed: Iterable[Tuple[str, str, float]]):
+        with self._connect() as db:
+            db.executemany("DELETE FROM response WHERE key = ?", ((key,) for key in removed))
+            db.executemany("INSERT OR REPLACE INTO response (key, value, expires_at) VALUES (?, ?, ?)", changed)
+
+    def _write_and_close(self, removed: List[str], changed: List[Tuple[str, str, float]]):
+        try:
+            if removed or changed:
+                self._write(removed, changed)
+        except sqlite3.Error as e:
+            log.error(f"Failed to write the League API response cache to {self.path}: {e}")
+        finally:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    async def load(self):
+        """Load the entries from the backing store, if there is one, keeping entries that were cached since."""
+
+        if self._executor is None:
+            return
+
+        try:
+            rows = await asyncio.get_event_loop().run_in_executor(self._executor, self._read)
+        except sqlite3.Error as e:
+            log.error(f"Failed to load the League API response cache from {self.path}: {e}")
+            return
+
+        # Entries that expire last were likely used last as well, but before any entry cached since.
+        loaded = 0
+        for key, value, expires_at in rows:
+            key = tuple(json.loads(key))
+            if key not in self._entries and key not in self._removed and len(self._entries) < self.size:
+                self._entries[key] = (expires_at, json.loads(value))
+                self._entries.move_to_end(key, last=False)
+                loaded += 1
+        log.info(f"Loaded {loaded} cached League API responses from {self.path}.")
+
+    def _take_changes(self) -> Tuple[List[str], List[Tuple[str, str, float]]]:
+        removed = [json.dumps(key) for key in self._removed]
+        changed = [
+            (json.dumps(key), json.dumps(self._entries[key][1]), self._entries[key][0])
+            for key in self._dirty
+        ]
+        self._dirty.clear()
+        self._removed.clear()
+        return removed, changed
+
+    async def flush(self):
+        """Write all changed entries to the backing store, if there is one."""
+
+        removed, changed = self._take_changes()
+        if self._executor is None or not (removed or changed):
+            return
+
+        try:
+            await asyncio.get_event_loop().run_in_executor(self._executor, self._write, removed, changed)
+        except sqlite3.Error as e:
+            log.error(f"Failed to write the League API response cache to {self.path}: {e}")
+
+    def close(self):
+        """Write the remaining changes and close the backing store in the background."""
+
+        removed, changed = self._take_changes()
+        if self._executor is None:
+            return
+
+        self._executor.submit(self._write_and_close, removed, changed)
+        # The interpreter waits for the pending writes before exiting.
+        self._executor.shutdown(wait=False)
+        self._executor = None
@@ -0,0 +1,120 @@
+import difflib
+import json
+import logging
+import os
+import re
+from typing import Dict, Optional
+
+
+log = logging.getLogger(__name__)
+
+# Where the champion catalog is stored between restarts. The catalog is the
+# same for all clusters, so they share it instead of fetching it each.
+CHAMPION_CATALOG_PATH = os.environ.get('BOLT_CHAMPION_CATALOG', 'champions.json')
+
+# How similar a query has to be to a champion's name to be considered a typo of it.
+FUZZY_MATCH_CUTOFF = 0.75
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a champion name for lookups, such that `cho gath` matches `Cho'Gath`."""
+
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+class ChampionCatalog:
+    """
+    An in-memory catalog of all champions, indexed by their
+    ID, their name and their key, which serves as an alias.
+    """
+
+    def __init__(self, path: str = CHAMPION_CATALOG_PATH):
+        self.path = path
+        self.version = None
+        self.by_id: Dict[int, dict] = {}
+        self.by_name: Dict[str, dict] = {}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def load(self, version: str, champions: Dict[str, dict]):
+        """
+        Rebuild the indexes from the champion data of the static data API.
+
+        Args:
+            version (str):
+                The game version the data belongs to.
+            champions (Dict[str, dict]):
+                The `data` of the static data champion list.
+        """
+
+        self.version = version
+        self.by_id = {}
+        self.by_name = {}
+        for champion in champions.values():
+            self.by_id[champion['id']] = champion
+            self.by_name[normalize_name(champion['name'])] = champion
+            self.by_name.setdefault(normalize_name(champion['key']), champion)
+
+    def load_file(self) -> bool:
+        """
+        Load the catalog stored on disk.
+
+        Returns:
+            bool:
+                Whether a stored catalog was found and loaded.
+        """
+
+        if not os.path.exists(self.path):
+            return False
+
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+            self.load(stored['version'], stored['data'])
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"Failed to load the champion catalog from {self.path}: {e}")
+            return False
+        return True
+
+    def save_file(self):
+        """Store the catalog on disk, so that it does not need to be fetched after a restart."""
+
+        # Write to a temporary file first, so that other clusters never read a partial catalog.
+        # It is named after this process, since clusters may store the catalog at the same time.
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, 'w') as f:
+                json.dump({
+                    'version': self.version,
+                    'data': {str(champion_id): champion for champion_id, champion in self.by_id.items()}
+                }, f)
+            os.replace(temporary_path, self.path)
+        except OSError as e:
+            log.warning(f"Failed to store the champion catalog in {self.path}: {e}")
+
+    def get(self, champion_id: int) -> Optional[dict]:
+        return self.by_id.get(champion_id)
+
+    def find(self, query: str) -> Optional[dict]:
+        """
+        Find a champion by its name or key, allowing for typos.
+
+        Args:
+            query (str):
+                The name to search for.
+
+        Returns:
+            Optional[dict]:
+                The best matching champion, or `None` if no champion matches closely enough.
+        """
+
+        name = normalize_name(query)
+        champion = self.by_name.get(name)
+        if champion is not None:
+            return champion
+
+        matches = difflib.get_close_matches(name, self.by_name.keys(), n=1, cutoff=FUZZY_MATCH_CUTOFF)
+        if matches:
+            return self.by_name[matches[0]]
+        return None
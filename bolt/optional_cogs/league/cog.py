@@ -1,23 +1,89 @@
+import asyncio
+import collections
+import heapq
 import io
-from operator import itemgetter
-from typing import Optional
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Tuple
 
 import discord
 import peewee_async
 from discord.ext import commands
 from peewee import DoesNotExist
 
+from bolt import metrics
 from bolt.bot.config import CONFIG
+from bolt.cogs.config.models import OptionalCog as OptionalCogModel
 from bolt.database import objects
 from bolt.optional_cogs.base import OptionalCog
 from .api import LeagueAPIClient
+from .cache import FLUSH_INTERVAL
+from .catalog import ChampionCatalog
 from .converters import Region
-from .models import Champion, PermittedRole, Summoner
+from .models import Champion, MasterySnapshot, PermittedRole, Summoner
+from .profiles import PROFILE_REFRESH_INTERVAL, SummonerProfileCache
 from .util import has_permitted_role
 
 
-TABLE_HEADER = ("\# | **Summoner Name** | **Server** | **Points**\n"
-                "--:|--|--|--\n")
+log = logging.getLogger(__name__)
+
+TABLE_HEADER = ("\# | **Summoner Name** | **Server** | **Points** | **Gained (7 days)**\n"
+                "--:|--|--|--|--\n")
+
+# How many summoners of a single region are fetched concurrently by
+# `buildtable`. The actual request rate is bounded by the rate limiter.
+WORKERS_PER_REGION = 4
+
+# How often, in seconds, the champion catalog is checked for a new game version.
+CATALOG_REFRESH_INTERVAL = 24 * 60 * 60
+
+# How often the mastery snapshot of every guild is refreshed in the background,
+# and for how long snapshots are kept around to calculate gained points.
+SNAPSHOT_REFRESH_INTERVAL = 6 * 60 * 60
+SNAPSHOT_RETENTION = timedelta(days=30)
+
+# Fetches the latest snapshot of every summoner on a guild along with the
+# points gained within the past week, using a single window query. Mastery
+# points never decrease, so the minimum within the week is its first value.
+LATEST_SNAPSHOTS_QUERY = """
+    SELECT DISTINCT ON (summoner.id)
+           summoner.id, summoner.region, profile.name, snapshot.points, snapshot.fetched_at,
+           snapshot.points - MIN(snapshot.points) FILTER (
+               WHERE snapshot.fetched_at >= %s
+           ) OVER (PARTITION BY summoner.id) AS weekly_gain
+    FROM summoner
+    LEFT JOIN summonerprofile AS profile
+           ON profile.id = summoner.id
+    LEFT JOIN masterysnapshot AS snapshot
+           ON snapshot.summoner_id = summoner.id AND snapshot.champion_id = %s
+    WHERE summoner.guild_id = %s
+    ORDER BY summoner.id, snapshot.fetched_at DESC NULLS LAST
+"""
+
+
+def next_refresh_at(guild_id: int, now: float) -> float:
+    """
+    Calculate when the snapshot of the given guild should be refreshed next.
+
+    Every guild is assigned a fixed offset within the refresh interval based
+    on the creation time encoded in its ID, which spreads the refreshes of
+    all guilds evenly across the interval instead of running them all at once.
+
+    Args:
+        guild_id (int):
+            The ID of the guild to calculate the refresh time for.
+        now (float):
+            The current UNIX timestamp.
+
+    Returns:
+        float:
+            The UNIX timestamp at which the next refresh should happen.
+    """
+
+    offset = (guild_id >> 22) % SNAPSHOT_REFRESH_INTERVAL
+    elapsed_intervals = (now - offset) // SNAPSHOT_REFRESH_INTERVAL
+    return offset + (elapsed_intervals + 1) * SNAPSHOT_REFRESH_INTERVAL
 
 
 class League(OptionalCog):
@@ -27,7 +93,217 @@ class League(OptionalCog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.league_client = LeagueAPIClient(CONFIG['league']['key'])
+        self.league_client = LeagueAPIClient(
+            bot.web, CONFIG['league']['key'], CONFIG['league'].get('cache_path') or None
+        )
+        self.profiles = SummonerProfileCache(self.league_client)
+        self.champions = ChampionCatalog()
+        self.champions.load_file()
+        self.catalog_task = self.bot.loop.create_task(self.champion_catalog_task())
+        metrics.register_gauge(
+            'league_cache_hit_ratio', "Hit ratio of the League API response cache, by endpoint method.",
+            self.collect_cache_ratio
+        )
+        self.snapshot_task = self.bot.loop.create_task(self.snapshot_refresh_task())
+        self.profile_task = self.bot.loop.create_task(self.profile_refresh_task())
+        self.cache_task = self.bot.loop.create_task(self.response_cache_task())
+
+    def __unload(self):
+        metrics.unregister_gauge('league_cache_hit_ratio')
+        self.cache_task.cancel()
+        self.catalog_task.cancel()
+        self.snapshot_task.cancel()
+        self.profile_task.cancel()
+        self.league_client.close()
+
+    def collect_cache_ratio(self):
+        return [
+            ({'method': method}, hits / (hits + misses))
+            for method, (hits, misses) in self.league_client.cache.stats().items()
+        ]
+
+    async def champion_catalog_task(self):
+        while True:
+            try:
+                await self.refresh_champion_catalog()
+                await asyncio.sleep(CATALOG_REFRESH_INTERVAL)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log.error(f"Unhandled Exception in champion catalog task: {e}")
+                await asyncio.sleep(CATALOG_REFRESH_INTERVAL)
+
+    async def refresh_champion_catalog(self):
+        """Fetch the champion catalog if a new game version was released since it was last fetched."""
+
+        latest_version = (await self.league_client.get_versions())[0]
+        if latest_version != self.champions.version:
+            champions = await self.league_client.get_champions(latest_version)
+            self.champions.load(latest_version, champions['data'])
+            self.champions.save_file()
+            log.info(f"Loaded {len(self.champions)} champions for version {latest_version}.")
+
+    async def response_cache_task(self):
+        cache = self.league_client.cache
+        await cache.load()
+        while True:
+            try:
+                await asyncio.sleep(FLUSH_INTERVAL)
+                await cache.flush()
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log.error(f"Unhandled Exception in League API response cache task: {e}")
+
+    async def profile_refresh_task(self):
+        # Profiles are shared by all guilds, so with multiple clusters only the first one refreshes them,
+        # instead of every cluster fetching the same summoners with a rate limiter unaware of the others.
+        if self.bot.cluster is not None and self.bot.cluster.cluster_id != 0:
+            return
+
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                refreshed = await self.profiles.refresh_stale()
+                if refreshed:
+                    log.debug(f"Refreshed {refreshed} stale summoner profiles.")
+                await asyncio.sleep(PROFILE_REFRESH_INTERVAL)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log.error(f"Unhandled Exception in summoner profile task: {e}")
+                await asyncio.sleep(PROFILE_REFRESH_INTERVAL)
+
+    async def snapshot_refresh_task(self):
+        await self.bot.wait_until_ready()
+        # Maps the IDs of tracked guilds to when their snapshot is due to be refreshed.
+        due_at = {}
+        while True:
+            try:
+                tracked_guilds = await peewee_async.execute(
+                    Champion.select()
+                            .join(OptionalCogModel, on=(OptionalCogModel.guild_id == Champion.guild_id))
+                            .where(OptionalCogModel.name == self.__class__.__name__)
+                )
+                # Guilds of other clusters are refreshed by those clusters.
+                champion_ids = {
+                    champion.guild_id: champion.id for champion in tracked_guilds
+                    if self.bot.get_guild(champion.guild_id) is not None
+                }
+                if not champion_ids:
+                    due_at.clear()
+                    await asyncio.sleep(SNAPSHOT_REFRESH_INTERVAL)
+                    continue
+
+                now = time.time()
+                for guild_id in due_at.keys() - champion_ids.keys():
+                    del due_at[guild_id]
+                for guild_id in champion_ids.keys() - due_at.keys():
+                    due_at[guild_id] = next_refresh_at(guild_id, now)
+
+                # Every guild whose slot passed is refreshed, even if it passed while other guilds were
+                # being refreshed, and is only moved on to its next slot once it was refreshed.
+                queue = [(due, guild_id) for guild_id, due in due_at.items()]
+                heapq.heapify(queue)
+                while queue and queue[0][0] <= time.time():
+                    due, guild_id = heapq.heappop(queue)
+                    failed = await self.refresh_snapshot(guild_id, champion_ids[guild_id])
+                    log.debug(f"Refreshed mastery snapshot for guild {guild_id}, {failed} lookups failed.")
+                    due_at[guild_id] = next_refresh_at(guild_id, due)
+
+                await asyncio.sleep(max(min(due_at.values()) - time.time(), 0))
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log.error(f"Unhandled Exception in mastery snapshot task: {e}")
+                await asyncio.sleep(60)
+
+    async def refresh_snapshot(
+            self, guild_id: int, champion_id: int, on_progress: Callable[[float], Awaitable] = None
+    ) -> int:
+        """
+        Fetch the current mastery scores of all summoners on the
+        given guild and store them as a new snapshot.
+
+        Args:
+            guild_id (int):
+                The guild whose summoners should be fetched.
+            champion_id (int):
+                The champion to fetch the mastery scores for.
+            on_progress (Callable[[float], Awaitable]):
+                An optional coroutine function that is called with the
+                current progress, between 0 and 1, as results arrive.
+
+        Returns:
+            int:
+                The amount of summoners whose score could not be fetched.
+        """
+
+        summoners = await peewee_async.execute(
+            Summoner.select()
+                    .where(Summoner.guild_id == guild_id)
+        )
+        rows = await self.fetch_table_rows(summoners, champion_id, on_progress)
+
+        now = datetime.utcnow()
+        snapshot = [
+            {'summoner_id': summoner.id, 'champion_id': champion_id, 'points': score, 'fetched_at': now}
+            for summoner, score in rows
+            if score is not None
+        ]
+        if snapshot:
+            await peewee_async.execute(MasterySnapshot.insert_many(snapshot))
+            await peewee_async.execute(
+                MasterySnapshot.delete()
+                               .where(MasterySnapshot.summoner_id.in_([summoner.id for summoner in summoners]),
+                                      MasterySnapshot.fetched_at < now - SNAPSHOT_RETENTION)
+            )
+        return len(rows) - len(snapshot)
+
+    async def fetch_table_rows(
+            self, summoners: List[Summoner], champion_id: int, on_progress: Callable[[float], Awaitable] = None
+    ) -> List[Tuple[Summoner, Optional[int]]]:
+        pending = collections.defaultdict(collections.deque)
+        for summoner in summoners:
+            pending[summoner.region].append(summoner)
+
+        rows = []
+        last_update_percent = 0.00
+
+        async def region_worker(region_summoners):
+            nonlocal last_update_percent
+            while region_summoners:
+                rows.append(await self.fetch_table_row(region_summoners.popleft(), champion_id))
+
+                progress = len(rows) / len(summoners)
+                if on_progress is not None and progress >= last_update_percent + 0.05:
+                    last_update_percent = progress
+                    await on_progress(progress)
+
+        await asyncio.gather(*(
+            region_worker(region_summoners)
+            for region_summoners in pending.values()
+            for _ in range(min(WORKERS_PER_REGION, len(region_summoners)))
+        ))
+        return rows
+
+    async def fetch_table_row(self, summoner: Summoner, champion_id: int) -> Tuple[Summoner, Optional[int]]:
+        """
+        Fetch the mastery score of the given summoner for the leaderboard.
+
+        If the request fails, the score is `None` instead of raising an exception.
+        """
+
+        try:
+            mastery_score = await self.league_client.get_mastery(summoner.region, summoner.id, champion_id)
+        except Exception as e:
+            log.warning(f"Failed to fetch mastery for summoner {summoner.id} ({summoner.region}): {e}")
+            mastery_score = None
+        return summoner, mastery_score
 
     async def get_champ_id(self, guild_id: int) -> Optional[int]:
         try:
@@ -99,7 +375,7 @@ class League(OptionalCog):
 
     @league.command(name="setchamp")
     @commands.check(has_permitted_role)
-    async def set_champion(self, ctx, name: str):
+    async def set_champion(self, ctx, *, name: str):
         """
         Sets the champion to be associated with
         this Guild for tracking user mastery.
@@ -112,7 +388,10 @@ class League(OptionalCog):
                 colour=discord.Colour.red()
             ))
         else:
-            champion_data = await self.league_client.get_champion(name)
+            if not self.champions:
+                await self.refresh_champion_catalog()
+
+            champion_data = self.champions.find(name)
             if champion_data is not None:
                 await objects.create(
                     Champion,
@@ -120,7 +399,7 @@ class League(OptionalCog):
                     guild_id=ctx.guild.id
                 )
                 await ctx.send(embed=discord.Embed(
-                    description=f"Successfully associated Champion `{name}` with this Guild.",
+                    description=f"Successfully associated Champion `{champion_data['name']}` with this Guild.",
                     colour=discord.Colour.green()
                 ))
             else:
@@ -162,8 +441,8 @@ class League(OptionalCog):
         Add a user to the mastery leaderboard for this guild.
         """
 
-        summoner_data = await self.league_client.get_summoner(region, name)
-        if summoner_data is None:
+        profile = await self.profiles.get(region, name)
+        if profile is None:
             return await ctx.send(embed=discord.Embed(
                 title="Failed to add User:",
                 description=f"No user named `{name}` in `{region}` found.",
@@ -173,18 +452,22 @@ class League(OptionalCog):
         try:
             await objects.get(
                 Summoner,
-                Summoner.id == summoner_data['id'],
+                Summoner.id == profile.id,
                 Summoner.guild_id == ctx.guild.id
             )
         except DoesNotExist:
             champ_id = await self.get_champ_id(ctx.guild.id)
+            mastery_score = None
+            if champ_id is not None:
+                mastery_score = await self.league_client.get_mastery(region, profile.id, champ_id)
+
             if champ_id is None:
                 await ctx.send(embed=discord.Embed(
                     title="Failed to add User:",
                     description="This guild needs to have a champion associated with it first.",
                     colour=discord.Colour.red()
                 ))
-            elif await self.league_client.get_mastery(region, summoner_data['id'], champ_id) is None:
+            elif mastery_score is None:
                 await ctx.send(embed=discord.Embed(
                     title="Failed to add User:",
                     description="The user was found, but I cannot get any mastery data.",
@@ -193,10 +476,16 @@ class League(OptionalCog):
             else:
                 await objects.create(
                     Summoner,
-                    id=summoner_data['id'],
+                    id=profile.id,
                     guild_id=ctx.guild.id,
                     region=region
                 )
+                await objects.create(
+                    MasterySnapshot,
+                    summoner_id=profile.id,
+                    champion_id=champ_id,
+                    points=mastery_score
+                )
                 await ctx.send(embed=discord.Embed(
                     description=f"Successfully added `{name}` to the database.",
                     colour=discord.Colour.green()
@@ -215,8 +504,12 @@ class League(OptionalCog):
         Removes a user from the mastery leaderboard for this guild.
         """
 
-        summoner_data = await self.league_client.get_summoner(region, name)
-        if summoner_data is None:
+        # Summoners on the leaderboard always have a cached profile, so the
+        # API only needs to be asked if the summoner was renamed in the meantime.
+        profile = await self.profiles.get_cached(region, name)
+        if profile is None:
+            profile = await self.profiles.get(region, name)
+        if profile is None:
             return await ctx.send(embed=discord.Embed(
                 title="Failed to remove user:",
                 description=f"`{name}` in `{region}` was not found.",
@@ -226,7 +519,7 @@ class League(OptionalCog):
         try:
             summoner = await objects.get(
                 Summoner,
-                Summoner.id == summoner_data['id'],
+                Summoner.id == profile.id,
                 Summoner.guild_id == ctx.guild.id
             )
         except DoesNotExist:
@@ -237,6 +530,10 @@ class League(OptionalCog):
             ))
         else:
             await objects.delete(summoner)
+            await peewee_async.execute(
+                MasterySnapshot.delete()
+                               .where(MasterySnapshot.summoner_id == summoner.id)
+            )
             await ctx.send(embed=discord.Embed(
                 description=f"Successfully removed `{name}` from the database.",
                 colour=discord.Colour.green()
@@ -244,48 +541,85 @@ class League(OptionalCog):
 
     @league.command(name="buildtable")
     @commands.check(has_permitted_role)
-    async def build_table(self, ctx):
+    async def build_table(self, ctx, *, options: str = ''):
         """
         Builds a table with the added users on this
         Guild along with their mastery scores and regions
         and outputs it in valid Markdown.
+
+        The table is built from the latest mastery snapshot,
+        which is refreshed in the background periodically.
+        To fetch the current scores first, use `buildtable --fresh`.
         """
 
         champion_id = await self.get_champ_id(ctx.guild.id)
 
         if champion_id is None:
-            await ctx.send(embed=discord.Embed(
+            return await ctx.send(embed=discord.Embed(
                 title="Cannot build table:",
                 description="This command requires the champion to be set with `setchamp`.",
                 colour=discord.Color.red()
             ))
-        else:
-            summoners = await peewee_async.execute(
-                Summoner.select()
-                        .where(Summoner.guild_id == ctx.guild.id)
-            )
 
-            last_update_percent = 0.00
-            masteries = []
-            progress_msg = await ctx.send(":bar_chart: **Working...** 0% done.")
+        summoners = await objects.execute(Summoner.raw(
+            LATEST_SNAPSHOTS_QUERY,
+            datetime.utcnow() - timedelta(days=7), champion_id, ctx.guild.id
+        ))
 
-            for idx, summ in enumerate(summoners):
-                mastery_score = await self.league_client.get_mastery(summ.region, summ.id, champion_id)
-                summoner_data = await self.league_client.get_summoner(summ.region, summ.id)
+        if '--fresh' in options.split() or any(summoner.fetched_at is None for summoner in summoners):
+            progress_msg = await ctx.send(":bar_chart: **Working...** 0% done.")
 
-                progress = idx / len(summoners)
-                if progress >= last_update_percent + 0.05:
-                    await progress_msg.edit(content=f":bar_chart: **Working...** {progress * 100:3.2f}% done.")
-                    last_update_percent = progress
+            async def report_progress(progress):
+                await progress_msg.edit(content=f":bar_chart: **Working...** {progress * 100:3.2f}% done.")
 
-                masteries.append((summoner_data['name'], summ.region, mastery_score))
+            await self.refresh_snapshot(ctx.guild.id, champion_id, report_progress)
+            await progress_msg.delete()
+            summoners = await objects.execute(Summoner.raw(
+                LATEST_SNAPSHOTS_QUERY,
+                datetime.utcnow() - timedelta(days=7), champion_id, ctx.guild.id
+            ))
 
-            with io.StringIO(TABLE_HEADER) as result:
-                result.seek(len(TABLE_HEADER))
-                for idx, (name, region, score) in enumerate(sorted(masteries, key=itemgetter(2), reverse=True)):
-                    result.write(f"{idx + 1} | {name} | {region} | {score:,}\n")
+        failed = 0
+        with io.StringIO(TABLE_HEADER) as result:
+            result.seek(len(TABLE_HEADER))
+            ranked = sorted(
+                summoners,
+                key=lambda summoner: summoner.points if summoner.points is not None else -1,
+                reverse=True
+            )
+            for idx, summoner in enumerate(ranked):
+                if summoner.points is None:
+                    failed += 1
+                name = summoner.name if summoner.name is not None else "*(unknown name)*"
+                score = f"{summoner.points:,}" if summoner.points is not None else "*(failed to load)*"
+                gained = f"{summoner.weekly_gain:,}" if summoner.weekly_gain is not None else "-"
+                result.write(f"{idx + 1} | {name} | {summoner.region} | {score} | {gained}\n")
+
+            last_fetched = max((s.fetched_at for s in summoners if s.fetched_at is not None), default=None)
+            as_of_note = f" Mastery data as of {last_fetched:%d.%m.%y %H:%M} UTC." if last_fetched else ""
+            failed_note = f" Failed to load data for {failed} entries." if failed else ""
+            with io.BytesIO(bytes(result.getvalue(), encoding='utf-8')) as raw_result:
+                await ctx.send(f"Done. Total entries: {len(summoners)}.{as_of_note}{failed_note}",
+                               file=discord.File(raw_result, filename="table.md"))
+
+    @league.command(name="cachestats")
+    @commands.is_owner()
+    async def cache_stats(self, ctx):
+        """
+        Shows the hit ratio of the League API response cache.
+        """
 
-                with io.BytesIO(bytes(result.getvalue(), encoding='utf-8')) as raw_result:
-                    await progress_msg.delete()
-                    await ctx.send(f"Done. Total entries: {len(masteries)}.",
-                                   file=discord.File(raw_result, filename="table.md"))
+        cache = self.league_client.cache
+        stats = cache.stats()
+        response = discord.Embed(
+            title="League API response cache",
+            description=(f"`{len(cache)}` / `{cache.size}` entries, "
+                         f"overall hit ratio: `{cache.hit_ratio:.1%}`"),
+            colour=discord.Colour.blue()
+        )
+        for method, (hits, misses) in sorted(stats.items()):
+            response.add_field(
+                name=method,
+                value=f"`{hits}` hits, `{misses}` misses ({hits / (hits + misses):.1%})"
+            )
+        await ctx.send(embed=response)
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 import peewee
 
 from bolt.database import Model
@@ -20,3 +22,23 @@ class PermittedRole(Model):
 
     class Meta:
         primary_key = peewee.CompositeKey('id', 'guild_id')
+
+
+class MasterySnapshot(Model):
+    summoner_id = peewee.BigIntegerField()
+    champion_id = peewee.IntegerField()
+    points = peewee.IntegerField()
+    fetched_at = peewee.DateTimeField(default=datetime.utcnow)
+
+    class Meta:
+        indexes = (
+            (('summoner_id', 'champion_id', 'fetched_at'), False),
+        )
+
+
+class SummonerProfile(Model):
+    id = peewee.BigIntegerField(primary_key=True)
+    region = peewee.FixedCharField(4)
+    name = peewee.CharField(max_length=32)
+    puuid = peewee.CharField(max_length=78, null=True)
+    fetched_at = peewee.DateTimeField(default=datetime.utcnow)
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Union
+
+import peewee_async
+from peewee import JOIN, fn
+
+from bolt.database import database, objects
+from .api import LeagueAPIClient
+from .models import Summoner, SummonerProfile
+
+
+log = logging.getLogger(__name__)
+
+# How long a cached summoner profile is considered fresh. Stale
+# profiles are still served, but refreshed in the background.
+PROFILE_TTL = timedelta(days=1)
+
+# How often, in seconds, stale profiles are refreshed in the
+# background, and how many of them are refreshed at once.
+PROFILE_REFRESH_INTERVAL = 10 * 60
+PROFILE_REFRESH_BATCH_SIZE = 50
+
+# Formatted with the parameter placeholder of the database in use.
+UPSERT_PROFILE_QUERY = """
+    INSERT INTO summonerprofile (id, region, name, puuid, fetched_at)
+    VALUES ({0}, {0}, {0}, {0}, {0})
+    ON CONFLICT (id) DO UPDATE
+    SET region = EXCLUDED.region, name = EXCLUDED.name,
+        puuid = EXCLUDED.puuid, fetched_at = EXCLUDED.fetched_at
+"""
+
+
+class SummonerProfileCache:
+    """
+    A read-through cache of summoner identities, backed by the database
+    so that names and IDs survive restarts without any API requests.
+    """
+
+    def __init__(self, client: LeagueAPIClient):
+        self.client = client
+
+    async def store(self, region: str, summoner_data: dict) -> SummonerProfile:
+        """
+        Insert or update the profile of a summoner from its API response.
+
+        Args:
+            region (str):
+                The region of the summoner.
+            summoner_data (dict):
+                The summoner as returned by the API.
+
+        Returns:
+            SummonerProfile:
+                The stored profile.
+        """
+
+        profile = SummonerProfile(
+            id=summoner_data['id'],
+            region=region,
+            name=summoner_data['name'],
+            puuid=summoner_data.get('puuid'),
+            fetched_at=datetime.utcnow()
+        )
+        query = UPSERT_PROFILE_QUERY.format(database.interpolation)
+        # Raw queries are expected to return rows, which Postgres only does with `RETURNING`.
+        if database.supports_returning:
+            query += "RETURNING id"
+        await objects.execute(SummonerProfile.raw(
+            query,
+            profile.id, profile.region, profile.name, profile.puuid, profile.fetched_at
+        ))
+        return profile
+
+    async def get(self, region: str, identifier: Union[str, int]) -> Optional[SummonerProfile]:
+        """
+        Look up a summoner by name or ID, querying the API only
+        if no fresh profile for it is cached in the database.
+
+        Args:
+            region (str):
+                The region of the summoner.
+            identifier (Union[str, int]):
+                The name or ID of the summoner.
+
+        Returns:
+            Optional[SummonerProfile]:
+                The summoner's profile, or `None` if no such summoner exists.
+        """
+
+        profile = await self.get_cached(region, identifier)
+        if profile is not None and profile.fetched_at >= datetime.utcnow() - PROFILE_TTL:
+            return profile
+
+        summoner_data = await self.client.get_summoner(region, identifier)
+        if summoner_data is None:
+            return None
+        return await self.store(region, summoner_data)
+
+    async def get_cached(self, region: str, identifier: Union[str, int]) -> Optional[SummonerProfile]:
+        """
+        Look up a summoner by name or ID in the database only, regardless of how old its profile is.
+
+        Args:
+            region (str):
+                The region of the summoner.
+            identifier (Union[str, int]):
+                The name or ID of the summoner.
+
+        Returns:
+            Optional[SummonerProfile]:
+                The cached profile, or `None` if the summoner is not cached.
+        """
+
+        if isinstance(identifier, str):
+            condition = fn.lower(SummonerProfile.name) == identifier.lower()
+        else:
+            condition = SummonerProfile.id == identifier
+
+        profiles = await peewee_async.execute(
+            SummonerProfile.select()
+                           .where(SummonerProfile.region == region, condition)
+                           .order_by(SummonerProfile.fetched_at.desc())
+                           .limit(1)
+        )
+        return profiles[0] if profiles else None
+
+    async def refresh_stale(self) -> int:
+        """
+        Refresh a batch of tracked summoners whose profile is stale or missing.
+
+        Returns:
+            int:
+                The amount of profiles that were refreshed.
+        """
+
+        stale_summoners = await peewee_async.execute(
+            Summoner.select(Summoner.id, Summoner.region)
+                    .join(SummonerProfile, JOIN.LEFT_OUTER, on=(SummonerProfile.id == Summoner.id))
+                    .where(SummonerProfile.id.is_null() |
+                           (SummonerProfile.fetched_at < datetime.utcnow() - PROFILE_TTL))
+                    .order_by(SummonerProfile.id.is_null(False), SummonerProfile.fetched_at)
+                    .limit(PROFILE_REFRESH_BATCH_SIZE)
+        )
+
+        results = await asyncio.gather(
+            *(self.client.get_summoner(summoner.region, summoner.id) for summoner in stale_summoners),
+            return_exceptions=True
+        )
+
+        refreshed = 0
+        for summoner, summoner_data in zip(stale_summoners, results):
+            if isinstance(summoner_data, Exception):
+                log.warning(f"Failed to refresh summoner {summoner.id} ({summoner.region}): {summoner_data}")
+            elif summoner_data is not None:
+                await self.store(summoner.region, summoner_data)
+                refreshed += 1
+        return refreshed
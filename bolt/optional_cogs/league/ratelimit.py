@@ -0,0 +1,219 @@
+import asyncio
+import collections
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+# The limits of a development API key, used until
+# the API tells us about the actual limits of our key.
+DEFAULT_APP_LIMITS = "20:1,100:120"
+
+
+def parse_limits(header: Optional[str]) -> List[Tuple[int, int]]:
+    """
+    Parse a Riot rate limit header into its limit windows.
+
+    Both the limit headers (`X-App-Rate-Limit`) and the count headers
+    (`X-App-Rate-Limit-Count`) use the format `amount:seconds,...`.
+
+    Args:
+        header (Optional[str]):
+            The header value, for example `20:1,100:120`.
+
+    Returns:
+        List[Tuple[int, int]]:
+            A list of `(amount, seconds)` pairs, empty if the header was not set.
+    """
+
+    if not header:
+        return []
+
+    windows = []
+    for window in header.split(','):
+        amount, _, seconds = window.partition(':')
+        try:
+            windows.append((int(amount), int(seconds)))
+        except ValueError:
+            continue
+    return windows
+
+
+class TokenBucket:
+    """
+    A bucket holding `limit` tokens which is refilled completely `period`
+    seconds after the first token was taken, mirroring the fixed windows
+    that the Riot API uses to count requests.
+    """
+
+    def __init__(self, limit: int, period: int):
+        self.limit = limit
+        self.period = period
+        self.used = 0
+        self.reset_at = None
+
+    def _refill(self, now: float):
+        if self.reset_at is not None and now >= self.reset_at:
+            self.used = 0
+            self.reset_at = None
+
+    def delay(self, now: float) -> float:
+        """Return the amount of seconds until a token is available."""
+
+        self._refill(now)
+        if self.used < self.limit:
+            return 0
+        return self.reset_at - now
+
+    def take(self, now: float):
+        self._refill(now)
+        if self.reset_at is None:
+            self.reset_at = now + self.period
+        self.used += 1
+
+    def sync(self, count: int, now: float):
+        """Update the amount of used tokens with the count reported by the API."""
+
+        self._refill(now)
+        if count > self.used:
+            if self.reset_at is None:
+                self.reset_at = now + self.period
+            self.used = count
+
+
+class RateLimit:
+    """A set of token buckets that all need to allow a request for it to be sent."""
+
+    def __init__(self, limits: str = None):
+        self.buckets: Dict[int, TokenBucket] = {}
+        self.blocked_until = 0
+        self.update(limits, None, time.monotonic())
+
+    def delay(self, now: float) -> float:
+        return max(
+            self.blocked_until - now,
+            max((bucket.delay(now) for bucket in self.buckets.values()), default=0)
+        )
+
+    def take(self, now: float):
+        for bucket in self.buckets.values():
+            bucket.take(now)
+
+    def update(self, limits: Optional[str], counts: Optional[str], now: float):
+        """
+        Synchronize the buckets with the rate limit headers of a response.
+
+        Args:
+            limits (Optional[str]):
+                The value of the limit header, such as `X-App-Rate-Limit`.
+            counts (Optional[str]):
+                The value of the count header, such as `X-App-Rate-Limit-Count`.
+            now (float):
+                The current monotonic time.
+        """
+
+        windows = parse_limits(limits)
+        if windows and {period: limit for limit, period in windows} != {
+            period: bucket.limit for period, bucket in self.buckets.items()
+        }:
+            old_buckets = self.buckets
+            self.buckets = {}
+            for limit, period in windows:
+                bucket = TokenBucket(limit, period)
+                previous = old_buckets.get(period)
+                if previous is not None:
+                    bucket.used, bucket.reset_at = previous.used, previous.reset_at
+                self.buckets[period] = bucket
+
+        for count, period in parse_limits(counts):
+            bucket = self.buckets.get(period)
+            if bucket is not None:
+                bucket.sync(count, now)
+
+    def block(self, seconds: float, now: float):
+        """Hold back all requests for the given amount of seconds."""
+
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class RiotRateLimiter:
+    """
+    Keeps track of the application rate limit of every region as
+    well as the method rate limits of every endpoint in every region.
+
+    Requests waiting for the same region and method are queued in
+    the order they arrived, since `asyncio.Lock` wakes up its waiters
+    in FIFO order.
+    """
+
+    def __init__(self):
+        self.app_limits = collections.defaultdict(lambda: RateLimit(DEFAULT_APP_LIMITS))
+        self.method_limits = collections.defaultdict(RateLimit)
+        self._queues = collections.defaultdict(asyncio.Lock)
+
+    async def acquire(self, region: str, method: str):
+        """
+        Wait until a request to the given method in the given region may be sent.
+
+        Args:
+            region (str):
+                The region the request is sent to.
+            method (str):
+                The name of the endpoint method the request is sent to.
+        """
+
+        app_limit = self.app_limits[region]
+        method_limit = self.method_limits[(region, method)]
+        async with self._queues[(region, method)]:
+            while True:
+                now = time.monotonic()
+                delay = max(app_limit.delay(now), method_limit.delay(now))
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+
+            app_limit.take(now)
+            method_limit.take(now)
+
+    def update(self, region: str, method: str, headers):
+        """
+        Synchronize the limits for the given region and method with the headers of a response.
+
+        Args:
+            region (str):
+                The region the request was sent to.
+            method (str):
+                The name of the endpoint method the request was sent to.
+            headers:
+                The headers of the response.
+        """
+
+        now = time.monotonic()
+        self.app_limits[region].update(
+            headers.get('X-App-Rate-Limit'), headers.get('X-App-Rate-Limit-Count'), now
+        )
+        self.method_limits[(region, method)].update(
+            headers.get('X-Method-Rate-Limit'), headers.get('X-Method-Rate-Limit-Count'), now
+        )
+
+    def block(self, region: str, method: str, headers):
+        """
+        Hold back further requests after receiving a 429 response.
+
+        Args:
+            region (str):
+                The region the request was sent to.
+            method (str):
+                The name of the endpoint method the request was sent to.
+            headers:
+                The headers of the 429 response.
+        """
+
+        now = time.monotonic()
+        retry_after = float(headers.get('Retry-After', 1))
+        limit_type = headers.get('X-Rate-Limit-Type')
+        if limit_type == 'application':
+            self.app_limits[region].block(retry_after, now)
+        else:
+            # Either the method limit was hit, or the underlying service
+            # is rate limiting us. Either way, only this method is affected.
+            self.method_limits[(region, method)].block(retry_after, now)
@@ -1,5 +1,6 @@
 from asyncio import TimeoutError
-from typing import List
+from math import ceil
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
 
 from discord import Embed
 from discord.ext.commands import Context
@@ -20,14 +21,21 @@ class LinePaginator:
         )
         self.embed = embed
 
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    async def get_page(self, index: int) -> str:
+        return self.pages[index]
+
     async def send(self, timeout: int = 60 * 5):
-        if len(self.pages) == 1:
+        if self.page_count == 1:
             # No need to paginate. We're done here.
-            self.embed.description = self.pages[0]
+            self.embed.description = await self.get_page(0)
             return await self.ctx.send(embed=self.embed)
 
-        self.embed.set_footer(text=f"Page 1 / {len(self.pages)}")
-        self.embed.description = self.pages[0]
+        self.embed.description = await self.get_page(0)
+        self.embed.set_footer(text=f"Page 1 / {self.page_count}")
         message = await self.ctx.send(embed=self.embed)
         for reaction in VALID_REACTIONS:
             await message.add_reaction(reaction)
@@ -51,16 +59,66 @@ class LinePaginator:
             else:
                 if str(reaction) == MOVE_LEFT_REACTION and current_index != 0:
                     current_index -= 1
-                    self.embed.description = self.pages[current_index]
-                    self.embed.set_footer(text=f"Page {current_index + 1} / {len(self.pages)}")
+                    self.embed.description = await self.get_page(current_index)
+                    self.embed.set_footer(text=f"Page {current_index + 1} / {self.page_count}")
                     await message.remove_reaction(MOVE_LEFT_REACTION, author)
                     await message.edit(embed=self.embed)
-                elif str(reaction) == MOVE_RIGHT_REACTION and current_index != len(self.pages) - 1:
+                elif str(reaction) == MOVE_RIGHT_REACTION and current_index != self.page_count - 1:
                     current_index += 1
-                    self.embed.description = self.pages[current_index]
-                    self.embed.set_footer(text=f"Page {current_index + 1} / {len(self.pages)}")
+                    self.embed.description = await self.get_page(current_index)
+                    # Lazily fetched pages may turn out to no longer exist.
+                    current_index = min(current_index, self.page_count - 1)
+                    self.embed.set_footer(text=f"Page {current_index + 1} / {self.page_count}")
                     await message.remove_reaction(MOVE_RIGHT_REACTION, author)
                     await message.edit(embed=self.embed)
                 elif str(reaction) == DELETE_REACTION:
                     await message.delete()
                     break
+
+
+class KeysetPaginator(LinePaginator):
+    """
+    A paginator that fetches its pages lazily instead of
+    requiring all lines to be loaded up front.
+
+    `fetch_page` is called with the key of the last line on the
+    previous page (or `None` for the first page) and the amount of
+    lines per page. It should return the lines for the page along
+    with the key of its last line. Pages that were already fetched
+    are kept around, so moving back does not cause another fetch.
+    If a page turns out to be empty, for example because lines were
+    deleted since counting them, the previous page becomes the last.
+    """
+
+    def __init__(
+        self,
+        ctx: Context,
+        fetch_page: Callable[[Optional[Any], int], Awaitable[Tuple[List[str], Any]]],
+        total_lines: int,
+        lines_per_page: int,
+        embed: Embed
+    ):
+        self.ctx = ctx
+        self.fetch_page = fetch_page
+        self.lines_per_page = lines_per_page
+        self.total_pages = max(1, ceil(total_lines / lines_per_page))
+        self.pages = []
+        self.last_key = None
+        self.embed = embed
+
+    @property
+    def page_count(self) -> int:
+        return self.total_pages
+
+    async def get_page(self, index: int) -> str:
+        while len(self.pages) <= index:
+            lines, last_key = await self.fetch_page(self.last_key, self.lines_per_page)
+            if not lines:
+                self.total_pages = max(1, len(self.pages))
+                if not self.pages:
+                    self.pages.append('')
+                return self.pages[-1]
+
+            self.last_key = last_key
+            self.pages.append('\n'.join(lines))
+        return self.pages[index]
@@ -0,0 +1,77 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Any
+
+
+# Keys whose string values may contain personal information and are replaced
+# with a placeholder of the same length, which keeps payload sizes realistic.
+SCRUBBED_KEYS = frozenset((
+    'content', 'username', 'nick', 'avatar', 'email', 'name', 'topic',
+    'description', 'url', 'proxy_url', 'icon', 'icon_url', 'banner', 'splash',
+    'title', 'value', 'text', 'filename', 'token', 'session_id', 'ip', 'discriminator'
+))
+
+# Mask for the bits of a snowflake that do not hold its creation time.
+SNOWFLAKE_LOW_BITS = (1 << 22) - 1
+
+
+class GatewayRecorder:
+    """
+    Records received gateway events with personal information scrubbed.
+
+    Every line of the output is a compact JSON object holding the seconds
+    since the recording started (`t`), the event type (`e`) and the scrubbed
+    event data (`d`). Paths ending in `.gz` are written gzip-compressed.
+
+    Snowflake IDs are remapped consistently within a recording. The creation
+    time encoded in them is kept, since discord.py derives timestamps from it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.monotonic()
+        self._salt = os.urandom(16)
+        opener = gzip.open if path.endswith('.gz') else open
+        self._file = opener(path, 'wt', encoding='utf-8')
+
+    def remap_id(self, snowflake: str) -> str:
+        digest = hashlib.blake2b(snowflake.encode(), key=self._salt, digest_size=8).digest()
+        return str((int(snowflake) & ~SNOWFLAKE_LOW_BITS) | (int.from_bytes(digest, 'big') & SNOWFLAKE_LOW_BITS))
+
+    def scrub(self, value: Any, key: str = None) -> Any:
+        if isinstance(value, dict):
+            return {k: self.scrub(v, k) for k, v in value.items()}
+        elif isinstance(value, list):
+            return [self.scrub(item, key) for item in value]
+        elif isinstance(value, str):
+            if value.isdigit() and len(value) >= 15:
+                return self.remap_id(value)
+            elif key in SCRUBBED_KEYS:
+                return 'x' * len(value)
+        return value
+
+    def record(self, payload: dict):
+        """
+        Record a gateway payload, if it is a dispatched event.
+
+        Args:
+            payload (dict):
+                The payload as received from the gateway.
+        """
+
+        event_type = payload.get('t')
+        if event_type is None:
+            return
+
+        self._file.write(json.dumps({
+            't': round(time.monotonic() - self.started, 4),
+            'e': event_type,
+            'd': self.scrub(payload.get('d'))
+        }, separators=(',', ':')))
+        self._file.write('\n')
+
+    def close(self):
+        self._file.close()
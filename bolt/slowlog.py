@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from bolt import metrics
+from bolt.watchdog import describe_task
+
+
+log = logging.getLogger(__name__)
+
+# Queries taking longer than this are written to the slow query log.
+SLOW_QUERY_THRESHOLD = float(os.environ.get('BOLT_SLOW_QUERY_MS', 100)) / 1000
+SLOW_QUERY_LOG_PATH = os.environ.get('BOLT_SLOW_QUERY_LOG', 'slow_queries.log')
+
+# Whether to capture the plan for the first occurrence of every slow query.
+EXPLAIN_SLOW_QUERIES = os.environ.get('BOLT_EXPLAIN_SLOW_QUERIES') == '1'
+
+MAX_LOG_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Matches lists of placeholders, such as those created by `IN` clauses
+# or multi-row inserts, whose length depends on the parameters.
+PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)(?:\s*,\s*\(\s*%s(?:\s*,\s*%s)*\s*\))*')
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Calculate a fingerprint that is equal for all executions of the same query.
+
+    Args:
+        sql (str):
+            The parametrized SQL of the query.
+
+    Returns:
+        str:
+            A short hash of the normalized query.
+    """
+
+    normalized = PLACEHOLDER_LIST.sub('(...)', ' '.join(sql.split()))
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+class SlowQueryLog:
+    """
+    Writes queries exceeding the threshold as JSON lines to a rotating file,
+    along with the command or event that ran them. If enabled, the plan of
+    the first occurrence of every slow query is captured with `EXPLAIN`.
+    """
+
+    def __init__(self, path: str = SLOW_QUERY_LOG_PATH, threshold: float = SLOW_QUERY_THRESHOLD,
+                 explain: bool = EXPLAIN_SLOW_QUERIES):
+        self.path = path
+        self.threshold = threshold
+        self.explain = explain
+        self._explained = set()
+        self._logger = None
+
+    def write(self, entry: dict):
+        if self._logger is None:
+            handler = RotatingFileHandler(self.path, maxBytes=MAX_LOG_BYTES, backupCount=LOG_BACKUP_COUNT)
+            self._logger = logging.getLogger('bolt.slow_queries')
+            self._logger.addHandler(handler)
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+        self._logger.info(json.dumps(entry, default=str))
+
+    def record(self, sql: str, params: Optional[Sequence], elapsed: float,
+               run_explain: Callable[[str, Optional[Sequence]], Awaitable[List[str]]]):
+        """
+        Record an executed query if it exceeded the threshold.
+
+        Args:
+            sql (str):
+                The parametrized SQL of the query.
+            params (Optional[Sequence]):
+                The parameters the query was executed with.
+            elapsed (float):
+                How long the query took, in seconds.
+            run_explain (Callable[[str, Optional[Sequence]], Awaitable[List[str]]]):
+                A coroutine function returning the plan for the given query.
+        """
+
+        if elapsed < self.threshold:
+            return
+
+        query_fingerprint = fingerprint(sql)
+        self.write({
+            'time': datetime.utcnow().isoformat(),
+            'fingerprint': query_fingerprint,
+            'duration_ms': round(elapsed * 1000, 2),
+            'source': describe_task(metrics.current_task()),
+            'sql': sql,
+            'params': params
+        })
+
+        if self.explain and query_fingerprint not in self._explained:
+            self._explained.add(query_fingerprint)
+            asyncio.ensure_future(self.capture_plan(query_fingerprint, sql, params, run_explain))
+
+    async def capture_plan(self, query_fingerprint: str, sql: str, params: Optional[Sequence],
+                           run_explain: Callable[[str, Optional[Sequence]], Awaitable[List[str]]]):
+        try:
+            plan = await run_explain(sql, params)
+        except Exception as e:
+            log.warning(f"Failed to explain slow query {query_fingerprint}: {e}")
+        else:
+            self.write({'time': datetime.utcnow().isoformat(), 'fingerprint': query_fingerprint, 'plan': plan})
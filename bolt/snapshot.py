@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import random
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import peewee
+
+from bolt.database import Model, objects
+
+
+log = logging.getLogger(__name__)
+
+# Set `BOLT_CACHE_SNAPSHOT` to an empty string to disable the snapshot.
+SNAPSHOT_PATH = os.environ.get('BOLT_CACHE_SNAPSHOT', 'cache_snapshot.json')
+
+# Bump this whenever the format of a cache section changes,
+# so that snapshots written by older versions are ignored.
+SNAPSHOT_FORMAT = 1
+
+# Dumps a cache into a JSON-serializable mapping of guild IDs to entries.
+CacheDumper = Callable[[], Dict[int, Any]]
+# Loads a mapping of guild IDs to entries, as returned by the dumper, into a cache.
+CacheLoader = Callable[[Dict[int, Any]], None]
+
+_caches: Dict[str, Tuple[CacheDumper, CacheLoader]] = {}
+# Restored entries of caches that have not been registered yet.
+_restored: Dict[str, Dict[int, Any]] = {}
+# The cache versions of all guilds as known by this process, or `None` if they could not be queried.
+_versions: Optional[Dict[int, int]] = None
+
+
+class GuildCacheVersion(Model):
+    """
+    Changes whenever cached configuration of a guild is modified, so
+    that snapshot entries written before the modification are discarded.
+
+    Versions are random instead of incremented, so that they can
+    be set without reading them first and never repeat.
+    """
+
+    guild_id = peewee.BigIntegerField(primary_key=True)
+    version = peewee.BigIntegerField()
+
+
+def register_cache(name: str, dump: CacheDumper, load: CacheLoader):
+    """
+    Register a cache to be written to the snapshot on shutdown.
+
+    If the cache has restored entries pending, they are loaded into it right away.
+
+    Args:
+        name (str):
+            The name of the cache section in the snapshot.
+        dump (CacheDumper):
+            A function returning the cache contents as a mapping of guild IDs to
+            JSON-serializable entries. Entries of different guilds must be independent.
+        load (CacheLoader):
+            A function loading such a mapping back into the cache.
+    """
+
+    _caches[name] = (dump, load)
+    entries = _restored.pop(name, None)
+    if entries:
+        load(entries)
+        log.debug(f"Restored {len(entries)} entries of the {name} cache.")
+
+
+def unregister_cache(name: str):
+    _caches.pop(name, None)
+
+
+async def bump_version(guild_id: int):
+    """
+    Mark the cached configuration of the given guild as modified.
+
+    Must be called after every modification of a table whose
+    rows are cached, so that no process restores stale entries.
+
+    Args:
+        guild_id (int):
+            The guild whose configuration was modified.
+    """
+
+    version = random.getrandbits(62)
+    updated = await objects.execute(
+        GuildCacheVersion.update(version=version)
+                         .where(GuildCacheVersion.guild_id == guild_id)
+    )
+    if not updated:
+        row, created = await objects.get_or_create(
+            GuildCacheVersion,
+            guild_id=guild_id,
+            defaults={'version': version}
+        )
+        if not created:
+            row.version = version
+            await objects.update(row, only=['version'])
+
+    if _versions is not None:
+        _versions[guild_id] = version
+
+
+async def restore(path: str = SNAPSHOT_PATH):
+    """
+    Restore the snapshot at the given path into the registered caches, along
+    with caches registered later, discarding entries of guilds that changed.
+
+    Args:
+        path (str):
+            The path of the snapshot file.
+    """
+
+    global _versions
+
+    try:
+        rows = await objects.execute(GuildCacheVersion.select())
+    except Exception:
+        log.exception("Could not query the cache versions, not restoring or writing a cache snapshot.")
+        return
+    _versions = {row.guild_id: row.version for row in rows}
+
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as err:
+        log.warning(f"Could not read the cache snapshot at `{path}`: {err}.")
+        return
+
+    if snapshot.get('format') != SNAPSHOT_FORMAT:
+        log.info(f"Ignoring cache snapshot with outdated format {snapshot.get('format')}.")
+        return
+
+    snapshot_versions = snapshot['versions']
+    restored = discarded = 0
+    for name, entries in snapshot['caches'].items():
+        valid_entries = {}
+        for guild_id, entry in entries.items():
+            if snapshot_versions.get(guild_id) == _versions.get(int(guild_id)):
+                valid_entries[int(guild_id)] = entry
+            else:
+                discarded += 1
+        restored += len(valid_entries)
+
+        if name in _caches:
+            _caches[name][1](valid_entries)
+        else:
+            _restored[name] = valid_entries
+
+    log.info(f"Restored {restored} cache entries from the snapshot, discarded {discarded} stale ones.")
+
+
+def clear_restored():
+    """Drop restored entries that no cache was registered for, which become stale over time."""
+
+    _restored.clear()
+
+
+def save(path: str = SNAPSHOT_PATH):
+    """
+    Write the contents of all registered caches to a snapshot.
+
+    Args:
+        path (str):
+            The path of the snapshot file.
+    """
+
+    if _versions is None:
+        log.debug("Not writing a cache snapshot, since the cache versions are unknown.")
+        return
+
+    snapshot = {
+        'format': SNAPSHOT_FORMAT,
+        'versions': _versions,
+        'caches': {name: dump() for name, (dump, _) in _caches.items()}
+    }
+
+    # Write to a temporary file first, so that a crash cannot leave a partial snapshot behind.
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(temporary_path, path)
+    log.info(f"Wrote cache snapshot to `{path}`.")
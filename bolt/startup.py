@@ -0,0 +1,126 @@
+import importlib.abc
+import importlib.util
+import sys
+import time
+import types
+from typing import Dict, List, Tuple
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Import a module when one of its attributes is first accessed.
+
+    Heavy dependencies that are only used by some commands are imported
+    this way, so that they do not slow down starting the bot.
+
+    Args:
+        name (str):
+            The absolute name of the module to import.
+
+    Returns:
+        types.ModuleType:
+            The module, which is executed on first attribute access.
+    """
+
+    try:
+        return sys.modules[name]
+    except KeyError:
+        pass
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class _TimedLoader:
+    """Wraps the loader of a module to report its execution time to an `ImportProfiler`."""
+
+    def __init__(self, loader, profiler: 'ImportProfiler'):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: types.ModuleType):
+        self._profiler.enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.exit()
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """
+    Measures how long every module imported while it is running takes to execute.
+
+    The cumulative time of a module includes the modules it imports,
+    while its own time only covers the code of the module itself.
+    """
+
+    def __init__(self):
+        # Maps module names to their own and cumulative import time in seconds.
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        # The modules currently being executed, with their start times and the time spent importing others.
+        self._stack: List[List] = []
+
+    def start(self):
+        sys.meta_path.insert(0, self)
+
+    def stop(self):
+        sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        # Namespace packages have no code to execute.
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, started, children = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.timings[name] = (elapsed - children, elapsed)
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def slowest(self, limit: int = 25) -> List[Tuple[str, float, float]]:
+        """
+        Return the modules that took the longest to import.
+
+        Args:
+            limit (int):
+                The maximum amount of modules to return.
+
+        Returns:
+            List[Tuple[str, float, float]]:
+                The names of the modules along with their own
+                and cumulative import times, slowest first.
+        """
+
+        return sorted(
+            ((name, own, cumulative) for name, (own, cumulative) in self.timings.items()),
+            key=lambda timing: timing[2],
+            reverse=True
+        )[:limit]
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from bolt import metrics
+
+
+log = logging.getLogger(__name__)
+
+# How often, in seconds, the event loop reports that it is alive.
+HEARTBEAT_INTERVAL = 0.25
+
+# If the loop misses its heartbeat by this many seconds,
+# the stack of the code blocking it is logged.
+LAG_THRESHOLD = 0.5
+
+# The minimum amount of seconds between two logged stacks.
+REPORT_INTERVAL = 60
+
+
+def describe_task(task: Optional[asyncio.Task]) -> str:
+    """
+    Describe what the given task is doing, for use in log messages.
+
+    Args:
+        task (Optional[asyncio.Task]):
+            The task to describe.
+
+    Returns:
+        str:
+            The command or event the task is running, or the name of its coroutine.
+    """
+
+    if task is None:
+        return "a callback outside of any task"
+
+    invocation = metrics.current_invocation(task)
+    if invocation is not None:
+        return f"command `{invocation.name}`"
+
+    coro = getattr(task, '_coro', None)
+    frame = getattr(coro, 'cr_frame', None)
+    if frame is not None and 'event_name' in frame.f_locals:
+        return f"event `{frame.f_locals['event_name']}`"
+    return f"task `{getattr(coro, '__qualname__', task)}`"
+
+
+class LoopWatchdog:
+    """
+    Measures the scheduling lag of the event loop with a heartbeat task.
+
+    A helper thread watches the heartbeat. If it stops for longer than
+    `LAG_THRESHOLD` seconds, the thread captures the stack of the event
+    loop thread, which shows the code that is blocking the loop, and logs it
+    along with the command or event that was running.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.lag = 0.0
+        self._last_beat = time.monotonic()
+        self._loop_thread_id = None
+        self._stopped = threading.Event()
+        self._heartbeat_task = None
+        self._last_report = 0.0
+        self._suppressed = 0
+        self._reported_stall = False
+
+    def start(self):
+        """Start watching the event loop. Must be called from within the event loop."""
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = self.loop.create_task(self.heartbeat())
+        threading.Thread(target=self.watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+
+    async def heartbeat(self):
+        while True:
+            try:
+                scheduled = time.monotonic() + HEARTBEAT_INTERVAL
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+                self._last_beat = time.monotonic()
+                self.lag = max(0.0, self._last_beat - scheduled)
+                metrics.observe('event_loop_lag', self.lag)
+            except asyncio.CancelledError:
+                break
+
+    def watch(self):
+        while not self._stopped.wait(HEARTBEAT_INTERVAL):
+            stalled_for = time.monotonic() - self._last_beat - HEARTBEAT_INTERVAL
+            if stalled_for < LAG_THRESHOLD:
+                self._reported_stall = False
+                continue
+            elif self._reported_stall:
+                continue
+
+            # Only capture every stall once, while it is still happening.
+            self._reported_stall = True
+            now = time.monotonic()
+            if now - self._last_report < REPORT_INTERVAL:
+                self._suppressed += 1
+                continue
+
+            self.report(stalled_for)
+            self._last_report = now
+            self._suppressed = 0
+
+    def report(self, stalled_for: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = ''.join(traceback.format_stack(frame)) if frame is not None else "(stack unavailable)\n"
+        running = describe_task(metrics.current_task(self.loop))
+        suppressed = f" ({self._suppressed} similar reports suppressed)" if self._suppressed else ""
+        log.warning(f"Event loop blocked for {stalled_for:.2f}s by {running}{suppressed}:\n{stack}")
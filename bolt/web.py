@@ -0,0 +1,85 @@
+import asyncio
+import collections
+import logging
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+from bolt import metrics
+
+
+log = logging.getLogger(__name__)
+
+# Connection pool limits for all outbound HTTP requests
+# combined, and for every single host respectively.
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 20
+
+# How long, in seconds, DNS lookups are cached and idle connections are kept open.
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+
+# The maximum time, in seconds, a single request may take in total.
+REQUEST_TIMEOUT = 30
+
+# Requests taking longer than this many seconds are logged as a warning.
+SLOW_REQUEST_SECONDS = 5
+
+
+class WebClient:
+    """
+    Owns the HTTP session that is shared by all cogs for outbound requests,
+    so that connections are pooled and kept alive across features.
+
+    The session is created lazily on first use, which ensures that it is
+    created from within a coroutine running on the bot's event loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.request_stats: Dict[str, Tuple[int, float]] = collections.defaultdict(lambda: (0, 0.0))
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(self._on_request_start)
+            trace_config.on_request_end.append(self._on_request_end)
+
+            self._session = aiohttp.ClientSession(
+                loop=self.loop,
+                connector=aiohttp.TCPConnector(
+                    loop=self.loop,
+                    limit=CONNECTION_LIMIT,
+                    limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                    ttl_dns_cache=DNS_CACHE_TTL,
+                    keepalive_timeout=KEEPALIVE_TIMEOUT
+                ),
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                trace_configs=[trace_config]
+            )
+        return self._session
+
+    async def _on_request_start(self, _session, context: SimpleNamespace, _params):
+        context.started = self.loop.time()
+        metrics.record_rest_call()
+
+    async def _on_request_end(self, _session, context: SimpleNamespace, params):
+        elapsed = self.loop.time() - context.started
+        host = params.url.host
+        count, total = self.request_stats[host]
+        self.request_stats[host] = (count + 1, total + elapsed)
+
+        if elapsed >= SLOW_REQUEST_SECONDS:
+            log.warning(f"{params.method} {params.url} took {elapsed:.2f}s ({params.response.status}).")
+        else:
+            log.debug(f"{params.method} {params.url} took {elapsed:.2f}s ({params.response.status}).")
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        # Give the connector a moment to close SSL connections cleanly,
+        # as recommended by the aiohttp documentation.
+        await asyncio.sleep(0.250)
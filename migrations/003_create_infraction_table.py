@@ -36,10 +36,27 @@ class Infraction(pw.Model):
     reason = pw.CharField(max_length=250)
 
 
+# SQLite triggers cannot assign to `NEW`, so the timestamp is set by a second update,
+# which does not fire the trigger again since recursive triggers are disabled by default.
+SQLITE_EDITED_ON_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS update_edited_timestamp_trigger AFTER UPDATE ON infraction
+    FOR EACH ROW WHEN NEW.guild_id IS NOT OLD.guild_id OR NEW.type IS NOT OLD.type
+                   OR NEW.user_id IS NOT OLD.user_id OR NEW.moderator_id IS NOT OLD.moderator_id
+                   OR NEW.reason IS NOT OLD.reason
+    BEGIN
+        UPDATE infraction SET edited_on = datetime('now') WHERE id = NEW.id;
+    END;
+"""
+
+
 def migrate(migrator, database, fake=False, **kwargs):
     """Write your migrations here."""
 
     migrator.create_model(Infraction)
+    if isinstance(database, pw.SqliteDatabase):
+        migrator.sql(SQLITE_EDITED_ON_TRIGGER)
+        return
+
     migrator.sql("""
         CREATE FUNCTION update_edited_timestamp() RETURNS TRIGGER AS $$
         BEGIN
@@ -61,6 +78,10 @@ def migrate(migrator, database, fake=False, **kwargs):
 def rollback(migrator, database, fake=False, **kwargs):
     """Write your rollback migrations here."""
 
+    if isinstance(database, pw.SqliteDatabase):
+        migrator.drop_table('infraction')
+        return
+
     migrator.sql("""
         DROP TRIGGER update_edited_timestamp_trigger ON infraction;
     """)
@@ -1,13 +1,25 @@
 """Peewee migrations -- 011_make_edited_on_null_without_edits.py."""
 
+import peewee as pw
+
+
+def restore_sqlite_trigger(migrator, database):
+    # SQLite changes columns by recreating the table, which drops the trigger created in migration 003.
+    trigger = database.execute_sql("SELECT sql FROM sqlite_master WHERE name = 'update_edited_timestamp_trigger'")
+    migrator.sql(trigger.fetchone()[0])
+
 
 def migrate(migrator, database, fake=False, **kwargs):
     """Write your migrations here."""
 
     migrator.drop_not_null('infraction', 'edited_on')
+    if isinstance(database, pw.SqliteDatabase):
+        restore_sqlite_trigger(migrator, database)
 
 
 def rollback(migrator, database, fake=False, **kwargs):
     """Write your rollback migrations here."""
 
     migrator.add_not_null('infraction', 'edited_on')
+    if isinstance(database, pw.SqliteDatabase):
+        restore_sqlite_trigger(migrator, database)
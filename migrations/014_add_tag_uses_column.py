@@ -0,0 +1,17 @@
+"""Peewee migrations -- 014_add_tag_uses_column.py."""
+
+import peewee as pw
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    """Write your migrations here."""
+
+    migrator.add_columns('tag', uses=pw.IntegerField(default=0))
+    migrator.add_index('tag', 'guild_id', 'uses')
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    """Write your rollback migrations here."""
+
+    migrator.drop_index('tag', 'guild_id', 'uses')
+    migrator.drop_columns('tag', 'uses')
@@ -0,0 +1,28 @@
+"""Peewee migrations -- 015_create_tag_title_index.py."""
+
+import peewee as pw
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    """Write your migrations here."""
+
+    if isinstance(database, pw.SqliteDatabase):
+        # SQLite has no "C" collation, but its default collation compares bytes in the same way.
+        migrator.sql("""
+            CREATE INDEX tag_guild_id_lower_title ON tag (guild_id, lower(title));
+        """)
+        return
+
+    # Using the "C" collation allows the index to serve both
+    # ordered scans and `LIKE 'prefix%'` lookups on the title.
+    migrator.sql("""
+        CREATE INDEX tag_guild_id_lower_title ON tag (guild_id, (lower(title) COLLATE "C"));
+    """)
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    """Write your rollback migrations here."""
+
+    migrator.sql("""
+        DROP INDEX tag_guild_id_lower_title;
+    """)
@@ -0,0 +1,13 @@
+"""Peewee migrations -- 016_create_tag_unique_title_index.py."""
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    """Write your migrations here."""
+
+    migrator.add_index('tag', 'guild_id', 'title', unique=True)
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    """Write your rollback migrations here."""
+
+    migrator.drop_index('tag', 'guild_id', 'title')
@@ -0,0 +1,34 @@
+"""Peewee migrations -- 017_create_bulk_role_job_table.py."""
+
+from datetime import datetime
+
+import peewee as pw
+
+
+class BulkRoleJob(pw.Model):
+    guild_id = pw.BigIntegerField()
+    channel_id = pw.BigIntegerField()
+    message_id = pw.BigIntegerField(null=True)
+    author_id = pw.BigIntegerField()
+    role_id = pw.BigIntegerField()
+    action = pw.CharField(max_length=10)
+    filter_role_id = pw.BigIntegerField(null=True)
+    joined_before = pw.DateTimeField(null=True)
+    without_roles = pw.BooleanField(default=False)
+    total = pw.IntegerField(default=0)
+    processed = pw.IntegerField(default=0)
+    failed = pw.IntegerField(default=0)
+    created_on = pw.DateTimeField(default=datetime.utcnow)
+    finished = pw.BooleanField(default=False)
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    """Write your migrations here."""
+
+    migrator.create_model(BulkRoleJob)
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    """Write your rollback migrations here."""
+
+    migrator.drop_table('bulkrolejob')
@@ -0,0 +1,29 @@
+"""Peewee migrations -- 018_create_mastery_snapshot_table.py."""
+
+from datetime import datetime
+
+import peewee as pw
+
+
+class MasterySnapshot(pw.Model):
+    summoner_id = pw.BigIntegerField()
+    champion_id = pw.IntegerField()
+    points = pw.IntegerField()
+    fetched_at = pw.DateTimeField(default=datetime.utcnow)
+
+    class Meta:
+        indexes = (
+            (('summoner_id', 'champion_id', 'fetched_at'), False),
+        )
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    """Write your migrations here."""
+
+    migrator.create_model(MasterySnapshot)
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    """Write your rollback migrations here."""
+
+    migrator.drop_table('masterysnapshot')
@@ -0,0 +1,28 @@
+"""Peewee migrations -- 019_create_summoner_profile_table.py."""
+
+from datetime import datetime
+
+import peewee as pw
+
+
+class SummonerProfile(pw.Model):
+    id = pw.BigIntegerField(primary_key=True)
+    region = pw.FixedCharField(4)
+    name = pw.CharField(max_length=32)
+    puuid = pw.CharField(max_length=78, null=True)
+    fetched_at = pw.DateTimeField(default=datetime.utcnow)
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    """Write your migrations here."""
+
+    migrator.create_model(SummonerProfile)
+    migrator.sql("""
+        CREATE INDEX summonerprofile_region_lower_name ON summonerprofile (region, lower(name));
+    """)
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    """Write your rollback migrations here."""
+
+    migrator.drop_table('summonerprofile')
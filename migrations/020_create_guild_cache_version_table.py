@@ -0,0 +1,20 @@
+"""Peewee migrations -- 020_create_guild_cache_version_table.py."""
+
+import peewee as pw
+
+
+class GuildCacheVersion(pw.Model):
+    guild_id = pw.BigIntegerField(primary_key=True)
+    version = pw.BigIntegerField()
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    """Write your migrations here."""
+
+    migrator.create_model(GuildCacheVersion)
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    """Write your rollback migrations here."""
+
+    migrator.drop_table('guildcacheversion')
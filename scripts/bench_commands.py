@@ -0,0 +1,335 @@
+"""
+Benchmark cog commands and check them against their database query budgets.
+
+Builds a fake guild with the given amount of members and roles in the bot's
+cache, seeds the database with infractions, tags and self-assignable roles
+for it, and invokes every scenario's command through a `Context` created from
+a fake message. REST calls go to the local fake Discord API.
+
+Every scenario declares the maximum amount of database round trips a single
+invocation may take, along with a baseline for its p95 latency. The script
+exits with status 1 if any invocation exceeds its query budget, or if the p95
+latency exceeds the baseline multiplied by `--latency-tolerance`, so that
+N+1 queries are caught before deploying.
+
+Run it from the repository root, where the bot's `config.json` lives, with
+`BOLT_DATABASE_URL` pointing to a local, migrated database. An in-memory
+SQLite database is migrated on startup, which needs no database server:
+
+    BOLT_DATABASE_URL=sqlite:///:memory: python scripts/bench_commands.py --members 5000 --roles 250
+
+Latency baselines are calibrated against Postgres on the same host.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord  # noqa: E402
+import peewee_async  # noqa: E402
+from discord.http import Route  # noqa: E402
+from fake_discord_api import BOT_USER, FakeDiscordAPI  # noqa: E402
+from peewee import fn  # noqa: E402
+
+from bolt import metrics  # noqa: E402
+from bolt.bot import Bot  # noqa: E402
+from bolt.cogs.config.models import Prefix  # noqa: E402
+from bolt.cogs.config.util import get_prefix_for_guild  # noqa: E402
+from bolt.cogs.infractions.models import Infraction  # noqa: E402
+from bolt.cogs.infractions.types import InfractionType  # noqa: E402
+from bolt.cogs.mod.models import MuteRole  # noqa: E402
+from bolt.cogs.roles.models import SelfAssignableRole  # noqa: E402
+from bolt.cogs.tags.models import Tag  # noqa: E402
+from bolt.constants import MAIN_COGS, MAIN_COGS_BASE_PATH  # noqa: E402
+from bolt.database import AsyncSqliteDatabase, database, migrate_database, objects  # noqa: E402
+from bolt.snapshot import GuildCacheVersion  # noqa: E402
+
+
+# IDs of the fake guild and its objects. Everything the benchmark
+# stores in the database is deleted by guild ID once it finishes.
+GUILD_ID = 200000000000000000
+CHANNEL_ID = GUILD_ID + 1
+MEMBER_ID_BASE = 300000000000000000
+ROLE_ID_BASE = 400000000000000000
+AUTHOR_ID = MEMBER_ID_BASE
+SELF_ASSIGNABLE_ROLES = 10
+
+
+class Scenario(NamedTuple):
+    name: str
+    # Builds the invocation for the given repetition, without prefix.
+    command: Callable[[int, Dict[str, int]], str]
+    # The maximum amount of database round trips of a single invocation.
+    query_budget: int
+    # The expected p95 latency in milliseconds against a local database.
+    latency_baseline: float
+
+
+SCENARIOS = (
+    Scenario('infraction list', lambda i, seed: "infraction list", 1, 50),
+    Scenario('infraction user', lambda i, seed: f"infraction user {MEMBER_ID_BASE + 1 + i % 10}", 1, 25),
+    Scenario('infraction detail', lambda i, seed: f"infraction detail {seed['first_infraction'] + i}", 1, 25),
+    Scenario('tag', lambda i, seed: f"tag tag-{i % seed['tags']}", 1, 25),
+    Scenario('iam', lambda i, seed: f"iam role-{i % SELF_ASSIGNABLE_ROLES}", 1, 25),
+    Scenario('mute', lambda i, seed: f"mute {MEMBER_ID_BASE + 1 + i} \"in 1 hour\" benchmark", 4, 50),
+    Scenario('setprefix', lambda i, seed: f"setprefix bench{i}_", 6, 25),
+    Scenario('stats', lambda i, seed: "stats", 0, 25),
+    Scenario('roles', lambda i, seed: "roles", 0, 50)
+)
+
+
+def user_data(user_id: int) -> dict:
+    return {'id': str(user_id), 'username': f"user-{user_id}", 'discriminator': '0001', 'avatar': None}
+
+
+def role_data(index: int, permissions: int = 0) -> dict:
+    return {
+        'id': str(ROLE_ID_BASE + index),
+        'name': f"role-{index}",
+        'color': 0,
+        'hoist': False,
+        'position': index + 1,
+        'permissions': permissions,
+        'managed': False,
+        'mentionable': False
+    }
+
+
+def guild_data(member_count: int, role_count: int) -> dict:
+    """
+    Create the data of a guild with the given amount of members and roles.
+
+    The benchmark's author owns the guild and has no roles, every other
+    member gets up to three roles besides the last one, which is used
+    as the mute role. The bot has an administrator role.
+    """
+
+    joined_at = (datetime.utcnow() - timedelta(days=30)).isoformat()
+    roles = [role_data(index) for index in range(role_count)]
+    roles.append(role_data(role_count, permissions=discord.Permissions.all().value))
+    roles.append({**role_data(-1, permissions=discord.Permissions.general().value), 'id': str(GUILD_ID),
+                  'name': '@everyone', 'position': 0})
+
+    members = [
+        {
+            'user': user_data(MEMBER_ID_BASE + index),
+            'roles': [
+                roles[(index * 7 + offset) % (role_count - 1)]['id'] for offset in range(index % 4)
+            ] if index else [],
+            'joined_at': joined_at,
+            'deaf': False,
+            'mute': False
+        }
+        for index in range(member_count)
+    ]
+    members.append({
+        'user': {**BOT_USER},
+        'roles': [roles[role_count]['id']],
+        'joined_at': joined_at,
+        'deaf': False,
+        'mute': False
+    })
+
+    return {
+        'id': str(GUILD_ID),
+        'name': "Benchmark Guild",
+        'owner_id': str(AUTHOR_ID),
+        'region': 'eu-central',
+        'icon': None,
+        'splash': None,
+        'features': [],
+        'verification_level': 0,
+        'explicit_content_filter': 0,
+        'default_message_notifications': 0,
+        'mfa_level': 0,
+        'large': False,
+        'member_count': len(members),
+        'roles': roles,
+        'emojis': [],
+        'members': members,
+        'presences': [],
+        'voice_states': [],
+        'channels': [{
+            'id': str(CHANNEL_ID),
+            'type': 0,
+            'name': 'benchmark',
+            'position': 0,
+            'topic': None,
+            'nsfw': False,
+            'permission_overwrites': []
+        }]
+    }
+
+
+async def seed_database(args) -> Dict[str, int]:
+    await clean_database()
+    rng = random.Random(args.seed)
+    created_on = datetime.utcnow() - timedelta(days=30)
+
+    await peewee_async.execute(Infraction.insert_many([
+        {
+            'guild_id': GUILD_ID,
+            'type': rng.choice([InfractionType.note, InfractionType.warning, InfractionType.kick]),
+            'user_id': MEMBER_ID_BASE + 1 + index % 10,
+            'moderator_id': AUTHOR_ID,
+            'reason': f"seeded infraction {index}",
+            'created_on': created_on + timedelta(minutes=index)
+        }
+        for index in range(args.infractions)
+    ]))
+    await peewee_async.execute(Tag.insert_many([
+        {
+            'title': f"tag-{index}",
+            'content': f"content of tag {index}",
+            'author_id': AUTHOR_ID,
+            'guild_id': GUILD_ID
+        }
+        for index in range(args.tags)
+    ]))
+    await peewee_async.execute(SelfAssignableRole.insert_many([
+        {'id': ROLE_ID_BASE + index, 'name': f"role-{index}", 'guild_id': GUILD_ID}
+        for index in range(SELF_ASSIGNABLE_ROLES)
+    ]))
+    await objects.create(MuteRole, guild_id=GUILD_ID, role_id=ROLE_ID_BASE + args.roles - 1)
+
+    first_infraction = await objects.scalar(
+        Infraction.select(fn.Min(Infraction.id)).where(Infraction.guild_id == GUILD_ID)
+    )
+    return {'first_infraction': first_infraction or 0, 'tags': args.tags}
+
+
+async def clean_database():
+    # Mutes are deleted along with their infractions.
+    for model in (Infraction, Tag, SelfAssignableRole, MuteRole, Prefix, GuildCacheVersion):
+        await peewee_async.execute(model.delete().where(model.guild_id == GUILD_ID))
+
+
+async def wait_for_nothing(*_, **__):
+    # Paginators wait for reactions, which never come during the benchmark.
+    raise asyncio.TimeoutError()
+
+
+async def run_scenario(bot: Bot, channel: discord.TextChannel, scenario: Scenario,
+                       seed: Dict[str, int], repetitions: int) -> dict:
+    command_metrics = metrics.command_metrics[scenario.name]
+    latencies = []
+    max_queries = failures = 0
+
+    for repetition in range(repetitions):
+        message = discord.Message(state=bot._connection, channel=channel, data={
+            'id': str(int(time.time() * 1000 - 1420070400000) << 22 | repetition),
+            'channel_id': str(CHANNEL_ID),
+            'author': user_data(AUTHOR_ID),
+            'content': f"<@{BOT_USER['id']}> {scenario.command(repetition, seed)}",
+            'attachments': [],
+            'embeds': [],
+            'mentions': [],
+            'mention_roles': [],
+            'mention_everyone': False,
+            'pinned': False,
+            'tts': False,
+            'type': 0,
+            'timestamp': datetime.utcnow().isoformat(),
+            'edited_timestamp': None
+        })
+        ctx = await bot.get_context(message)
+
+        db_calls_before = command_metrics.db_calls.sum
+        started = time.perf_counter()
+        await bot.invoke(ctx)
+        latencies.append(time.perf_counter() - started)
+
+        max_queries = max(max_queries, int(command_metrics.db_calls.sum - db_calls_before))
+        if ctx.command_failed:
+            failures += 1
+
+    latencies.sort()
+    return {
+        'p50': latencies[len(latencies) // 2] * 1000,
+        'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        'max queries': max_queries,
+        'failures': failures
+    }
+
+
+async def run(args) -> List[str]:
+    if isinstance(database.obj, AsyncSqliteDatabase) and database.obj.in_memory:
+        migrate_database(database.obj)
+
+    fake_api = FakeDiscordAPI()
+    runner, port = await fake_api.start()
+    Route.BASE = f"http://127.0.0.1:{port}/api/v7"
+
+    bot = Bot()
+    for cog in MAIN_COGS:
+        bot.load_extension(MAIN_COGS_BASE_PATH + cog)
+    await bot.http.static_login("fake-token", bot=True)
+    bot.wait_for = wait_for_nothing
+
+    state = bot._connection
+    state.user = discord.ClientUser(state=state, data=BOT_USER)
+    guild = state._add_guild_from_data(guild_data(args.members, args.roles))
+    channel = guild.get_channel(CHANNEL_ID)
+
+    seed = await seed_database(args)
+    scenarios = [s for s in SCENARIOS if not args.only or s.name in args.only.split(',')]
+    violations = []
+    try:
+        print(f"{'command':<20}{'p50':>10}{'p95':>10}{'baseline':>10}{'queries':>9}{'budget':>8}{'failed':>8}")
+        for scenario in scenarios:
+            result = await run_scenario(bot, channel, scenario, seed, args.repetitions)
+            print(f"{scenario.name:<20}{result['p50']:>8.1f}ms{result['p95']:>8.1f}ms"
+                  f"{scenario.latency_baseline:>8.0f}ms{result['max queries']:>9}"
+                  f"{scenario.query_budget:>8}{result['failures']:>8}")
+
+            if result['max queries'] > scenario.query_budget:
+                violations.append(f"`{scenario.name}` made {result['max queries']} queries, "
+                                  f"its budget is {scenario.query_budget}")
+            if result['p95'] > scenario.latency_baseline * args.latency_tolerance:
+                violations.append(f"`{scenario.name}` took {result['p95']:.1f}ms at p95, "
+                                  f"its baseline is {scenario.latency_baseline:.0f}ms")
+            if result['failures']:
+                violations.append(f"`{scenario.name}` failed {result['failures']} times")
+    finally:
+        await clean_database()
+        get_prefix_for_guild.cache.pop((GUILD_ID,), None)
+        await bot.close()
+        await runner.cleanup()
+
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--members', type=int, default=1000)
+    parser.add_argument('--roles', type=int, default=100)
+    parser.add_argument('--infractions', type=int, default=500)
+    parser.add_argument('--tags', type=int, default=200)
+    parser.add_argument('--repetitions', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency-tolerance', type=float, default=2.0,
+                        help="How many times its baseline a command's p95 latency may be.")
+    parser.add_argument('--only', help="The comma-separated scenarios to run, defaults to all.")
+    args = parser.parse_args()
+    if (args.roles <= SELF_ASSIGNABLE_ROLES or args.members <= args.repetitions + 10
+            or min(args.infractions, args.tags) < args.repetitions):
+        parser.error(f"At least {SELF_ASSIGNABLE_ROLES + 1} roles, more members than repetitions plus ten, "
+                     "and as many infractions and tags as repetitions are required.")
+
+    violations = asyncio.get_event_loop().run_until_complete(run(args))
+    if violations:
+        print("\nBudget violations:")
+        for violation in violations:
+            print(f"• {violation}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
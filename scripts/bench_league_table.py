@@ -0,0 +1,96 @@
+"""
+Benchmark the League leaderboard against the local fake Riot API.
+
+Fetches the mastery of a seeded set of summoners through the same per-region
+workers that `buildtable` uses, and reports the wall time along with the
+amount of requests, 429 and 5xx responses seen by the fake API.
+
+Run it from the repository root, where the bot's `config.json` lives:
+
+    python scripts/bench_league_table.py --summoners 2000 --regions EUW,NA
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_riot_api import FakeRiotAPI  # noqa: E402
+
+from bolt.optional_cogs.league import api  # noqa: E402
+from bolt.optional_cogs.league.cog import League  # noqa: E402
+from bolt.optional_cogs.league.models import Summoner  # noqa: E402
+from bolt.web import WebClient  # noqa: E402
+
+
+async def run(args) -> dict:
+    fake_api = FakeRiotAPI(
+        summoners=args.summoners, seed=args.seed, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        app_limits=args.app_limits, method_limits=args.method_limits
+    )
+    runner, port = await fake_api.start()
+
+    # Point the client at the fake API, using the platform as the path prefix.
+    for region, url in api.ENDPOINTS.items():
+        api.ENDPOINTS[region] = f"http://127.0.0.1:{port}/{url.rsplit('/', 1)[-1]}"
+    api.BASE_API_URL = ""
+
+    loop = asyncio.get_event_loop()
+    web = WebClient(loop)
+    client = api.LeagueAPIClient(web, "fake-key")
+
+    # Only the fetching part of the cog is benchmarked, which does not need a bot.
+    league = League.__new__(League)
+    league.league_client = client
+
+    regions = args.regions.split(',')
+    summoners = [
+        Summoner(id=summoner_id, guild_id=0, region=regions[summoner_id % len(regions)])
+        for summoner_id in range(1, args.summoners + 1)
+    ]
+
+    started = time.perf_counter()
+    rows = await league.fetch_table_rows(summoners, args.champion)
+    elapsed = time.perf_counter() - started
+
+    client.close()
+    await web.close()
+    await runner.cleanup()
+
+    return {
+        'summoners': len(summoners),
+        'failed': sum(1 for _, score in rows if score is None),
+        'wall time': f"{elapsed:.2f}s",
+        'rows per second': f"{len(rows) / elapsed:.1f}",
+        'requests': fake_api.stats['requests'],
+        '429 responses': fake_api.stats['429'],
+        '5xx responses': fake_api.stats['5xx']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--summoners', type=int, default=1000)
+    parser.add_argument('--regions', default="EUW,NA,EUNE")
+    parser.add_argument('--champion', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--app-limits', default="500:10,30000:600")
+    parser.add_argument('--method-limits', default="2000:60")
+    args = parser.parse_args()
+
+    results = asyncio.get_event_loop().run_until_complete(run(args))
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        print(f"{name:>{width}}: {value}")
+
+
+if __name__ == '__main__':
+    main()
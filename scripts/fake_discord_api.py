@@ -0,0 +1,114 @@
+"""
+A local stand-in for the Discord REST API, used when replaying gateway events.
+
+Accepts every request, answers message creation and edits with a plausible
+message object, the application info with the bot user and everything else
+with an empty response, and counts requests by route. It does not enforce any rate limits.
+"""
+
+import collections
+import itertools
+import re
+import time
+from datetime import datetime
+from typing import Tuple
+
+from aiohttp import web
+
+
+BOT_USER = {
+    'id': '100000000000000000',
+    'username': 'Bolt',
+    'discriminator': '0000',
+    'avatar': None,
+    'bot': True
+}
+
+# Used to collapse IDs in paths, so that requests are counted per route.
+SNOWFLAKE = re.compile(r'/\d{15,}')
+
+
+class FakeDiscordAPI:
+    def __init__(self):
+        self.stats = collections.Counter()
+        self._ids = itertools.count(int(time.time() * 1000 - 1420070400000) << 22)
+
+        self.app = web.Application()
+        self.app.router.add_get('/api/v7/users/@me', self.current_user)
+        self.app.router.add_get('/api/v7/oauth2/applications/@me', self.application_info)
+        self.app.router.add_post('/api/v7/channels/{channel_id}/messages', self.create_message)
+        self.app.router.add_patch('/api/v7/channels/{channel_id}/messages/{message_id}', self.edit_message)
+        self.app.router.add_route('*', '/{path:.*}', self.fallback)
+
+    def count(self, request: web.Request):
+        self.stats['requests'] += 1
+        self.stats[f"{request.method} {SNOWFLAKE.sub('/:id', request.path)}"] += 1
+
+    async def current_user(self, request: web.Request) -> web.Response:
+        self.count(request)
+        return web.json_response(BOT_USER)
+
+    async def application_info(self, request: web.Request) -> web.Response:
+        self.count(request)
+        return web.json_response({
+            'id': BOT_USER['id'],
+            'name': BOT_USER['username'],
+            'description': '',
+            'icon': None,
+            'rpc_origins': None,
+            'bot_public': True,
+            'bot_require_code_grant': False,
+            'owner': {**BOT_USER, 'id': '100000000000000001', 'username': 'Owner', 'bot': False}
+        })
+
+    async def message_response(self, request: web.Request, message_id: str) -> web.Response:
+        if request.content_type == 'application/json':
+            body = await request.json()
+        else:
+            # Messages with attachments are sent as multipart forms.
+            await request.read()
+            body = {}
+
+        return web.json_response({
+            'id': message_id,
+            'channel_id': request.match_info['channel_id'],
+            'author': BOT_USER,
+            'content': body.get('content') or '',
+            'embeds': [body['embed']] if body.get('embed') else [],
+            'attachments': [],
+            'mentions': [],
+            'mention_roles': [],
+            'mention_everyone': False,
+            'pinned': False,
+            'tts': False,
+            'type': 0,
+            'timestamp': datetime.utcnow().isoformat(),
+            'edited_timestamp': None
+        })
+
+    async def create_message(self, request: web.Request) -> web.Response:
+        self.count(request)
+        return await self.message_response(request, str(next(self._ids)))
+
+    async def edit_message(self, request: web.Request) -> web.Response:
+        self.count(request)
+        return await self.message_response(request, request.match_info['message_id'])
+
+    async def fallback(self, request: web.Request) -> web.Response:
+        self.count(request)
+        await request.read()
+        return web.Response(status=204)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> Tuple[web.AppRunner, int]:
+        """
+        Start serving in the background.
+
+        Returns:
+            Tuple[web.AppRunner, int]:
+                The runner, which must be cleaned up to stop the server, and the bound port.
+        """
+
+        runner = web.AppRunner(self.app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner, runner.addresses[0][1]
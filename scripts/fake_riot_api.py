@@ -0,0 +1,233 @@
+"""
+A local stand-in for the parts of the Riot API used by the League cog.
+
+Serves the summoner, champion mastery and static data endpoints for a seeded
+set of summoners, enforces fixed-window rate limits with the same headers as
+the real API, and can inject latency, 429 and 5xx responses.
+
+Run it standalone with `python scripts/fake_riot_api.py --help`, or use
+`FakeRiotAPI` directly, as done by `scripts/bench_league_table.py`.
+"""
+
+import argparse
+import asyncio
+import collections
+import random
+import time
+from typing import Dict, List, Tuple
+
+from aiohttp import web
+
+
+CHAMPIONS = {
+    'Annie': 1, 'Olaf': 2, 'Galio': 3, 'TwistedFate': 4, 'XinZhao': 5,
+    'Urgot': 6, 'Leblanc': 7, 'Vladimir': 8, 'Fiddlesticks': 9, 'Kayle': 10,
+    'MonkeyKing': 62, 'LeeSin': 64, 'Chogath': 31
+}
+CHAMPION_NAMES = {'MonkeyKing': 'Wukong', 'LeeSin': 'Lee Sin', 'Chogath': "Cho'Gath", 'TwistedFate': 'Twisted Fate',
+                  'XinZhao': 'Xin Zhao', 'Leblanc': 'LeBlanc'}
+VERSION = "8.24.1"
+
+
+class FixedWindowLimit:
+    """Counts requests in fixed windows for a limit header such as `500:10,30000:600`."""
+
+    def __init__(self, limits: str):
+        self.header = limits
+        self.windows: List[Tuple[int, int]] = [
+            tuple(int(part) for part in window.split(':')) for window in limits.split(',')
+        ]
+        self.counts: Dict[int, Tuple[float, int]] = {}
+
+    def hit(self, now: float) -> float:
+        """Count a request, returning the seconds to wait if it exceeds the limit, or 0."""
+
+        retry_after = 0.0
+        for limit, period in self.windows:
+            started, count = self.counts.get(period, (now, 0))
+            if now - started >= period:
+                started, count = now, 0
+            count += 1
+            self.counts[period] = (started, count)
+            if count > limit:
+                retry_after = max(retry_after, started + period - now)
+        return retry_after
+
+    def count_header(self) -> str:
+        return ','.join(f"{self.counts.get(period, (0, 0))[1]}:{period}" for _, period in self.windows)
+
+
+class FakeRiotAPI:
+    """
+    Args:
+        summoners (int):
+            How many summoners to seed per platform.
+        seed (int):
+            The seed for the generated names and mastery scores.
+        latency (float):
+            The mean latency of every response, in seconds.
+        jitter (float):
+            The maximum random deviation from the mean latency, in seconds.
+        error_rate (float):
+            The probability of answering a request with 503.
+        throttle_rate (float):
+            The probability of answering a request with a service 429.
+        app_limits (str):
+            The application rate limit per platform.
+        method_limits (str):
+            The method rate limit per platform and endpoint.
+    """
+
+    def __init__(self, summoners: int = 1000, seed: int = 0, latency: float = 0.05, jitter: float = 0.02,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 app_limits: str = "500:10,30000:600", method_limits: str = "2000:60"):
+        self.summoners = summoners
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.app_limits = collections.defaultdict(lambda: FixedWindowLimit(app_limits))
+        self.method_limits = collections.defaultdict(lambda: FixedWindowLimit(method_limits))
+        self.stats = collections.Counter()
+        self._random = random.Random(seed)
+
+        self.app = web.Application()
+        self.app.router.add_get('/{platform}/lol/summoner/v3/summoners/by-name/{name}', self.summoner_by_name)
+        self.app.router.add_get('/{platform}/lol/summoner/v3/summoners/{id:\\d+}', self.summoner_by_id)
+        self.app.router.add_get(
+            '/{platform}/lol/champion-mastery/v3/champion-masteries/by-summoner/{id}/by-champion/{champion}',
+            self.mastery
+        )
+        self.app.router.add_get('/{platform}/lol/static-data/v3/versions', self.versions)
+        self.app.router.add_get('/{platform}/lol/static-data/v3/champions', self.champions)
+
+    def summoner(self, summoner_id: int) -> dict:
+        return {
+            'id': summoner_id,
+            'accountId': summoner_id * 7,
+            'name': f"Summoner{summoner_id}",
+            'profileIconId': summoner_id % 30,
+            'summonerLevel': 30 + summoner_id % 100,
+            'revisionDate': 0
+        }
+
+    def mastery_points(self, summoner_id: int, champion_id: int) -> int:
+        return random.Random(hash((self.seed, summoner_id, champion_id))).randint(0, 2_000_000)
+
+    async def respond(self, request: web.Request, method: str, body) -> web.Response:
+        platform = request.match_info['platform']
+        self.stats['requests'] += 1
+        await asyncio.sleep(max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter)))
+
+        now = time.monotonic()
+        app_limit = self.app_limits[platform]
+        method_limit = self.method_limits[(platform, method)]
+        app_retry_after = app_limit.hit(now)
+        method_retry_after = method_limit.hit(now)
+        headers = {
+            'X-App-Rate-Limit': app_limit.header,
+            'X-App-Rate-Limit-Count': app_limit.count_header(),
+            'X-Method-Rate-Limit': method_limit.header,
+            'X-Method-Rate-Limit-Count': method_limit.count_header()
+        }
+
+        if app_retry_after or method_retry_after:
+            self.stats['429'] += 1
+            headers['X-Rate-Limit-Type'] = 'application' if app_retry_after else 'method'
+            headers['Retry-After'] = str(max(1, round(max(app_retry_after, method_retry_after))))
+            return web.json_response({'status': {'status_code': 429}}, status=429, headers=headers)
+        elif self._random.random() < self.throttle_rate:
+            self.stats['429'] += 1
+            headers['X-Rate-Limit-Type'] = 'service'
+            return web.json_response({'status': {'status_code': 429}}, status=429, headers=headers)
+        elif self._random.random() < self.error_rate:
+            self.stats['5xx'] += 1
+            return web.json_response({'status': {'status_code': 503}}, status=503, headers=headers)
+        elif body is None:
+            self.stats['404'] += 1
+            return web.json_response({'status': {'status_code': 404}}, status=404, headers=headers)
+
+        self.stats['200'] += 1
+        return web.json_response(body, headers=headers)
+
+    def known_summoner(self, summoner_id: int) -> bool:
+        return 1 <= summoner_id <= self.summoners
+
+    async def summoner_by_name(self, request: web.Request) -> web.Response:
+        name = request.match_info['name'].lower().replace(' ', '')
+        summoner_id = int(name[len('summoner'):]) if name.startswith('summoner') and name[8:].isdigit() else 0
+        body = self.summoner(summoner_id) if self.known_summoner(summoner_id) else None
+        return await self.respond(request, "summoner/by-name", body)
+
+    async def summoner_by_id(self, request: web.Request) -> web.Response:
+        summoner_id = int(request.match_info['id'])
+        body = self.summoner(summoner_id) if self.known_summoner(summoner_id) else None
+        return await self.respond(request, "summoner/by-id", body)
+
+    async def mastery(self, request: web.Request) -> web.Response:
+        summoner_id = int(request.match_info['id'])
+        champion_id = int(request.match_info['champion'])
+        body = None
+        if self.known_summoner(summoner_id) and champion_id in CHAMPIONS.values():
+            body = {
+                'playerId': summoner_id,
+                'championId': champion_id,
+                'championPoints': self.mastery_points(summoner_id, champion_id),
+                'championLevel': 7
+            }
+        return await self.respond(request, "champion-mastery/by-champion", body)
+
+    async def versions(self, request: web.Request) -> web.Response:
+        return await self.respond(request, "static-data/versions", [VERSION, "8.23.1"])
+
+    async def champions(self, request: web.Request) -> web.Response:
+        return await self.respond(request, "static-data/champions", {
+            'type': 'champion',
+            'version': VERSION,
+            'data': {
+                key: {'id': champion_id, 'key': key, 'name': CHAMPION_NAMES.get(key, key), 'title': ''}
+                for key, champion_id in CHAMPIONS.items()
+            }
+        })
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> Tuple[web.AppRunner, int]:
+        """
+        Start serving in the background.
+
+        Returns:
+            Tuple[web.AppRunner, int]:
+                The runner, which must be cleaned up to stop the server, and the bound port.
+        """
+
+        runner = web.AppRunner(self.app)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        return runner, runner.addresses[0][1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8042)
+    parser.add_argument('--summoners', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--app-limits', default="500:10,30000:600")
+    parser.add_argument('--method-limits', default="2000:60")
+    args = parser.parse_args()
+
+    api = FakeRiotAPI(
+        summoners=args.summoners, seed=args.seed, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        app_limits=args.app_limits, method_limits=args.method_limits
+    )
+    web.run_app(api.app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Replay recorded gateway events against the bot to benchmark its listeners.
+
+Record events by running the bot with `BOLT_RECORD_GATEWAY=events.jsonl.gz`.
+The replay feeds them through discord.py's parsers, so all listeners and
+commands run as usual, while REST calls go to a local fake Discord API.
+
+Run it from the repository root, where the bot's `config.json` lives, with
+`BOLT_DATABASE_URL` pointing to a local, migrated database:
+
+    python scripts/replay_gateway.py events.jsonl.gz --speed 10
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import resource
+import sys
+import time
+from typing import Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from discord.http import Route  # noqa: E402
+from fake_discord_api import FakeDiscordAPI  # noqa: E402
+
+from bolt import metrics  # noqa: E402
+from bolt.bot import Bot  # noqa: E402
+from bolt.constants import MAIN_COGS, MAIN_COGS_BASE_PATH  # noqa: E402
+
+
+def read_events(path: str) -> Iterator[dict]:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+async def replay(bot: Bot, path: str, speed: float) -> dict:
+    handler_latency = metrics.Histogram(metrics.LATENCY_BUCKETS)
+    running_handlers = set()
+    schedule_event = bot._schedule_event
+
+    def timed_schedule_event(*args, **kwargs):
+        task = schedule_event(*args, **kwargs)
+        scheduled = time.perf_counter()
+
+        def handler_done(_):
+            running_handlers.discard(task)
+            handler_latency.observe(time.perf_counter() - scheduled)
+
+        running_handlers.add(task)
+        task.add_done_callback(handler_done)
+        return task
+
+    bot._schedule_event = timed_schedule_event
+    parsers = bot._connection.parsers
+
+    events = failed = 0
+    db_calls_before = metrics.totals['db_calls']
+    started = time.perf_counter()
+    for event in read_events(path):
+        if speed:
+            delay = event['t'] / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        if event['e'] == 'GUILD_CREATE':
+            # Large guilds would request their members over the gateway, which does not exist here.
+            event['d']['large'] = False
+
+        bot.dispatch('socket_response', {'op': 0, 't': event['e'], 'd': event['d']})
+        parser = parsers.get(event['e'])
+        if parser is not None:
+            try:
+                parser(event['d'])
+            except Exception:
+                failed += 1
+        events += 1
+
+        # Let the scheduled handlers run, as they would between two gateway messages.
+        await asyncio.sleep(0)
+
+    if running_handlers:
+        await asyncio.wait(running_handlers)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'events': events,
+        'failed to parse': failed,
+        'wall time': f"{elapsed:.2f}s",
+        'events per second': f"{events / elapsed:.1f}",
+        'handlers run': handler_latency.count,
+        'p50 handler latency': f"{handler_latency.quantile(0.50) * 1000:.1f}ms",
+        'p99 handler latency': f"{handler_latency.quantile(0.99) * 1000:.1f}ms",
+        'db queries per event': f"{(metrics.totals['db_calls'] - db_calls_before) / max(events, 1):.2f}",
+        # `ru_maxrss` is reported in kilobytes on Linux.
+        'peak rss': f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB"
+    }
+
+
+async def run(args) -> dict:
+    fake_api = FakeDiscordAPI()
+    runner, port = await fake_api.start()
+    Route.BASE = f"http://127.0.0.1:{port}/api/v7"
+
+    bot = Bot()
+    for cog in args.cogs.split(','):
+        bot.load_extension(MAIN_COGS_BASE_PATH + cog)
+    await bot.http.static_login("fake-token", bot=True)
+
+    try:
+        results = await replay(bot, args.path, args.speed)
+    finally:
+        await bot.close()
+        await runner.cleanup()
+
+    results['rest calls'] = fake_api.stats['requests']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help="The recorded events, as written by `BOLT_RECORD_GATEWAY`.")
+    parser.add_argument('--speed', type=float, default=0,
+                        help="How many times faster than recorded to replay, or 0 for as fast as possible.")
+    parser.add_argument('--cogs', default=','.join(MAIN_COGS), help="The comma-separated main cogs to load.")
+    args = parser.parse_args()
+
+    results = asyncio.get_event_loop().run_until_complete(run(args))
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        print(f"{name:>{width}}: {value}")
+
+
+if __name__ == '__main__':
+    main()